@@ -0,0 +1,103 @@
+"""
+Microbenchmark of utils.clearScreen()
+
+Compares clearing the screen with ANSI escape sequences in-process
+with the fallback of running 'clear' (or 'cls') in a new process, which was the only way before.
+For each, it shows the time per call, the number of writes to stdout per call
+(not counting what the 'clear' process writes), and the number of processes started per call.
+
+The output is redirected to os.devnull (at the file descriptor level, so the 'clear' process writes there too).
+
+Run from the repository root:
+	python benchmarks/bench_clearscreen.py
+"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+from os import path
+from time import perf_counter
+from typing import TextIO
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+
+from src.SBA import utils  # NOQA: E402
+
+
+class CountingWriter:
+	"""A text stream which counts the (non-empty) writes, every write is flushed like a terminal"""
+	
+	def __init__(self, stream: TextIO) -> None:
+		self.stream: TextIO = stream
+		self.n_write: int = 0
+	
+	def write(self, text: str) -> int:
+		if not text:
+			return 0
+		self.n_write += 1
+		self.stream.write(text)
+		self.stream.flush()
+		return len(text)
+	
+	def flush(self) -> None:
+		self.stream.flush()
+	
+	def isatty(self) -> bool:
+		return True
+
+
+def bench(supports_ansi: bool, n_call: int) -> tuple[float, float, float]:
+	"""Returns microseconds, writes and processes started per call"""
+	n_process: int = 0
+	original_system = utils.system
+	
+	def countingSystem(command: str) -> int:
+		nonlocal n_process
+		n_process += 1
+		return original_system(command)
+	
+	utils.system = countingSystem
+	utils.terminal_supports_ansi = supports_ansi
+	original_stdout_fd: int = os.dup(1)
+	devnull_fd: int = os.open(os.devnull, os.O_WRONLY)
+	os.dup2(devnull_fd, 1)
+	original_stdout: TextIO = sys.stdout
+	writer: CountingWriter = CountingWriter(os.fdopen(os.dup(1), 'w'))
+	sys.stdout = writer
+	try:
+		start: float = perf_counter()
+		for _ in range(n_call):
+			utils.clearScreen()
+		seconds: float = perf_counter() - start
+	finally:
+		sys.stdout = original_stdout
+		os.dup2(original_stdout_fd, 1)
+		os.close(original_stdout_fd)
+		os.close(devnull_fd)
+		writer.stream.close()
+		utils.system = original_system
+	return seconds / n_call * 1e6, writer.n_write / n_call, n_process / n_call
+
+
+def main() -> None:
+	os.environ.setdefault('TERM', 'xterm')
+	for name, supports_ansi, n_call in (("ANSI escape sequences", True, 10000), ("'clear' process", False, 100)):
+		microseconds, n_write, n_process = bench(supports_ansi, n_call)
+		print(f"{name:<24} {microseconds:10.1f} us/call {n_write:5.1f} writes/call {n_process:5.1f} processes/call")
+
+
+if __name__ == '__main__':
+	main()
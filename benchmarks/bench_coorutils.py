@@ -0,0 +1,279 @@
+"""
+Microbenchmark of the coordinate expression parser
+
+Compares coorExprAnalysis() and getCoorsFromCoorExpr() with the implementation before the single-pass tokenizer,
+using the coordinate expressions in tests/test_coorutils.py.
+It checks both implementations give the same result (or raise the same exception) first.
+
+Run from the repository root:
+	python benchmarks/bench_coorutils.py
+"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import sys
+from logging import getLogger, Logger
+from os import path
+from string import ascii_uppercase, digits
+from timeit import timeit
+from typing import Any, Callable
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+
+from src.SBA.coorutils import *  # NOQA: E402
+from src.SBA.coorutils import _getCoorsFromCoorExpr, ExceptionLogger  # NOQA: E402
+
+Case = tuple[str, dict[str, int]]
+
+
+def getTestCases() -> list[Case]:
+	"""Returns the (coordinate expression, keyword arguments) of every call in tests/test_coorutils.py"""
+	test_file_path: str = path.join(path.dirname(__file__), '../tests/test_coorutils.py')
+	with open(test_file_path, encoding='utf-8') as file:
+		tree: ast.Module = ast.parse(file.read())
+	cases: list[Case] = []
+	for node in ast.walk(tree):
+		if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+				and node.func.id in ('coorExprAnalysis', 'getCoorsFromCoorExpr')
+				and len(node.args) == 1 and isinstance(node.args[0], ast.Constant)
+				and type(node.args[0].value) is str
+				and all(isinstance(keyword.value, ast.Constant) for keyword in node.keywords)):
+			cases.append((node.args[0].value, {keyword.arg: keyword.value.value for keyword in node.keywords}))
+	return cases
+
+
+def outcome(function: Callable, case: Case) -> Any:
+	"""Returns the result of the function, or the class of the exception raised"""
+	coor_expr, kwargs = case
+	try:
+		return function(coor_expr, **kwargs)
+	except Exception as exception:  # NOQA # Comparing exceptions
+		return exception.__class__
+
+
+def runAll(function: Callable, cases: list[Case]) -> None:
+	"""Call the function with every case"""
+	for coor_expr, kwargs in cases:
+		try:
+			function(coor_expr, **kwargs)
+		except (CoordinateExpressionException, TypeError, ValueError):
+			pass
+
+
+# THE BELOW FUNCTIONS ARE COPIED FROM coorutils BEFORE THE SINGLE-PASS TOKENIZER, FOR COMPARISON ONLY
+
+
+@ExceptionLogger
+def legacyCoorExprAnalysis(coor_expr: str, /, *, n_row: int = 99, n_column: int = 26) -> list[Coor]:
+	logger: Logger = getLogger('coorExprAnalysis')
+	logger.info(f"Analysing the coordinate expression: {coor_expr}")
+	
+	if type(coor_expr) is not str or type(n_row) is not int or type(n_column) is not int:
+		raise TypeError
+	if not 1 <= n_row <= 99 or not 1 <= n_column <= 99:
+		raise ValueError
+	
+	coor_expr: str = (coor_expr
+	                  .strip()
+	                  .replace(' ', '')
+	                  .replace('\t', '')
+	                  .upper())
+	
+	if coor_expr == '':
+		raise EmptyCoordinate
+	
+	for char in coor_expr:
+		if char not in ascii_uppercase + digits + ':':
+			raise InvalidCharacter
+	
+	if coor_expr[0] == ':':
+		raise NoStartingCoordinate
+	
+	if coor_expr[-1] == ':':
+		raise NoEndingCoordinate
+	
+	if ':' not in coor_expr:  # Single seat
+		if all([char in ascii_uppercase for char in coor_expr]):
+			raise NoRowCoordinate
+		if all([char in digits for char in coor_expr]):
+			raise NoColumnCoordinate
+		if coor_expr[0] in ascii_uppercase and coor_expr[-1] in ascii_uppercase:
+			raise ColumnCoordinatesAtTwoSide
+		if coor_expr[0] in digits and coor_expr[-1] in digits:
+			raise RowCoordinatesAtTwoSide
+		
+		if coor_expr[0] in digits:  # Row first
+			column: str = coor_expr[-1]  # Row first = last char is column
+			row_str: str = coor_expr[:-1]
+			if any([char in ascii_uppercase for char in row_str]):
+				raise AlphabetCharacterInRowNumber
+			row: int = int(row_str)
+		
+		else:  # Column first
+			column: str = coor_expr[0]  # Column first = first char is column
+			row_str: str = coor_expr[1:]
+			if any([char in ascii_uppercase for char in row_str]):
+				raise AlphabetCharacterInRowNumber
+			row: int = int(row_str)
+		
+		coordinate: tuple[int, str] = (row, column)
+		coordinates: list[tuple[int, str]] = [coordinate]
+	
+	elif coor_expr.count(':') > 1:
+		raise MoreThanOneColon
+	
+	else:
+		coordinates: list[tuple[int, str]] = []
+		for coor in coor_expr.split(':'):
+			if all([char in ascii_uppercase for char in coor]):
+				raise NoRowCoordinate
+			if all([char in digits for char in coor]):
+				raise NoColumnCoordinate
+			if coor[0] in ascii_uppercase and coor[-1] in ascii_uppercase:
+				raise ColumnCoordinatesAtTwoSide
+			if coor[0] in digits and coor[-1] in digits:
+				raise RowCoordinatesAtTwoSide
+			
+			if coor[0] in digits:  # Row first
+				column: str = coor[-1]  # Row first = last char is column
+				row_str: str = coor[:-1]
+				if any([char in ascii_uppercase for char in row_str]):
+					raise AlphabetCharacterInRowNumber
+				row: int = int(row_str)
+			
+			else:  # Column first
+				column: str = coor[0]  # Column first = first char is column
+				row_str: str = coor[1:]
+				if any([char in ascii_uppercase for char in row_str]):
+					raise AlphabetCharacterInRowNumber
+				row: int = int(row_str)
+			
+			coordinate: tuple[int, str] = (row, column)
+			coordinates.append(coordinate)
+	
+	coordinate_indexes: list[Coor] = []
+	for coordinate in coordinates:
+		row: int = coordinate[0]
+		if row == 0:
+			raise RowNumberIsZero
+		row_index: int = row - 1
+		column: str = coordinate[1]
+		column_index: int = ord(column) - 65
+		coordinate_index: Coor = (row_index, column_index)
+		coordinate_indexes.append(coordinate_index)
+	
+	if len(coordinate_indexes) == 2:
+		start, end = coordinate_indexes
+		if start == end:
+			raise SameCoordinates
+		if start[0] > end[0]:
+			raise CoordinatesWrongOrder
+		if start[0] == end[0]:  # Same row
+			if start[1] > end[1]:
+				raise CoordinatesWrongOrder
+	
+	max_row_index: int = n_row - 1
+	max_column_index: int = n_column - 1
+	for coordinate_index in coordinate_indexes:
+		row_index, column_index = coordinate_index
+		if row_index > max_row_index:
+			raise RowNumberOutOfRange
+		if column_index > max_column_index:
+			raise ColumnNumberOutOfRange
+	
+	logger.debug(f'{coordinate_indexes}')
+	return coordinate_indexes
+
+
+@ExceptionLogger
+def legacyGetCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int = 26) -> list[Coor]:
+	logger: Logger = getLogger('getCoorsFromCoorExpr')
+	logger.info(f"Analysing the coordinate expression: {coor_expr}")
+	
+	analysis_result: list[Coor] = legacyCoorExprAnalysis(coor_expr, n_row=n_row, n_column=n_column)
+	
+	if len(analysis_result) == 1:
+		logger.info("Single coordinate")
+		return analysis_result
+	
+	analysis_result_start: Coor = analysis_result[0]
+	analysis_result_end: Coor = analysis_result[1]
+	
+	# Single row:
+	if analysis_result_start[0] == analysis_result_end[0]:
+		logger.info("Single row")
+		row_index: int = analysis_result_start[0]
+		coordinates: list[Coor] = []
+		for column_index in range(analysis_result_start[1], analysis_result_end[1] + 1):
+			coordinates.append((row_index, column_index))
+		return coordinates
+	
+	# Single column:
+	if analysis_result_start[1] == analysis_result_end[1]:
+		logger.info("Single column")
+		column_index: int = analysis_result_start[1]
+		coordinates: list[Coor] = []
+		for row_index in range(analysis_result_start[0], analysis_result_end[0] + 1):
+			coordinates.append((row_index, column_index))
+		return coordinates
+	
+	starting_coordinate: Coor = analysis_result_start
+	ending_coordinate: Coor = analysis_result_end
+	
+	# Detect 'top-right to bottom-left' and change it to 'top-left to bottom-right'
+	if analysis_result_start[1] > analysis_result_end[1]:
+		logger.info("Top-right to bottom-left detected! Changing it...")
+		starting_coordinate: Coor = (analysis_result_start[0], analysis_result_end[1])
+		ending_coordinate: Coor = (analysis_result_end[0], analysis_result_start[1])
+	
+	logger.debug(f"Starting coordinate: {starting_coordinate}")
+	logger.debug(f"Ending coordinate: {ending_coordinate}")
+	
+	coordinates: list[Coor] = []
+	
+	for row_index in range(starting_coordinate[0], ending_coordinate[0] + 1):
+		for column_index in range(starting_coordinate[1], ending_coordinate[1] + 1):
+			logger.debug(f"Adding coordinate {row_index} {column_index}")
+			coordinates.append((row_index, column_index))
+	
+	return coordinates
+
+
+def main() -> None:
+	cases: list[Case] = getTestCases()
+	print(f"{len(cases)} cases from tests/test_coorutils.py")
+	
+	for case in cases:
+		if outcome(coorExprAnalysis, case) != outcome(legacyCoorExprAnalysis, case):
+			raise AssertionError(f"coorExprAnalysis: different outcome for {case}")
+		if outcome(getCoorsFromCoorExpr, case) != outcome(legacyGetCoorsFromCoorExpr, case):
+			raise AssertionError(f"getCoorsFromCoorExpr: different outcome for {case}")
+	
+	n_round: int = 200
+	timings: dict[str, float] = {
+		"coorExprAnalysis (legacy)": timeit(lambda: runAll(legacyCoorExprAnalysis, cases), number=n_round),
+		"coorExprAnalysis": timeit(lambda: runAll(coorExprAnalysis, cases), number=n_round),
+		"getCoorsFromCoorExpr (legacy)": timeit(lambda: runAll(legacyGetCoorsFromCoorExpr, cases), number=n_round),
+		"getCoorsFromCoorExpr (uncached)":
+			timeit(lambda: (_getCoorsFromCoorExpr.cache_clear(), runAll(getCoorsFromCoorExpr, cases)), number=n_round),
+		"getCoorsFromCoorExpr (cached)": timeit(lambda: runAll(getCoorsFromCoorExpr, cases), number=n_round),
+	}
+	for name, seconds in timings.items():
+		print(f"{name:<32} {seconds / (n_round * len(cases)) * 1e6:8.2f} us/call")
+
+
+if __name__ == '__main__':
+	main()
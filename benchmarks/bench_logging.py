@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the logging on the purchase path and in House.searchTicket()
+
+Runs the real code with the module-level logger and lazy %-style arguments (now),
+and again with the logger replaced by one which looks up the logger with getLogger() and formats the message
+on every call, like the old `logger: Logger = getLogger(...)` in every function with f-string messages (before).
+
+The purchase path is findBestSeats(), then staging two seats and committing a PurchaseTransaction,
+without writing the journal (the disk would hide the difference).
+Log records go to a handler which drops them, so only the cost of logging itself is measured.
+
+Run from the repository root:
+	python benchmarks/bench_logging.py
+"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from logging import getLogger, Logger, NullHandler
+from os import path
+from time import perf_counter
+from typing import Any
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+
+from src.SBA import house as house_module  # NOQA: E402
+from src.SBA.house import House, PurchaseTransaction  # NOQA: E402
+
+
+class PerCallLogger:
+	"""Looks up the logger and formats the message on every call, like before"""
+	
+	def __init__(self, name: str) -> None:
+		self.name: str = name
+	
+	def isEnabledFor(self, level: int) -> bool:
+		return getLogger(self.name).isEnabledFor(level)
+	
+	def debug(self, message: str, *args: Any) -> None:
+		getLogger(self.name).debug(message % args if args else message)
+	
+	def info(self, message: str, *args: Any) -> None:
+		getLogger(self.name).info(message % args if args else message)
+	
+	def warning(self, message: str, *args: Any) -> None:
+		getLogger(self.name).warning(message % args if args else message)
+
+
+def benchSearchTicket(n_call: int) -> float:
+	"""Returns microseconds per call"""
+	n_ticket: int = len(House.tickets_table)
+	start: float = perf_counter()
+	for i in range(n_call):
+		House.searchTicket(i % n_ticket + 1)
+	return (perf_counter() - start) / n_call * 1e6
+
+
+def benchPurchase(n_call: int) -> float:
+	"""Returns microseconds per purchase"""
+	house: House = House(row_number=20, column_number=20)
+	house.movie = "Movie"
+	start: float = perf_counter()
+	for _ in range(n_call):
+		best_seats = house.findBestSeats(2)
+		if best_seats is None:
+			house.clearPlan()
+			best_seats = house.findBestSeats(2)
+		transaction: PurchaseTransaction = house.beginPurchase()
+		for row_index, column_index in best_seats:
+			transaction.stage(row_index, column_index, house.adult_price)
+		transaction.commit()
+	return (perf_counter() - start) / n_call * 1e6
+
+
+def main() -> None:
+	root_logger: Logger = getLogger()
+	root_logger.addHandler(NullHandler())
+	module_logger: Logger = house_module.logger
+	
+	setup_house: House = House(row_number=30, column_number=26)
+	setup_house.movie = "Movie"
+	transaction: PurchaseTransaction = setup_house.beginPurchase()
+	for row_index in range(30):
+		for column_index in range(26):
+			transaction.stage(row_index, column_index, 50)
+	transaction.commit()
+	
+	for level in ('INFO', 'WARNING'):
+		root_logger.setLevel(level)
+		for name, logger in (("before", PerCallLogger('house')), ("now", module_logger)):
+			house_module.logger = logger
+			print(f"{level:<8} {name:<7} searchTicket {benchSearchTicket(100000):8.3f} us/call "
+			      f"purchase {benchPurchase(20000):8.3f} us/purchase")
+	house_module.logger = module_logger
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark of login.verifyPassword()
+
+Shows the latency of verifying a password with each password hasher at different cost settings,
+and of a quick re-login which hits the verified-credential cache.
+Use it to pick the cost of `login.default_hasher` for the kiosk hardware.
+
+No file is written, the hashed passwords are already hashed with the measured hasher so nothing is upgraded.
+
+Run from the repository root:
+	python benchmarks/bench_login.py
+"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+
+from src.SBA import login  # NOQA: E402
+from src.SBA.login import Pbkdf2Hasher, PasswordHasher, ScryptHasher, Sha3Hasher, verifyPassword  # NOQA: E402
+
+PASSWORD: str = "pass,"
+
+
+def bench(hasher: PasswordHasher, n_call: int, *, cached: bool) -> float:
+	"""Returns milliseconds per login"""
+	login.default_hasher = hasher
+	login.hashers[hasher.name] = hasher
+	account: dict[str, str] = {"name": "admin", "hashed_password": hasher.hash(PASSWORD)}
+	login.verified_credentials.clear()
+	if cached:
+		verifyPassword(account, PASSWORD)
+	start: float = perf_counter()
+	for _ in range(n_call):
+		if not cached:
+			login.verified_credentials.clear()
+		verifyPassword(account, PASSWORD)
+	return (perf_counter() - start) / n_call * 1e3
+
+
+def main() -> None:
+	settings: list[tuple[str, PasswordHasher, int]] = [
+		("sha3_512 (legacy)", Sha3Hasher(), 10000),
+		*((f"pbkdf2_sha256 iterations={iterations}", Pbkdf2Hasher(iterations), 5)
+		  for iterations in (100_000, 300_000, 600_000)),
+		*((f"scrypt n=2**{n_power}", ScryptHasher(n=2 ** n_power), 5) for n_power in (12, 14, 15, 16)),
+	]
+	for name, hasher, n_call in settings:
+		print(f"{name:<36} {bench(hasher, n_call, cached=False):10.3f} ms/login "
+		      f"{bench(hasher, 10000, cached=True):8.4f} ms/cached re-login")
+
+
+if __name__ == '__main__':
+	main()
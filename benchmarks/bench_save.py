@@ -0,0 +1,108 @@
+"""
+Benchmark of saving a snapshot with the pickle storage backend
+
+Compares PickleBackend.save() (now: pickle into a temporary file with a checksum, fsync, rename,
+keep the previous snapshot) with pickling straight into the truncated snapshot files (before).
+Both fsync the new journal.
+
+"tickets changed" is a save after selling tickets, e.g. a journal compaction,
+"tickets unchanged" is a save after changing a house, e.g. its movie, where the tickets snapshot is not written again.
+
+The data is 10 houses of 30x26 seats with the given number of tickets sold.
+Files are written to a temporary directory, pass a directory to measure another disk, e.g. the data folder's:
+	python benchmarks/bench_save.py data
+
+Run from the repository root:
+	python benchmarks/bench_save.py
+"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from os import fsync, path
+from pickle import dump
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+
+from src.SBA.house import House, PurchaseTransaction  # NOQA: E402
+from src.SBA.storage import PickleBackend  # NOQA: E402
+
+
+def saveBefore(directory: str) -> None:
+	"""Pickle straight into the truncated snapshot files, like before"""
+	with open(path.join(directory, 'houses'), 'wb') as file:
+		dump([House.total_revenue, House.houses_table, House.n_House, 1], file)
+	with open(path.join(directory, 'tickets'), 'wb') as file:
+		dump([House.total_tickets, House.tickets_table], file)
+	with open(path.join(directory, 'journal'), 'wb') as file:
+		dump(('BEGIN', 1), file)
+		file.flush()
+		fsync(file.fileno())
+
+
+def makeData(n_ticket: int) -> None:
+	House.houses_table = {}
+	House.n_House = 0
+	House.clearTickets()
+	House.total_tickets = 0
+	House.total_revenue = 0
+	houses: list[House] = [House(row_number=30, column_number=26) for _ in range(10)]
+	for house in houses:
+		house.movie = f"Movie {house.house_number}"
+	for i in range(n_ticket):
+		house: House = houses[i % 10]
+		if house.n_available == 0:
+			house.clearPlan()
+		transaction: PurchaseTransaction = house.beginPurchase()
+		row_index, column_index = divmod((i // 10) % house.n_seat, house.n_column)
+		transaction.stage(row_index, column_index, 50)
+		transaction.commit()
+
+
+def bench(save: Callable[[], None], n_call: int, n_repeat: int = 5) -> float:
+	"""Returns milliseconds per save, the best of `n_repeat` runs, as the disk is noisy"""
+	save()  # Warm up, and the previous snapshot exists from now on
+	best: float = float('inf')
+	for _ in range(n_repeat):
+		start: float = perf_counter()
+		for _ in range(n_call):
+			save()
+		best = min(best, (perf_counter() - start) / n_call * 1e3)
+	return best
+
+
+def main() -> None:
+	with TemporaryDirectory(dir=sys.argv[1] if len(sys.argv) > 1 else None) as directory:
+		for n_ticket in (1_000, 20_000, 100_000):
+			makeData(n_ticket)
+			backend: PickleBackend = PickleBackend(directory)
+			before: float = bench(lambda: saveBefore(directory), 10)
+			
+			def saveChanged() -> None:
+				House.tickets_table.version += 1  # As if a ticket was sold
+				backend.save()
+			
+			now_changed: float = bench(saveChanged, 10)
+			now_unchanged: float = bench(backend.save, 10)
+			size: int = path.getsize(path.join(directory, 'tickets'))
+			print(f"{n_ticket:>7} tickets ({size / 1024:7.1f} KiB)  before {before:8.3f} ms/save  "
+			      f"now: tickets changed {now_changed:8.3f} ms/save, tickets unchanged {now_unchanged:8.3f} ms/save")
+
+
+if __name__ == '__main__':
+	main()
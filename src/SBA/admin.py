@@ -15,16 +15,81 @@
 # limitations under the License.
 
 
-from logging import getLogger, Logger
-from os import path, remove
+from logging import Logger
 from typing import Optional
 from webbrowser import open as openWebBrowser  # NOQA: lowercase function imported as uppercase function
 
-from .coorutils import Coor, CoordinateExpressionException, getCoorsFromCoorExpr
+from .coorutils import CoordinateExpressionException, CoorRegion, getRegionFromCoorExpr
 from .colour import setColour
 from .house import House, Ticket
-from .language import inputLang, printLang, setLanguage
-from .utils import clearScreen, loadData, saveData
+from .language import getMessage, inputLang, inputMsg, printLang, printMsg, registerMessages, setLanguage
+from .log import getLogLevel, getLogRetention, getModuleLogger, LOG_LEVELS, setLogLevel, setLogRetention
+from .settings import deleteSettings, saveSettings
+from .utils import archiveTickets, clearScreen, deleteData, flushData, loadData, saveData, saveChange, state_lock
+
+logger: Logger = getModuleLogger(__name__)
+
+registerMessages({
+	'admin.new_house': ("House {house_number} will be the new house",
+	                    "新的電影院將會是：電影院{house_number}"),
+	'admin.input_n_row': ("Enter how many row does House {house_number} has (1-99): ",
+	                      "請輸入電影院{house_number}將會有多少行座位 （1-99）： "),
+	'admin.input_n_column': ("Enter how many column does House {house_number} has (1-26): ",
+	                         "請輸入電影院{house_number}將會有多少列座位（1-26）"),
+	'admin.house_playing': ("House {house_number} now playing: {movie}",
+	                        "電影院{house_number} 正在播映：{movie}"),
+	'admin.house_closed': ("House {house_number} is closed",
+	                       "電影院{house_number} 已關閉"),
+	'admin.no_movie': ("(None)", "（無）"),
+	'admin.movie_changed': ("Successfully changed the movie in house {house_number}!",
+	                        "已成功更改電影院{house_number} 的電影名稱！"),
+	'admin.movie_change': ("{old_movie} --> {movie}",
+	                       "{old_movie} --> {movie}"),
+	'admin.input_adult_price': ("Please enter the price for adults (default not to change as ${price}): $",
+	                            "請輸入成人票價（預設維持現價 ${price}）：$"),
+	'admin.input_child_price': ("Please enter the price for children (default not to change as ${price}): $",
+	                            "請輸入兒童票價（預設維持現價 ${price}）：$"),
+	'admin.clearing_seats': ("Clearing all seat of house {house_number}",
+	                         "正在清除電影院{house_number} 的所有座位"),
+	'admin.tickets_removed': ("Removed {n_ticket} ticket{s}",
+	                          "刪除了{n_ticket}張電影票"),
+	'admin.tickets_archived': ("{n_ticket} ticket{s} archived",
+	                           "已封存{n_ticket}張電影票"),
+	'admin.house_summary': ("House {house_number}: {movie:<50} {n_available}/{n_seat}",
+	                        "電影院{house_number}：{movie:<50} {n_available}/{n_seat}"),
+	'admin.total_revenue': ("Total revenue: ${revenue}",
+	                        "總收益：${revenue}"),
+	'admin.house_now_playing': ("House {house_number} is now playing: {movie}",
+	                            "電影院{house_number} 正在播映: {movie}"),
+	'admin.house_revenue': ("House revenue: {revenue}\nAdult price: ${adult_price}\nChild price: ${child_price}",
+	                        "電影院收益：${revenue}\n成人票價：${adult_price}\n兒童票價：${child_price}\n"),
+	'admin.coor_expr_error': ("ERROR: {error.__doc__}",
+	                          "錯誤：{error.chinese_msg}"),
+	'admin.seats_overwritten': ("{n_seat} seats overwritten.",
+	                            "{n_seat}個座位的狀態已被覆蓋"),
+	'admin.ticket': ("{ticket_no:<6} @{time} House {house_no:<2} -- {movie:<25} ~Seat<{seat}> ${price}",
+	                 "{ticket_no:<6} @{time} 電影院{house_no:<2} -- {movie:<25} ~座位<{seat}> ${price}"),
+	'admin.tickets_total': ("TOTAL: {n_active} ticket{s_active} active, {n_total} ticket{s_total} were created.",
+	                        "纍計：{n_active}張電影票有效，曾有{n_total}張電影票存在過。"),
+	'admin.house_title': ("House {house_number}",
+	                      "電影院{house_number}"),
+	'admin.colour_changed': ("Success! The colour scheme is now {colour_mode}",
+	                         "成功！現在的配色為：{colour_mode}"),
+	'admin.unknown_mode': ("ERROR: Unknown mode number {mode}",
+	                       "錯誤：無效模式代碼——{mode}"),
+	'admin.log_level': ("The log level is now {log_level}",
+	                    "現在的日誌級別為：{log_level}"),
+	'admin.input_log_level': ("Please enter the log level ({log_levels})\n"
+	                          "(Or hit Enter to go back to the Control Panel)\n-> ",
+	                          "請輸入日誌級別（{log_levels}）\n（或按 Enter 以返回控制面板）\n-> "),
+	'admin.log_retention': ("Logs are kept for {log_retention} day(s)",
+	                        "日誌會保留 {log_retention} 日"),
+	'admin.input_log_retention': ("Please enter the number of days to keep the logs\n"
+	                              "(Or hit Enter to go back to the Control Panel)\n-> ",
+	                              "請輸入日誌保留日數\n（或按 Enter 以返回控制面板）\n-> "),
+	'admin.logs_deleted': ("{n_deleted} old log file(s) deleted",
+	                       "已刪除 {n_deleted} 個舊日誌檔案"),
+})
 
 
 def createHouse() -> None:
@@ -33,13 +98,10 @@ def createHouse() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("createHouse")
 	logger.info("Admin Mode 1: Create a new house")
-	printLang(f"House {House.n_House + 1} will be the new house",
-	          f"新的電影院將會是：電影院{House.n_House + 1}")
+	printMsg('admin.new_house', house_number=House.n_House + 1)
 	logger.info("Waiting number of rows input")
-	n_row_str: str = inputLang(f"Enter how many row does House {House.n_House + 1} has (1-99): ",
-	                           f"請輸入電影院{House.n_House + 1}將會有多少行座位 （1-99）： ").strip()
+	n_row_str: str = inputMsg('admin.input_n_row', house_number=House.n_House + 1).strip()
 	if not n_row_str.isdecimal():
 		printLang("ERROR: Number of rows must be decimal number",
 		          "錯誤：行數必須爲數字")
@@ -56,8 +118,7 @@ def createHouse() -> None:
 		logger.info("Number of rows out of possible range, going back to the Control Panel menu")
 		return
 	logger.info("Waiting number of columns input")
-	n_col_str: str = inputLang(f"Enter how many column does House {House.n_House + 1} has (1-26): ",
-	                           f"請輸入電影院{House.n_House + 1}將會有多少列座位（1-26）").strip()
+	n_col_str: str = inputMsg('admin.input_n_column', house_number=House.n_House + 1).strip()
 	if not n_col_str.isdecimal():
 		printLang("ERROR: Number of columns must be decimal number",
 		          "錯誤：列數必須爲數字")
@@ -73,7 +134,8 @@ def createHouse() -> None:
 		          "電影院創建失敗，返回控制面板中......")
 		logger.info("Number of columns out of possible range, going back to the Control Panel menu")
 		return
-	house: House = House(row_number=n_row, column_number=n_col)
+	with state_lock:
+		house: House = House(row_number=n_row, column_number=n_col)
 	logger.info("Waiting movie name input")
 	movie: str = inputLang("Please enter the movie name (or leave it blank if the house is closed): ",
 	                       "請輸入電影名稱（或者留空以代表電影院關閉）:").strip()
@@ -81,7 +143,7 @@ def createHouse() -> None:
 		pass
 	else:
 		house.movie = movie
-	logger.info(f"House {house.house_number}'s movie: {movie or '(None)'}")
+	logger.info("House %s's movie: %s", house.house_number, movie or '(None)')
 	logger.info("Waiting adult price input")
 	adult_price_str: str = inputLang("Please enter the price for adults (default is $0): $",
 	                                 "請輸入成人票價（預設為 $0）：$").strip().replace(" ", '')
@@ -118,17 +180,14 @@ def updateHouseAttributes() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("updateHouseAttributes")
 	logger.info("Admin Mode 2: Update house attributes")
 	if house_list := House.houses_table.values():
 		printLang("House list:", "電影院列表：")
 		for house in house_list:
 			if house.movie:
-				printLang(f"House {house.house_number} now playing: {house.movie}",
-				          f"電影院{house.house_number} 正在播映：{house.movie}")
+				printMsg('admin.house_playing', house_number=house.house_number, movie=house.movie)
 			else:
-				printLang(f"House {house.house_number} is closed",
-				          f"電影院{house.house_number} 已關閉")
+				printMsg('admin.house_closed', house_number=house.house_number)
 	else:
 		printLang("No house", "無電影院")
 		return
@@ -153,19 +212,14 @@ def updateHouseAttributes() -> None:
 	                       "請輸入電影名稱（或者留空以代表電影院關閉）:").strip()
 	old_movie: str = house.movie
 	house.movie = movie
-	printLang(f"Successfully changed the movie in house {house.house_number}!",
-	          f"已成功更改電影院{house.house_number} 的電影名稱！")
-	printLang(f"{old_movie or '(None)'} --> {house.movie}",
-	          f"{old_movie or '（無）'} --> {house.movie}")
-	logger.info(f"Movie of House {house.house_number}: {old_movie or '(None)'} --> {house.movie}")
+	printMsg('admin.movie_changed', house_number=house.house_number)
+	printMsg('admin.movie_change', old_movie=old_movie or getMessage('admin.no_movie'), movie=house.movie)
+	logger.info("Movie of House %s: %s --> %s", house.house_number, old_movie or '(None)', house.movie)
 	
 	do_update_price: str = inputLang("Would you like to update the price too?(y/N)",
 	                                 "你想更新此電影院的票價嗎？(Y/n)").strip().upper()
 	if do_update_price == 'Y':
-		adult_price_str: str = inputLang(f"Please enter the price for adults "
-		                                 f"(default not to change as ${house.adult_price}): $",
-		                                 f"請輸入成人票價"
-		                                 f"（預設維持現價 ${house.adult_price}）：$").strip().replace(" ", '')
+		adult_price_str: str = inputMsg('admin.input_adult_price', price=house.adult_price).strip().replace(" ", '')
 		if adult_price_str == '':
 			adult_price_str: str = str(house.adult_price)
 		elif not adult_price_str.isdecimal():
@@ -177,10 +231,7 @@ def updateHouseAttributes() -> None:
 			return
 		house.adult_price = int(adult_price_str)
 		logger.info("Waiting children price input")
-		child_price_str: str = inputLang(f"Please enter the price for children "
-		                                 f"(default not to change as ${house.child_price}): $",
-		                                 f"請輸入兒童票價"
-		                                 f"（預設維持現價 ${house.child_price}）：$").strip().replace(" ", '')
+		child_price_str: str = inputMsg('admin.input_child_price', price=house.child_price).strip().replace(" ", '')
 		if child_price_str == '':
 			child_price_str: str = str(house.child_price)
 		elif not child_price_str.isdecimal():
@@ -210,20 +261,19 @@ def updateHouseAttributes() -> None:
 	                          "你想清除此電影院的所有座位與電影票嗎? (y/N)").strip().upper()
 	if do_clean == 'Y':
 		logger.info("Admin wants to clear all relevant data")
-		printLang(f"Clearing all seat of house {house_num}",
-		          f"正在清除電影院{house_num} 的所有座位")
-		house.clearPlan()
-		printLang("Success!", "成功！")
-		printLang("Deleting all related tickets", "正在刪除相關的電影票")
-		logger.info("Clearing all related tickets")
-		n_tickets_removed: int = 0
-		for ticket in House.tickets_table:
-			ticket_index, ticket_no, time, house_no, *other_information = ticket
-			if house_no == house.house_number:
-				House.tickets_table.remove(ticket)
-				n_tickets_removed += 1
-		printLang(f"Removed {n_tickets_removed} tickets", f"刪除了{n_tickets_removed}張電影票")
-		logger.info(f"Removed {n_tickets_removed} tickets")
+		printMsg('admin.clearing_seats', house_number=house_num)
+		with state_lock:
+			house.clearPlan()
+			printLang("Success!", "成功！")
+			printLang("Deleting all related tickets", "正在刪除相關的電影票")
+			logger.info("Clearing all related tickets")
+			tickets_removed: list[Ticket] = House.removeHouseTickets(house.house_number)
+		n_tickets_removed: int = len(tickets_removed)
+		printMsg('admin.tickets_removed', n_ticket=n_tickets_removed, s='s' if n_tickets_removed > 1 else '')
+		logger.info("Removed %s tickets", n_tickets_removed)
+		n_tickets_archived: int = archiveTickets(tickets_removed)
+		if n_tickets_archived:
+			printMsg('admin.tickets_archived', n_ticket=n_tickets_archived, s='s' if n_tickets_archived > 1 else '')
 		saveData()
 		return
 	elif do_clean == 'N' or do_clean == '':
@@ -247,20 +297,17 @@ def checkHousesInformation() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("checkHousesInformation")
 	logger.info("Admin Mode 5: Check houses information")
 	if House.houses_table:
 		printLang("House list", "電影院列表")
 		for house in House.houses_table.values():
-			printLang(f"House {house.house_number}: {house.movie if house.movie else '(None)':<50} "
-			          f"{house.n_available}/{house.n_seat}",
-			          f"電影院{house.house_number}：{house.movie if house.movie else '（無）}':<50} "
-			          f"{house.n_available}/{house.n_seat}"
-			          )
+			printMsg('admin.house_summary', house_number=house.house_number,
+			         movie=house.movie or getMessage('admin.no_movie'),
+			         n_available=house.n_available, n_seat=house.n_seat)
 	else:
 		printLang("No house", "無電影院")
 		return
-	printLang(f"Total revenue: ${House.total_revenue}", f"總收益：${House.total_revenue}")
+	printMsg('admin.total_revenue', revenue=House.total_revenue)
 	print()
 	logger.info("Waiting house number input")
 	house_num_str: str = inputLang("Select a house (Or hit Enter to go back to the Control Panel):\n-> ",
@@ -279,19 +326,18 @@ def checkHousesInformation() -> None:
 		printLang("Going back to the Control Panel menu...",
 		          "返回控制面板中......")
 		return
-	logger.info(f"Viewing house {house_num} data")
+	logger.info("Viewing house %s data", house_num)
 	house: House = House.houses_table[house_num]
-	printLang(f"House {house.house_number} is now playing: {house.movie}",
-	          f"電影院{house.house_number} 正在播映: {house.movie}")
+	printMsg('admin.house_now_playing', house_number=house.house_number, movie=house.movie)
+	if not house.verifyCounters():
+		logger.warning("House %s's seat counters were wrong, recounting", house.house_number)
+		printLang("WARNING: The seat counters were wrong, they have been recounted",
+		          "警告：座位數目有誤，已重新點算")
+		house.recount()
 	house.printSeatingPlan()
 	print(f"{house.n_available}/{house.n_seat}")
-	printLang(f"House revenue: {house.house_revenue}\n"
-	          f"Adult price: ${house.adult_price}\n"
-	          f"Child price: ${house.child_price}",
-	          f"電影院收益：${house.house_revenue}\n"
-	          f"成人票價：${house.adult_price}\n"
-	          f"兒童票價：${house.child_price}\n"
-	          )
+	printMsg('admin.house_revenue', revenue=house.house_revenue,
+	         adult_price=house.adult_price, child_price=house.child_price)
 
 
 def seatStatusOverride() -> None:
@@ -306,7 +352,6 @@ def seatStatusOverride() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("seatStatusOverride")
 	logger.info("Admin Mode 6: Seat status override")
 	printLang("Note: Seats brought / reserved / emptied from this control panel "
 	          "DO NOT have / WILL NOT delete a ticket.",
@@ -318,9 +363,13 @@ def seatStatusOverride() -> None:
 	          "本模式不會幫你檢查原來的座位狀態")
 	printLang("Command format:\n\n"
 	          "(EMPTY | BUY | RESERVE) - <House number> - <Coordinate Expression> \n"
+	          "Separate coordinate expressions with commas, and put ! before a coordinate expression to exclude it, "
+	          "e.g. 1A:10Z, !5M:5N\n"
 	          "(or hit Enter to go back to the Control Panel menu)",
 	          "指令格式:\n\n"
 	          "(EMPTY | BUY | RESERVE) - <電影院號碼> - <坐標表達式> \n"
+	          "以逗號分隔多個坐標表達式，在坐標表達式前加上 ! 以排除該些座位，"
+	          "例如 1A:10Z, !5M:5N\n"
 	          "（或按 Enter 以返回控制面板）"
 	          )
 	logger.info("Waiting command input")
@@ -338,6 +387,8 @@ def seatStatusOverride() -> None:
 	                .replace('《', '')
 	                .replace('》', '')
 	                .replace('—', '-')  # Chinese input
+	                .replace('，', ',')
+	                .replace('！', '!')
 	                )
 	if command == '':
 		logger.info("Empty command, going back to the Control Panel menu")
@@ -380,41 +431,36 @@ def seatStatusOverride() -> None:
 	house: House = House.houses_table[house_num]
 	coor_expr: str = command_list[2]
 	try:
-		coor_list: list[Coor] = getCoorsFromCoorExpr(
+		region: CoorRegion = getRegionFromCoorExpr(
 			coor_expr, n_row=house.n_row, n_column=house.n_column
 		)
 	except CoordinateExpressionException as error:
-		logger.info(f'Invalid command: {error.__doc__}. '
-		            'Going back to the Control Panel menu')
-		printLang(f"ERROR: {error.__doc__}", f"錯誤：{error.chinese_msg}")
+		logger.info("Invalid command: %s. Going back to the Control Panel menu", error.__doc__)
+		printMsg('admin.coor_expr_error', error=error)
 		printLang("Going back to the Control Panel menu...",
 		          "返回控制面板中......")
 		return
 	else:
-		if len(coor_list) == 1:
-			coor, = coor_list
-			row, column = coor
-			logger.info(f"{action} House {house.house_number} {row + 1} {chr(column + 65)}")
-			logger.debug(f"house.seating_plan[{row}][{column}]: "
-			             f"{house.seating_plan[row][column]} --> {seat_status}")
-			house.seating_plan[row][column] = seat_status
-			printLang("Success!\n", "成功！\n")
+		if not region.rects:
+			logger.info('No seat selected, going back to the Control Panel menu')
+			printLang("ERROR: No seat selected", "錯誤：沒有選擇任何座位")
+			printLang("Going back to the Control Panel menu...",
+			          "返回控制面板中......")
 			return
 		
-		for coor in coor_list:
-			row: int
-			column: int
-			row, column = coor
-			logger.info(f"{action} House {house.house_number} {row + 1} {chr(column + 65)}")
-			logger.debug(f"house.seating_plan[{row}][{column}]: "
-			             f"{house.seating_plan[row][column]} --> {seat_status}")
-			house.seating_plan[row][column] = seat_status
+		with state_lock:
+			for rect in region.rects:
+				top, left, bottom, right = rect
+				logger.info("%s House %s %s%s:%s%s", action, house.house_number, top + 1, chr(left + 65),
+				            bottom + 1, chr(right + 65))
+				house.fillSeats(rect, seat_status)
+		saveChange(('OVERRIDE', house.house_number, tuple(region.rects), seat_status))
 		printLang("Success!\n", "成功！\n")
-		printLang(f"{len(coor_list)} seats overwritten.",
-		          f"{len(coor_list)}個座位的狀態已被覆蓋")
-		logger.info(f"{len(coor_list)} seats overwritten.")
-	finally:
-		saveData()
+		n_seat: int = region.n_seat
+		if n_seat == 1:
+			return
+		printMsg('admin.seats_overwritten', n_seat=n_seat)
+		logger.info("%s seats overwritten.", n_seat)
 
 
 def checkTicketInformation() -> None:
@@ -423,7 +469,6 @@ def checkTicketInformation() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("checkTicketInformation")
 	logger.info("Admin Mode 7: Check ticket information")
 	printLang('Enter the ticket number to see the information about that ticket,\n'
 	          'or hit enter to see all ticket information',
@@ -433,18 +478,19 @@ def checkTicketInformation() -> None:
 	ticket_number: str = input("-> ").strip().upper().replace(' ', '')
 	if ticket_number == '':
 		ticket_count: int = 0
-		for ticket in House.tickets_table:
+		for ticket in House.tickets_table.values():
 			ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
-			printLang(f"{ticket_no:<6} @{time} "
-			          f"House {house_no:<2} -- {movie:<25} ~"
-			          f"Seat<{row_index + 1}{chr(column_index + 65)}> ${price}",
-			          f"{ticket_no:<6} @{time} "
-			          f"電影院{house_no:<2} -- {movie:<25} ~"
-			          f"座位<{row_index + 1}{chr(column_index + 65)}> ${price}"
-			          )
+			printMsg('admin.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+			         seat=f"{row_index + 1}{chr(column_index + 65)}", price=price)
 			ticket_count += 1
 		if ticket_count == 0:
 			printLang("No ticket", "無電影票")
+		if House.ticket_archive:  # Read one segment at a time
+			printLang("\nArchived tickets (no longer active):", "\n已封存的電影票（已失效）：")
+			for ticket in House.ticket_archive.values():
+				ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
+				printMsg('admin.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+				         seat=f"{row_index + 1}{chr(column_index + 65)}", price=price)
 	else:
 		if len(ticket_number) < 6:
 			printLang("ERROR: Invalid ticket number -- ticket number too short",
@@ -482,24 +528,20 @@ def checkTicketInformation() -> None:
 			          "返回控制面板中......")
 			logger.info("Invalid ticket number, going back to the Control Panel menu")
 			return
-		ticket_index: int = int(ticket_number[1:])
-		ticket: Optional[Ticket] = House.searchTicket(ticket_index)
+		ticket: Optional[Ticket] = House.searchTicketNumber(ticket_number)
 		if ticket is None:
 			printLang("No such ticket", "無此電影票")
 			logger.info("No such ticket, going back to the Control Panel menu")
 			return
 		ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
-		logger.info(f"Admin wants to check this ticket: {ticket}")
-		printLang(f"{ticket_no:<6} @{time} "
-		          f"House {house_no:<2} -- {movie:<25} ~"
-		          f"Seat<{row_index + 1}{chr(column_index + 65)}> ${price}",
-		          f"{ticket_no:<6} @{time} "
-		          f"電影院{house_no:<2} -- {movie:<25} ~"
-		          f"座位<{row_index + 1}{chr(column_index + 65)}> ${price}"
-		          )
-	printLang(f"TOTAL: {House.get_n_tickets()} ticket{'s' if House.get_n_tickets() > 1 else ''} active, "
-	          f"{House.total_tickets} ticket{'s' if House.total_tickets > 1 else ''} were created.",
-	          f"纍計：{House.get_n_tickets()}張電影票有效，曾有{House.total_tickets}張電影票存在過。")
+		logger.info("Admin wants to check this ticket: %s", ticket)
+		printMsg('admin.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+		         seat=f"{row_index + 1}{chr(column_index + 65)}", price=price)
+		if ticket_index not in House.tickets_table:
+			printLang("(Archived, no longer active)", "（已封存，已失效）")
+	n_active_ticket: int = House.get_n_tickets()
+	printMsg('admin.tickets_total', n_active=n_active_ticket, s_active='s' if n_active_ticket > 1 else '',
+	         n_total=House.total_tickets, s_total='s' if House.total_tickets > 1 else '')
 
 
 def deleteTicket() -> None:
@@ -508,7 +550,6 @@ def deleteTicket() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("deleteTicket")
 	logger.info("Admin Mode 8: Delete a ticket")
 	logger.info("Waiting ticket number input")
 	printLang("Please enter the ticket number (starts with 'T'):",
@@ -550,8 +591,7 @@ def deleteTicket() -> None:
 		          "返回控制面板中......")
 		logger.info("Invalid ticket number, going back to the Control Panel menu")
 		return
-	ticket_index: int = int(ticket_number[1:])
-	ticket: Optional[Ticket] = House.searchTicket(ticket_index)
+	ticket: Optional[Ticket] = House.searchTicketNumber(ticket_number, archived=False)  # Only active tickets
 	if ticket is None:
 		printLang("No such ticket", "無此電影票")
 		printLang("Going back to the Control Panel menu...",
@@ -559,21 +599,17 @@ def deleteTicket() -> None:
 		logger.info("Invalid ticket number, going back to the Control Panel menu")
 		return
 	ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
-	logger.info(f"Admin wants to delete this ticket: {ticket}")
-	printLang(f"{ticket_no:<6} @{time} "
-	          f"House {house_no:<2} -- {movie:<25} ~"
-	          f"Seat<{row_index + 1}{chr(column_index + 65)}> ${price}",
-	          f"{ticket_no:<6} @{time} "
-	          f"電影院{house_no:<2} -- {movie:<25} ~"
-	          f"座位<{row_index + 1}{chr(column_index + 65)}> ${price}"
-	          )
-	logger.debug(f"Ticket info: {ticket}")
-	House.houses_table[house_no].seating_plan[row_index][column_index] = 0
-	House.tickets_table.remove(ticket)
+	logger.info("Admin wants to delete this ticket: %s", ticket)
+	printMsg('admin.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+	         seat=f"{row_index + 1}{chr(column_index + 65)}", price=price)
+	logger.debug("Ticket info: %s", ticket)
+	with state_lock:
+		House.houses_table[house_no].setSeat(row_index, column_index, 0)
+		House.removeTicket(ticket_index)
 	printLang("Successfully deleted this ticket", "已成功地刪除此電影票")
-	logger.info(f"Ticket {ticket_no} deleted")
-	saveData()
-	logger.debug(f"Total: {House.get_n_tickets()} ticket{'s' if House.get_n_tickets() > 1 else ''} active")
+	logger.info("Ticket %s deleted", ticket_no)
+	saveChange(('DELETE', ticket_index, (house_no, row_index, column_index)))
+	logger.debug("Total: %s ticket%s active", House.get_n_tickets(), 's' if House.get_n_tickets() > 1 else '')
 
 
 def clearHouseSeats() -> None:
@@ -582,16 +618,13 @@ def clearHouseSeats() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger("clearHouseSeats")
 	logger.info("Admin Mode 9: Clear all the seats of a house")
 	printLang("House list:", "電影院列表：")
 	for house in House.houses_table.values():
 		if house.movie:
-			printLang(f"House {house.house_number} now playing: {house.movie}",
-			          f"電影院{house.house_number}正在播映：{house.movie}")
+			printMsg('admin.house_playing', house_number=house.house_number, movie=house.movie)
 		else:
-			printLang(f"House {house.house_number} is closed",
-			          f"電影院{house.house_number}已關閉")
+			printMsg('admin.house_closed', house_number=house.house_number)
 	logger.info("Waiting house number input")
 	house_num_str: str = inputLang("Enter the house number of a house which you would like to empty:\n-> ",
 	                               "請輸入你想清空的電影院的號碼：\n->").strip()
@@ -610,9 +643,9 @@ def clearHouseSeats() -> None:
 		          "返回控制面板中......")
 		return
 	house: House = House.houses_table[house_num]
-	printLang(f"House {house_num}", f"電影院{house_num}")
+	printMsg('admin.house_title', house_number=house_num)
 	house.printSeatingPlan()
-	logger.info(f"Waiting to confirm clear of all seat of House {house_num}")
+	logger.info("Waiting to confirm clear of all seat of House %s", house_num)
 	confirm: str = inputLang(
 		"Please confirm you would like to clear all seats and tickets of this house (y/N): ",
 		"請確認你先清除所有此電影院的所有座位及電影票（y/N）：").strip().upper()
@@ -623,24 +656,21 @@ def clearHouseSeats() -> None:
 		return
 	elif confirm == 'Y':
 		logger.info("Confirmed, clearing seating plan")
-		printLang(f"Clearing all seat of house {house_num}", f"正在清除電影院{house_num}的所有座位")
-		house.clearPlan()
-		printLang("Deleting all related tickets", "正在刪除所有相關電影票")
-		logger.info("Deleting all related tickets")
-		tickets_to_be_removed: list[Ticket] = []
-		for ticket in House.tickets_table:
-			ticket_index, ticket_number, time, house_number, *other_information = ticket
-			if house_number == house.house_number:
-				tickets_to_be_removed.append(ticket)
-		n_tickets_removed: int = 0
-		for ticket in tickets_to_be_removed:
+		printMsg('admin.clearing_seats', house_number=house_num)
+		with state_lock:
+			house.clearPlan()
+			printLang("Deleting all related tickets", "正在刪除所有相關電影票")
+			logger.info("Deleting all related tickets")
+			tickets_removed: list[Ticket] = House.removeHouseTickets(house.house_number)
+		for ticket in tickets_removed:
 			ticket_index, ticket_number, *other_information = ticket
-			logger.info(f"Deleting {ticket_number}, ticket info: {ticket}")
-			House.tickets_table.remove(ticket)
-			n_tickets_removed += 1
-		printLang(f"Removed {n_tickets_removed} ticket{'s' if n_tickets_removed > 1 else ''}",
-		          f"刪除了{n_tickets_removed}張電影票")
-		logger.info(f"Removed {n_tickets_removed} ticket{'s' if n_tickets_removed > 1 else ''}")
+			logger.info("Deleted %s, ticket info: %s", ticket_number, ticket)
+		n_tickets_removed: int = len(tickets_removed)
+		printMsg('admin.tickets_removed', n_ticket=n_tickets_removed, s='s' if n_tickets_removed > 1 else '')
+		logger.info("Removed %s ticket%s", n_tickets_removed, 's' if n_tickets_removed > 1 else '')
+		n_tickets_archived: int = archiveTickets(tickets_removed)
+		if n_tickets_archived:
+			printMsg('admin.tickets_archived', n_ticket=n_tickets_archived, s='s' if n_tickets_archived > 1 else '')
 		saveData()
 		return
 	else:
@@ -658,17 +688,14 @@ def deleteHouse() -> None:
 
 	:return: None
 	"""
-	logger: Logger = getLogger('deleteHouse')
 	logger.info("Admin mode 10: DELETE A HOUSE")
 	printLang("House list:", "電影院列表:")
 	house_count: int = 0
 	for house in House.houses_table.values():
 		if house.movie:
-			printLang(f"House {house.house_number} now playing: {house.movie}",
-			          f"電影院{house.house_number}正在播映：{house.movie}")
+			printMsg('admin.house_playing', house_number=house.house_number, movie=house.movie)
 		else:
-			printLang(f"House {house.house_number} is closed",
-			          f"電影院{house.house_number}已關閉")
+			printMsg('admin.house_closed', house_number=house.house_number)
 		house_count += 1
 	if house_count == 0:
 		logger.info("No house, Going back to the Control Panel menu...")
@@ -692,9 +719,9 @@ def deleteHouse() -> None:
 		          "返回控制面板中......")
 		return
 	house: House = House.houses_table[house_num]
-	printLang(f"House {house_num}", f"電影院{house_num}")
+	printMsg('admin.house_title', house_number=house_num)
 	house.printSeatingPlan()
-	logger.info(f"Waiting to confirm clear of all seat of House {house_num}")
+	logger.info("Waiting to confirm clear of all seat of House %s", house_num)
 	confirm: str = inputLang("Please confirm you would like to delete this house (y/N): ",
 	                         "請確認你想刪除這個電影院（y/N）：").strip().upper()
 	if confirm == '' or confirm == 'N':
@@ -704,29 +731,27 @@ def deleteHouse() -> None:
 		return
 	elif confirm == 'Y':
 		logger.info("Confirmed, clearing seating plan")
-		printLang(f"Clearing all seat of house {house_num}",
-		          f"正在清除電影院{house_num} 的所有座位")
-		house.clearPlan()
-		printLang("Deleting all related tickets", "正在刪除所有相關的電影票")
-		logger.info("Deleting all related tickets")
-		tickets_to_be_removed: list[Ticket] = []
-		for ticket in House.tickets_table:
-			ticket_index, ticket_number, time, house_number, *other_information = ticket
-			if house_number == house.house_number:
-				tickets_to_be_removed.append(ticket)
-		n_tickets_removed: int = 0
-		for ticket in tickets_to_be_removed:
+		printMsg('admin.clearing_seats', house_number=house_num)
+		with state_lock:
+			house.clearPlan()
+			printLang("Deleting all related tickets", "正在刪除所有相關的電影票")
+			logger.info("Deleting all related tickets")
+			tickets_removed: list[Ticket] = House.removeHouseTickets(house.house_number)
+		for ticket in tickets_removed:
 			ticket_index, ticket_number, *other_information = ticket
-			logger.info(f"Deleting {ticket_number}, ticket info: {ticket}")
-			House.tickets_table.remove(ticket)
-			n_tickets_removed += 1
-		printLang(f"Removed {n_tickets_removed} ticket{'s' if n_tickets_removed > 1 else ''}",
-		          f"刪除了{n_tickets_removed}張電影票")
-		logger.info(f"Removed {n_tickets_removed} ticket{'s' if n_tickets_removed > 1 else ''}")
+			logger.info("Deleted %s, ticket info: %s", ticket_number, ticket)
+		n_tickets_removed: int = len(tickets_removed)
+		printMsg('admin.tickets_removed', n_ticket=n_tickets_removed, s='s' if n_tickets_removed > 1 else '')
+		logger.info("Removed %s ticket%s", n_tickets_removed, 's' if n_tickets_removed > 1 else '')
+		n_tickets_archived: int = archiveTickets(tickets_removed)
+		if n_tickets_archived:
+			printMsg('admin.tickets_archived', n_ticket=n_tickets_archived, s='s' if n_tickets_archived > 1 else '')
 		printLang("Removing this house", "正在刪除此電影院")
 		logger.info("Removing this house")
-		del House.houses_table[house_num]
+		with state_lock:
+			del House.houses_table[house_num]
 		printLang("Success!", "成功！")
+		saveData()
 	# No need House.house_num -= 1, as it is only for giving new house number
 	else:
 		logger.info("Confirmation failed")
@@ -743,7 +768,6 @@ def clearAllData() -> None:
 	
 	:return: None
 	"""
-	logger: Logger = getLogger("clearAllData")
 	logger.info("Admin Mode 11: CLEAR ALL DATA")
 	logger.info("Confirming")
 	confirm: str = inputLang("Please confirm you would like to clear ALL data (y/N): ",
@@ -762,80 +786,35 @@ def clearAllData() -> None:
 		printLang("Going back to the Control Panel menu...",
 		          "返回控制面板中......")
 		return
-	House.tickets_table = []
-	House.total_tickets = 0
-	House.total_revenue = 0
-	logger.info("Removed unsaved tickets data")
-	printLang("Successfully removed unsaved tickets data", "成功刪除未儲存的電影票資料")
-	try:
-		logger.info("Finding any saved tickets data")
-		absolute_path = path.dirname(__file__)
-		relative_path = '../../data/tickets'
-		full_path = path.join(absolute_path, relative_path)
-		logger.debug(f"Full path = {full_path}")
-		remove(full_path)
-	except FileNotFoundError:
-		logger.info("No saved tickets data")
-		printLang("No saved tickets data", "沒有已儲存的電影票資料")
-	else:
-		logger.info("DELETED SAVED TICKETS DATA")
-		printLang("Successfully deleted saved tickets data", "成功刪除已儲存的電影票資料")
-	finally:
-		logger.info("Process of removing tickets data finished")
-		printLang("Process of removing tickets data finished", "完成刪除電影票資料程序")
-	House.houses_table = {}
-	House.n_House = 0
+	with state_lock:
+		House.clearTickets()
+		House.total_tickets = 0
+		House.total_revenue = 0
+		logger.info("Removed unsaved tickets data")
+		printLang("Successfully removed unsaved tickets data", "成功刪除未儲存的電影票資料")
+		House.houses_table = {}
+		House.n_House = 0
 	logger.info("Removed unsaved houses data")
 	printLang("Successfully unsaved local houses data", "成功刪除未儲存的電影院資料")
-	try:
-		logger.info("Finding any saved houses data")
-		absolute_path = path.dirname(__file__)
-		relative_path = '../../data/houses'
-		full_path = path.join(absolute_path, relative_path)
-		remove(full_path)
-	except FileNotFoundError:
-		logger.info("No saved houses data")
-		printLang("No saved houses data", "沒有已儲存的電影院資料")
+	logger.info("Finding any saved houses and tickets data")
+	if deleteData():
+		logger.info("DELETED SAVED HOUSES AND TICKETS DATA")
+		printLang("Successfully deleted saved houses and tickets data", "成功刪除已儲存的電影院及電影票資料")
 	else:
-		logger.info("DELETED SAVED HOUSES DATA")
-		printLang("Successfully deleted saved houses data", "成功刪除已儲存的電影院資料")
-	finally:
-		logger.info("Process of removing houses data finished")
-		printLang("Process of removing tickets houses finished", "完成刪除電影院資料程序")
+		logger.info("No saved houses and tickets data")
+		printLang("No saved houses and tickets data", "沒有已儲存的電影院及電影票資料")
 	logger.info("Resetting the colour scheme to DARK")
 	printLang("Resetting the colour scheme to DARK", "正在重設配色為 DARK")
 	setColour('DARK')
-	try:
-		logger.info("Finding the colour scheme setting file")
-		absolute_path = path.dirname(__file__)
-		relative_path = '../../data/colour.txt'
-		full_path = path.join(absolute_path, relative_path)
-		remove(full_path)
-	except FileNotFoundError:
-		logger.info("No colour scheme setting file")
-		printLang("No colour scheme setting file", "沒有配色設定檔案")
-	else:
-		logger.info("DELETED COLOUR SCHEME SETTING FILE")
-		printLang("Successfully deleted colour scheme setting file", "成功刪除配色設定檔案")
-	finally:
-		logger.info("Process of removing colour scheme setting file finished finished")
-		printLang("Process of removing colour scheme setting file finished finished",
-		          "完成刪除配色資料程序")
 	printLang("Resetting the language to ENGLISH", "正在重設語言為 ENGLISH")
 	setLanguage('ENGLISH')
-	try:
-		logger.info("Finding the language setting file")
-		absolute_path = path.dirname(__file__)
-		relative_path = '../../data/language.txt'
-		full_path = path.join(absolute_path, relative_path)
-		remove(full_path)
-	except FileNotFoundError:
-		logger.info("No language setting file")
-		printLang("No language setting file", "沒有語言設定檔案")
-	finally:
-		logger.info("Process of removing language setting file finished finished")
-		printLang("Process of removing language setting file finished finished",
-		          "完成刪除語言資料程序")
+	logger.info("Deleting the settings file")
+	if deleteSettings():
+		logger.info("DELETED SETTINGS FILE")
+		printLang("Successfully deleted settings file", "成功刪除設定檔案")
+	else:
+		logger.info("No settings file")
+		printLang("No settings file", "沒有設定檔案")
 	printLang("Finish!", "完成！")
 	logger.info("Finished clearing all saved data!")
 
@@ -848,7 +827,6 @@ def changeColour() -> None:
 	"""
 	from .colour import colour_mode
 	
-	logger: Logger = getLogger("changeColour")
 	logger.info("Admin Mode 14: Change the colour scheme")
 	if colour_mode == 'DARK':
 		logger.info("The colour scheme is now DARK, changing to LIGHT...")
@@ -859,11 +837,11 @@ def changeColour() -> None:
 	else:
 		logger.warning("ERROR: Unknown colour scheme, changing to DARK anyway...")
 		setColour('DARK')
+	saveSettings()
 	
 	from .colour import colour_mode
 	
-	printLang(f"Success! The colour scheme is now {colour_mode}",
-	          f"成功！現在的配色為：{colour_mode}")
+	printMsg('admin.colour_changed', colour_mode=colour_mode)
 
 
 def changeLanguage() -> None:
@@ -874,7 +852,6 @@ def changeLanguage() -> None:
 	"""
 	from .language import language
 	
-	logger: Logger = getLogger("changeLanguage")
 	logger.info("Admin Mode 15: Change the language")
 	
 	if language == 'ENGLISH':
@@ -886,6 +863,7 @@ def changeLanguage() -> None:
 	else:
 		logger.warning("ERROR: Unknown language, changing to DARK anyway...")
 		setLanguage('ENGLISH')
+	saveSettings()
 	
 	printLang(
 		"Success! The language is now English",
@@ -893,6 +871,57 @@ def changeLanguage() -> None:
 	)
 
 
+def changeLogLevel() -> None:
+	"""
+	Admin Mode 17: Change the log level
+	
+	:return: None
+	"""
+	logger.info("Admin Mode 17: Change the log level")
+	printMsg('admin.log_level', log_level=getLogLevel())
+	log_level: str = inputMsg('admin.input_log_level', log_levels='/'.join(LOG_LEVELS)).strip().upper()
+	if log_level == '':
+		return
+	if log_level not in LOG_LEVELS:
+		logger.info("Invalid log level, going back to the Control Panel menu")
+		printLang("ERROR: Unknown log level", "錯誤：無效日誌級別")
+		printLang("Going back to the Control Panel menu...",
+		          "返回控制面板中......")
+		return
+	logger.warning("Changing the log level to %s", log_level)
+	setLogLevel(log_level)
+	saveSettings()
+	printLang("Success!", "成功！")
+	printMsg('admin.log_level', log_level=getLogLevel())
+
+
+def changeLogRetention() -> None:
+	"""
+	Admin Mode 18: Change the log retention
+	
+	:return: None
+	"""
+	logger.info("Admin Mode 18: Change the log retention")
+	printMsg('admin.log_retention', log_retention=getLogRetention())
+	log_retention_str: str = inputMsg('admin.input_log_retention').strip()
+	if log_retention_str == '':
+		return
+	if not log_retention_str.isdecimal() or int(log_retention_str) == 0:
+		logger.info("Invalid log retention, going back to the Control Panel menu")
+		printLang("ERROR: The number of days must be a positive integer",
+		          "錯誤：日數必須為正整數")
+		printLang("Going back to the Control Panel menu...",
+		          "返回控制面板中......")
+		return
+	logger.warning("Changing the log retention to %s day(s)", log_retention_str)
+	deleted_logs: list[str] = setLogRetention(int(log_retention_str))
+	saveSettings()
+	logger.info("Deleted old logs: %s", deleted_logs)
+	printLang("Success!", "成功！")
+	printMsg('admin.log_retention', log_retention=getLogRetention())
+	printMsg('admin.logs_deleted', n_deleted=len(deleted_logs))
+
+
 def adminMode() -> None:
 	"""
 	Admin mode
@@ -906,7 +935,6 @@ def adminMode() -> None:
 	while True:
 		from .colour import normal_colour
 		
-		logger: Logger = getLogger("adminMode")
 		logger.info("Entered main menu of the Control Panel")
 		print(normal_colour)
 		logger.info("Waiting mode code input")
@@ -927,7 +955,9 @@ def adminMode() -> None:
 		          "13: Help\n"
 		          "14: Change the colour scheme\n"
 		          "15: Change the language\n"
-		          "16: Clear screen",
+		          "16: Clear screen\n"
+		          "17: Change the log level\n"
+		          "18: Change the log retention",
 		          "\n"
 		          " 0：退出控制面板\n"
 		          " 1：創建新電影院\n"
@@ -945,10 +975,12 @@ def adminMode() -> None:
 		          "13：教學\n"
 		          "14：轉換配色\n"
 		          "15：轉換語言\n"
-		          "16：清除屏幕"
+		          "16：清除屏幕\n"
+		          "17：更改日誌級別\n"
+		          "18：更改日誌保留日數"
 		          )
-		mode: str = inputLang("Please choose a mode ([0-9]|1[0-6])\n-> ",
-		                      "請選擇模式 ([0-9]|1[0-6])\n-> ").strip()
+		mode: str = inputLang("Please choose a mode ([0-9]|1[0-8])\n-> ",
+		                      "請選擇模式 ([0-9]|1[0-8])\n-> ").strip()
 		
 		if mode == '':
 			continue
@@ -962,9 +994,9 @@ def adminMode() -> None:
 		# EXIT CONTROL PANEL
 		if mode == '0':
 			printLang("Bye!", "再見！")
-			logger: Logger = getLogger("adminMode.mode_0")
 			logger.info("Admin Mode 0: EXIT CONTROL PANEL")
 			logger.info("ADMIN LOGOUT")
+			flushData()  # Everything changed in the control panel is saved before leaving it
 			return
 		
 		# Create a new house
@@ -977,13 +1009,11 @@ def adminMode() -> None:
 		
 		# Save data
 		elif mode == '3':
-			logger: Logger = getLogger("adminMode.mode_3")
 			logger.info("Admin Mode 3: Save data")
 			saveData(print_log=True)
 		
 		# Load data
 		elif mode == '4':
-			logger: Logger = getLogger("adminMode.mode_4")
 			logger.info("Admin Mode 4: Load data")
 			loadData(print_log=True)
 		
@@ -1017,14 +1047,12 @@ def adminMode() -> None:
 		
 		# STOP THE ENTIRE PROGRAM
 		elif mode == '12':
-			logger: Logger = getLogger("adminMode.mode_12")
 			logger.info("Admin Mode 12: STOP THE ENTIRE PROGRAM")
 			printLang("See you later!", "再見！")
 			quit()
 		
 		# Help
 		elif mode == '13':
-			logger: Logger = getLogger("adminMode.mode_13")
 			logger.info("Admin Mode 13: Help")
 			openWebBrowser("https://joeccp.github.io/SBA/")
 			logger.info("Opened a website browser and visit https://joeccp.github.io/SBA/")
@@ -1039,15 +1067,22 @@ def adminMode() -> None:
 		
 		# Clear screen
 		elif mode == '16':
-			logger: Logger = getLogger("adminMode.mode_16")
 			logger.info("Admin Mode 16: Clear screen")
 			clearScreen()
 			printLang("CINEMA KIOSK SYSTEM", "電影售票系統")
 			printLang("CONTROL PANEL\n\n\n", "控制面板\n\n\n")
 		
+		# Change the log level
+		elif mode == '17':
+			changeLogLevel()
+		
+		# Change the log retention
+		elif mode == '18':
+			changeLogRetention()
+		
 		else:
 			logger.info("Unknown mode number")
-			printLang(f"ERROR: Unknown mode number {mode}", f"錯誤：無效模式代碼——{mode}")
+			printMsg('admin.unknown_mode', mode=mode)
 			if mode.startswith('0'):
 				printLang("Did you accidentally enter any leading zeros?",
 				          "你可能輸入了不需要的前置零")
@@ -0,0 +1,182 @@
+"""Defines TicketArchive, the cold segments of tickets which are no longer active, read on demand"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from logging import Logger
+from os import listdir, makedirs, path, remove, replace, rmdir
+from re import compile as compileRegex, Pattern
+from typing import Iterable, Iterator, Optional
+
+from .log import getModuleLogger
+from .storage import fsyncDirectory, readSnapshotFile, SnapshotCorrupted, writeSnapshotFile
+from .ticket import Ticket, TicketStore
+
+logger: Logger = getModuleLogger(__name__)
+
+# A segment file is named after the first and the last ticket index in it, e.g. 'tickets-0000000001-0000000120'
+SEGMENT_NAME_FORMAT: str = 'tickets-{first:010}-{last:010}'
+SEGMENT_NAME_PATTERN: Pattern = compileRegex(r'tickets-(\d+)-(\d+)(-\d+)?')  # Numbered if the range was used
+
+
+class TicketArchive:
+	"""
+	Tickets which are no longer active (e.g. the seats of their house were cleared), in `data/archive`
+	
+	The active tickets (`House.tickets_table`) are the hot segment, which is kept in memory and saved with the data.
+	Archived tickets are the cold segments, each is a snapshot file (see storage.writeSnapshotFile())
+	of a TicketStore, which is written once and never changed.
+	A TicketStore only holds the tickets in it, so a segment is as large as its tickets,
+	even if the tickets of other houses were sold in between.
+	The ticket index range of a segment is in its filename, so finding a ticket only reads the segments
+	whose range covers it, and nothing is read until an archived ticket is needed.
+	"""
+	
+	def __init__(self, directory: str) -> None:
+		self.directory: str = directory
+		self.segments: Optional[list[tuple[int, int, str]]] = None  # (first index, last index, filename), listed lazily
+		self.cached_segment: Optional[tuple[str, TicketStore]] = None  # The last segment read
+	
+	def listSegments(self) -> list[tuple[int, int, str]]:
+		"""Returns the segments in the order of their first ticket index, the directory is only listed once"""
+		if self.segments is None:
+			segments: list[tuple[int, int, str]] = []
+			try:
+				filenames: list[str] = listdir(self.directory)
+			except FileNotFoundError:
+				filenames = []
+			for filename in filenames:
+				match = SEGMENT_NAME_PATTERN.fullmatch(filename)
+				if match is not None:
+					segments.append((int(match[1]), int(match[2]), filename))
+			segments.sort()
+			self.segments = segments
+			logger.info("%s archived ticket segment(s)", len(segments))
+		return self.segments
+	
+	def readSegment(self, filename: str) -> Optional[TicketStore]:
+		"""Returns the tickets of a segment, or None if it is corrupted"""
+		if self.cached_segment is not None and self.cached_segment[0] == filename:
+			return self.cached_segment[1]
+		logger.debug("Reading archived ticket segment %s", filename)
+		try:
+			store: TicketStore = readSnapshotFile(path.join(self.directory, filename))
+		except (FileNotFoundError, SnapshotCorrupted) as error:
+			logger.error("Cannot read archived ticket segment %s: %s", filename, error)
+			return None
+		self.cached_segment = (filename, store)
+		return store
+	
+	def append(self, tickets: Iterable[Ticket]) -> int:
+		"""
+		Archive tickets in a new segment
+		
+		The segment is written to a temporary file and fsynced, then renamed, so it is never half-written.
+		Tickets which are already archived are skipped, e.g. tickets which came back as active tickets
+		after a crash before their removal was saved, and are archived again.
+		
+		:param tickets: Tickets which are no longer active
+		:type tickets: Iterable[Ticket]
+		:return: Number of tickets archived
+		:rtype: int
+		"""
+		sorted_tickets: list[Ticket] = sorted(tickets, key=lambda ticket: ticket.index)
+		n_ticket: int = len(sorted_tickets)
+		sorted_tickets = [ticket for ticket in sorted_tickets if self.get(ticket.index) is None]
+		if len(sorted_tickets) < n_ticket:
+			logger.warning("%s ticket(s) are already archived", n_ticket - len(sorted_tickets))
+		store: TicketStore = TicketStore.fromTickets(sorted_tickets)
+		if not store:
+			return 0
+		first_index: int = store.indexes[0]
+		last_index: int = store.indexes[-1]
+		name: str = SEGMENT_NAME_FORMAT.format(first=first_index, last=last_index)
+		filename: str = name
+		n_same_range: int = 0
+		while path.exists(path.join(self.directory, filename)):  # E.g. the tickets of another house, not replaced
+			n_same_range += 1
+			filename = f'{name}-{n_same_range}'
+		makedirs(self.directory, exist_ok=True)
+		full_path: str = path.join(self.directory, filename)
+		writeSnapshotFile(full_path + '.tmp', store)
+		replace(full_path + '.tmp', full_path)
+		fsyncDirectory(self.directory)
+		
+		segments: list[tuple[int, int, str]] = self.listSegments()
+		segments.append((first_index, last_index, filename))
+		segments.sort()
+		logger.info("Archived %s ticket(s) in %s", len(store), filename)
+		return len(store)
+	
+	def get(self, ticket_index: int) -> Optional[Ticket]:
+		"""
+		Returns the archived ticket with the given ticket index, or None if there is no such ticket
+		
+		Only the segments whose ticket index range covers it are read.
+		
+		:param ticket_index: Ticket index
+		:type ticket_index: int
+		:return: The ticket
+		:rtype: Optional[Ticket]
+		"""
+		for first_index, last_index, filename in self.listSegments():
+			if first_index > ticket_index:
+				break
+			if ticket_index > last_index:
+				continue
+			store: Optional[TicketStore] = self.readSegment(filename)
+			if store is not None and ticket_index in store:
+				return store[ticket_index]
+		return None
+	
+	def values(self) -> Iterator[Ticket]:
+		"""
+		Returns an iterator of all archived tickets, segment by segment
+		
+		Only one segment is in memory at a time.
+		The tickets in a segment are in the order of ticket index, segments are in the order of their first ticket index.
+		"""
+		for _, _, filename in self.listSegments():
+			store: Optional[TicketStore] = self.readSegment(filename)
+			if store is not None:
+				yield from store.values()
+	
+	def delete(self) -> bool:
+		"""
+		Delete all the archived tickets
+		
+		:return: Whether any archived ticket was deleted
+		:rtype: bool
+		"""
+		self.segments = None
+		self.cached_segment = None
+		try:
+			filenames: list[str] = listdir(self.directory)
+		except FileNotFoundError:
+			return False
+		deleted: bool = False
+		for filename in filenames:
+			if SEGMENT_NAME_PATTERN.match(filename):
+				remove(path.join(self.directory, filename))
+				deleted = True
+		try:
+			rmdir(self.directory)
+		except OSError:  # Not empty, other files are kept
+			pass
+		if deleted:
+			logger.info("Deleted archived tickets")
+		return deleted
+	
+	def __bool__(self) -> bool:
+		return bool(self.listSegments())
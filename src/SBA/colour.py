@@ -14,10 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from logging import getLogger, Logger
-from os import path
+from logging import Logger
 from typing import Literal
 
+from .log import getModuleLogger
+from .settings import getSetting, setSetting
+
+logger: Logger = getModuleLogger(__name__)
+
 """
 In this module, there are many variables store the colour information,
 such as `colour_mode` and `normal_colour`.
@@ -65,14 +69,15 @@ def setColour(colour_code: ColourCode) -> None:
 	"""
 	Set the font and background colour
 	
+	The setting is kept in memory, call settings.saveSettings() to save it
+	
 	:param colour_code: A colour code
 	:type colour_code: ColourCode
 	:return: None
 	"""
 	global background_colour, colour_mode, font_colour, normal_colour
 	
-	logger: Logger = getLogger('setColour')
-	logger.info(f"Admin wants to set colour to {colour_code}")
+	logger.info("Admin wants to set colour to %s", colour_code)
 	
 	if colour_code == 'DARK':
 		logger.info("Setting colour to DARK")
@@ -90,19 +95,9 @@ def setColour(colour_code: ColourCode) -> None:
 		logger.info("Unknown colour code: Setting to DARK...")
 		setColour('DARK')
 	
-	logger.info(f"The colour scheme is now {colour_mode}")
-	
-	logger.info("Saving colour code...")
-	absolute_path = path.dirname(__file__)
-	relative_path = "../../data/colour.txt"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
+	logger.info("The colour scheme is now %s", colour_mode)
+	setSetting('colour_mode', colour_mode)
 	
-	logger.info("Reaching the file")
-	with open(full_path, 'w') as file:
-		logger.info("Writing the colour data to the file")
-		file.write(colour_mode)
-		
 	print(normal_colour, end='')
 
 
@@ -110,32 +105,19 @@ def loadColour() -> None:
 	"""
 	Load the font and background colour setting
 
-	Reads the data from data/colour.txt
-	If the file does not exist, create one and set to DARK
+	Reads the setting from the settings store (data/settings.toml)
+	If there is no such setting, set to DARK
 
 	:return: None
 	"""
 	
-	logger: Logger = getLogger('loadColour')
 	logger.info("Loading the colour scheme")
 	
-	absolute_path = path.dirname(__file__)
-	relative_path = "../../data/colour.txt"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
+	colour_code: str = getSetting('colour_mode')
+	logger.info("Colour code stored in the settings is %s", colour_code)
+	if colour_code not in ['DARK', 'LIGHT']:  # Save insurance
+		logger.info("Unknown colour_code, default set to DARK")
+		colour_code: ColourCode = 'DARK'
 	
-	try:
-		logger.info("Reaching the file")
-		with open(full_path, 'r') as file:
-			# The context of the file should be a valid ColorCode
-			colour_code: str = file.read().strip().upper()
-			logger.info(f"Colour code stored in the file is {colour_code}")
-			if colour_code not in ['DARK', 'LIGHT']:  # Save insurance
-				logger.info("Unknown colour_code, default set to DARK")
-				colour_code: ColourCode = 'DARK'
-	except FileNotFoundError:
-		logger.info("File not found, default set to DARK")
-		colour_code = 'DARK'
-		
 	colour_code: ColourCode
 	setColour(colour_code)  # type: ignore[arg-type] # colour_code must be ColourCode
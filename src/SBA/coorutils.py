@@ -14,11 +14,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from logging import getLogger, Logger
-from string import ascii_uppercase, digits
-from typing import Any, Callable, TypeAlias
+from functools import lru_cache
+from logging import DEBUG, Logger
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeAlias
+
+from .log import getModuleLogger
+
+logger: Logger = getModuleLogger(__name__)
 
 Coor: TypeAlias = tuple[int, int]
+Rect: TypeAlias = tuple[int, int, int, int]  # Top row index, left column index, bottom row index, right column index
+
+COOR_EXPR_CACHE_SIZE: int = 256  # Number of coordinate expressions cached by getCoorsFromCoorExpr()
 
 
 class CoordinateExpressionException(Exception):
@@ -101,14 +108,101 @@ class ColumnCoordinatesAtTwoSide(CoordinateExpressionException):
 	chinese_msg: str = "一個座位不可有兩個列坐標"
 
 
+def subtractRect(rect: Rect, other: Rect) -> list[Rect]:
+	"""
+	Returns the part of `rect` not covered by `other`, as at most 4 disjoint rectangles
+	
+	:param rect: The rectangle to subtract from
+	:type rect: tuple[int, int, int, int]
+	:param other: The rectangle to subtract
+	:type other: tuple[int, int, int, int]
+	:return: Disjoint rectangles
+	:rtype: list[tuple[int, int, int, int]]
+	"""
+	top, left, bottom, right = rect
+	other_top, other_left, other_bottom, other_right = other
+	if other_top > bottom or other_bottom < top or other_left > right or other_right < left:  # No overlap
+		return [rect]
+	rects: list[Rect] = []
+	if top < other_top:
+		rects.append((top, left, other_top - 1, right))
+	if bottom > other_bottom:
+		rects.append((other_bottom + 1, left, bottom, right))
+	middle_top: int = max(top, other_top)
+	middle_bottom: int = min(bottom, other_bottom)
+	if left < other_left:
+		rects.append((middle_top, left, middle_bottom, other_left - 1))
+	if right > other_right:
+		rects.append((middle_top, other_right + 1, middle_bottom, right))
+	return rects
+
+
+class CoorRegion:
+	"""
+	A set of seats, stored as disjoint rectangles
+	
+	Adding and excluding rectangles only splits rectangles,
+	so it costs time proportional to the number of rectangles, not the number of seats.
+	Coordinates are only generated when the region is iterated.
+	
+	E.g.
+		region: CoorRegion = CoorRegion()
+		region.add((0, 0, 9, 25))  # 1A:10Z
+		region.exclude((4, 12, 4, 13))  # !5M:5N
+		for rect in region.rects:
+			...
+	"""
+	
+	__slots__ = ('rects',)
+	
+	def __init__(self, rects: Iterable[Rect] = ()) -> None:
+		self.rects: list[Rect] = []
+		for rect in rects:
+			self.add(rect)
+	
+	def add(self, rect: Rect) -> None:
+		"""Add the seats of a rectangle to the region (union)"""
+		new_rects: list[Rect] = [rect]
+		for existing_rect in self.rects:
+			new_rects = [piece for new_rect in new_rects for piece in subtractRect(new_rect, existing_rect)]
+		self.rects.extend(new_rects)
+	
+	def exclude(self, rect: Rect) -> None:
+		"""Remove the seats of a rectangle from the region (difference)"""
+		self.rects = [piece for existing_rect in self.rects for piece in subtractRect(existing_rect, rect)]
+	
+	@property
+	def n_seat(self) -> int:
+		"""Number of seats in the region"""
+		return sum((bottom - top + 1) * (right - left + 1) for top, left, bottom, right in self.rects)
+	
+	def __iter__(self) -> Iterator[Coor]:
+		"""Iterate the coordinates, rectangle by rectangle, row by row inside a rectangle"""
+		for top, left, bottom, right in self.rects:
+			for row_index in range(top, bottom + 1):
+				for column_index in range(left, right + 1):
+					yield row_index, column_index
+	
+	def __contains__(self, coor: Coor) -> bool:
+		row_index, column_index = coor
+		return any(top <= row_index <= bottom and left <= column_index <= right
+		           for top, left, bottom, right in self.rects)
+	
+	def __len__(self) -> int:
+		return self.n_seat
+	
+	def __repr__(self) -> str:
+		return f"CoorRegion({self.rects})"
+
+
 def ExceptionLogger(function: Callable) -> Callable:
 	def functionWithLogger(*args, **kwargs) -> Any:
 		try:
 			return_: Any = function(*args, **kwargs)
 			return return_
 		except Exception as exception:  # NOQA # Too many possible exceptions
-			logger: Logger = getLogger(function.__name__)
-			logger.debug(f'Exception: {exception.__class__.__name__}')
+			if logger.isEnabledFor(DEBUG):
+				logger.debug("%s: Exception: %s", function.__name__, exception.__class__.__name__)
 			raise exception
 	
 	return functionWithLogger
@@ -160,91 +254,74 @@ def coorExprAnalysis(coor_expr: str, /, *, n_row: int = 99, n_column: int = 26)
 	:raise TypeError:
 	:raise ValueError:
 	"""
-	logger: Logger = getLogger('coorExprAnalysis')
-	logger.info(f"Analysing the coordinate expression: {coor_expr}")
+	logger.info("Analysing the coordinate expression: %s", coor_expr)
 	
 	if type(coor_expr) is not str or type(n_row) is not int or type(n_column) is not int:
 		raise TypeError
 	if not 1 <= n_row <= 99 or not 1 <= n_column <= 99:
 		raise ValueError
 	
-	coor_expr: str = (coor_expr
-	                  .strip()
-	                  .replace(' ', '')
-	                  .replace('\t', '')
-	                  .upper())
-	
-	if coor_expr == '':
-		raise EmptyCoordinate
-	
-	for char in coor_expr:
-		if char not in ascii_uppercase + digits + ':':
+	# Single pass: spaces and tabs are skipped, and each seat coordinate is summarised as
+	# [number of letters, number of digits, first char is a letter, last char is a letter, row, column]
+	# The checks are done after the pass, in the same order as the coordinate expression was checked before,
+	# so the same exception is raised for the same invalid coordinate expression.
+	coors: list[list] = []
+	coor: Optional[list] = None
+	first_char: str = ''
+	last_char: str = ''
+	n_colon: int = 0
+	for char in coor_expr.strip().upper():
+		if 'A' <= char <= 'Z':
+			if coor is None:
+				coor = [1, 0, True, True, 0, char]
+				coors.append(coor)
+			else:
+				coor[0] += 1
+				coor[3] = True
+				if coor[0] == 1:  # A valid seat coordinate has only one letter, the column
+					coor[5] = char
+		elif '0' <= char <= '9':
+			if coor is None:
+				coor = [0, 1, False, False, int(char), '']
+				coors.append(coor)
+			else:
+				coor[1] += 1
+				coor[3] = False
+				coor[4] = coor[4] * 10 + int(char)
+		elif char == ':':
+			n_colon += 1
+			coor = None
+		elif char == ' ' or char == '\t':
+			continue
+		else:
 			raise InvalidCharacter
+		if not first_char:
+			first_char = char
+		last_char = char
 	
-	if coor_expr[0] == ':':
+	if not first_char:
+		raise EmptyCoordinate
+	if first_char == ':':
 		raise NoStartingCoordinate
-	
-	if coor_expr[-1] == ':':
+	if last_char == ':':
 		raise NoEndingCoordinate
+	if n_colon > 1:
+		raise MoreThanOneColon
 	
-	if ':' not in coor_expr:  # Single seat
-		if all([char in ascii_uppercase for char in coor_expr]):
+	coordinates: list[tuple[int, str]] = []
+	for n_letter, n_digit, first_is_letter, last_is_letter, row, column in coors:
+		if n_digit == 0:
 			raise NoRowCoordinate
-		if all([char in digits for char in coor_expr]):
+		if n_letter == 0:
 			raise NoColumnCoordinate
-		if coor_expr[0] in ascii_uppercase and coor_expr[-1] in ascii_uppercase:
+		if first_is_letter and last_is_letter:
 			raise ColumnCoordinatesAtTwoSide
-		if coor_expr[0] in digits and coor_expr[-1] in digits:
+		if not first_is_letter and not last_is_letter:
 			raise RowCoordinatesAtTwoSide
-		
-		if coor_expr[0] in digits:  # Row first
-			column: str = coor_expr[-1]  # Row first = last char is column
-			row_str: str = coor_expr[:-1]
-			if any([char in ascii_uppercase for char in row_str]):
-				raise AlphabetCharacterInRowNumber
-			row: int = int(row_str)
-		
-		else:  # Column first
-			column: str = coor_expr[0]  # Column first = first char is column
-			row_str: str = coor_expr[1:]
-			if any([char in ascii_uppercase for char in row_str]):
-				raise AlphabetCharacterInRowNumber
-			row: int = int(row_str)
-		
+		if n_letter > 1:  # The only letter allowed is the column at one end
+			raise AlphabetCharacterInRowNumber
 		coordinate: tuple[int, str] = (row, column)
-		coordinates: list[tuple[int, str]] = [coordinate]
-	
-	elif coor_expr.count(':') > 1:
-		raise MoreThanOneColon
-	
-	else:
-		coordinates: list[tuple[int, str]] = []
-		for coor in coor_expr.split(':'):
-			if all([char in ascii_uppercase for char in coor]):
-				raise NoRowCoordinate
-			if all([char in digits for char in coor]):
-				raise NoColumnCoordinate
-			if coor[0] in ascii_uppercase and coor[-1] in ascii_uppercase:
-				raise ColumnCoordinatesAtTwoSide
-			if coor[0] in digits and coor[-1] in digits:
-				raise RowCoordinatesAtTwoSide
-			
-			if coor[0] in digits:  # Row first
-				column: str = coor[-1]  # Row first = last char is column
-				row_str: str = coor[:-1]
-				if any([char in ascii_uppercase for char in row_str]):
-					raise AlphabetCharacterInRowNumber
-				row: int = int(row_str)
-			
-			else:  # Column first
-				column: str = coor[0]  # Column first = first char is column
-				row_str: str = coor[1:]
-				if any([char in ascii_uppercase for char in row_str]):
-					raise AlphabetCharacterInRowNumber
-				row: int = int(row_str)
-			
-			coordinate: tuple[int, str] = (row, column)
-			coordinates.append(coordinate)
+		coordinates.append(coordinate)
 	
 	coordinate_indexes: list[Coor] = []
 	for coordinate in coordinates:
@@ -276,7 +353,8 @@ def coorExprAnalysis(coor_expr: str, /, *, n_row: int = 99, n_column: int = 26)
 		if column_index > max_column_index:
 			raise ColumnNumberOutOfRange
 	
-	logger.debug(f'{coordinate_indexes}')
+	if logger.isEnabledFor(DEBUG):
+		logger.debug("%s", coordinate_indexes)
 	return coordinate_indexes
 
 
@@ -286,6 +364,8 @@ def getCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int =
 	Returns a list of coordinates which the coor_expr argument defines.
 	
 	`coor_expr` is analyzed with coorExprAnalysis().
+	Results are cached by (coor_expr, n_row, n_column), see `COOR_EXPR_CACHE_SIZE`,
+	a new list is returned every time, so the caller can change it.
 	
 	:param coor_expr: A coordinate expression
 	:type coor_expr: str
@@ -296,14 +376,19 @@ def getCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int =
 	:return: A list of coordinates
 	:rtype: list[tuple[int, int]]
 	"""
-	logger: Logger = getLogger('getCoorsFromCoorExpr')
-	logger.info(f"Analysing the coordinate expression: {coor_expr}")
+	return list(_getCoorsFromCoorExpr(coor_expr, n_row, n_column))
+
+
+@lru_cache(maxsize=COOR_EXPR_CACHE_SIZE, typed=True)  # Typed, so True is not cached as 1
+def _getCoorsFromCoorExpr(coor_expr: str, n_row: int, n_column: int) -> tuple[Coor, ...]:
+	"""The cached part of getCoorsFromCoorExpr(), exceptions are not cached"""
+	logger.info("Analysing the coordinate expression: %s", coor_expr)
 	
 	analysis_result: list[Coor] = coorExprAnalysis(coor_expr, n_row=n_row, n_column=n_column)
 	
 	if len(analysis_result) == 1:
 		logger.info("Single coordinate")
-		return analysis_result
+		return tuple(analysis_result)
 	
 	analysis_result_start: Coor = analysis_result[0]
 	analysis_result_end: Coor = analysis_result[1]
@@ -315,7 +400,7 @@ def getCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int =
 		coordinates: list[Coor] = []
 		for column_index in range(analysis_result_start[1], analysis_result_end[1] + 1):
 			coordinates.append((row_index, column_index))
-		return coordinates
+		return tuple(coordinates)
 	
 	# Single column:
 	if analysis_result_start[1] == analysis_result_end[1]:
@@ -324,7 +409,7 @@ def getCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int =
 		coordinates: list[Coor] = []
 		for row_index in range(analysis_result_start[0], analysis_result_end[0] + 1):
 			coordinates.append((row_index, column_index))
-		return coordinates
+		return tuple(coordinates)
 	
 	starting_coordinate: Coor = analysis_result_start
 	ending_coordinate: Coor = analysis_result_end
@@ -335,14 +420,60 @@ def getCoorsFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int =
 		starting_coordinate: Coor = (analysis_result_start[0], analysis_result_end[1])
 		ending_coordinate: Coor = (analysis_result_end[0], analysis_result_start[1])
 	
-	logger.debug(f"Starting coordinate: {starting_coordinate}")
-	logger.debug(f"Ending coordinate: {ending_coordinate}")
+	debug: bool = logger.isEnabledFor(DEBUG)  # Checked once, not once per coordinate
+	if debug:
+		logger.debug("Starting coordinate: %s", starting_coordinate)
+		logger.debug("Ending coordinate: %s", ending_coordinate)
 	
 	coordinates: list[Coor] = []
 	
 	for row_index in range(starting_coordinate[0], ending_coordinate[0] + 1):
 		for column_index in range(starting_coordinate[1], ending_coordinate[1] + 1):
-			logger.debug(f"Adding coordinate {row_index} {column_index}")
+			if debug:
+				logger.debug("Adding coordinate %s %s", row_index, column_index)
 			coordinates.append((row_index, column_index))
 	
-	return coordinates
+	return tuple(coordinates)
+
+
+@ExceptionLogger
+def getRegionFromCoorExpr(coor_expr: str, /, *, n_row: int = 99, n_column: int = 26) -> CoorRegion:
+	"""
+	Returns the seats which a list of coordinate expressions defines, as a CoorRegion.
+	
+	Coordinate expressions are separated by commas (`,`),
+	a coordinate expression starting with an exclamation mark (`!`) excludes its seats instead.
+	They are applied from left to right, e.g. `1A:10Z, !5M:5N` is 1A to 10Z except 5M and 5N.
+	Each coordinate expression is analyzed with coorExprAnalysis().
+	
+	:param coor_expr: Coordinate expressions separated by commas
+	:type coor_expr: str
+	:param n_row: Number of row of the house
+	:type n_row: int
+	:param n_column: Number of column of the house
+	:type n_column: int
+	:return: The seats
+	:rtype: CoorRegion
+	"""
+	logger.info("Analysing the coordinate expressions: %s", coor_expr)
+	if type(coor_expr) is not str:
+		raise TypeError
+	
+	region: CoorRegion = CoorRegion()
+	for term in coor_expr.split(','):
+		term = term.strip()
+		excluding: bool = term.startswith('!')
+		if excluding:
+			term = term[1:]
+		analysis_result: list[Coor] = coorExprAnalysis(term, n_row=n_row, n_column=n_column)
+		start: Coor = analysis_result[0]
+		end: Coor = analysis_result[-1]
+		# The two coordinates may be top-right and bottom-left
+		rect: Rect = (start[0], min(start[1], end[1]), end[0], max(start[1], end[1]))
+		if excluding:
+			region.exclude(rect)
+		else:
+			region.add(rect)
+	if logger.isEnabledFor(DEBUG):
+		logger.debug("%s", region)
+	return region
@@ -14,14 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from logging import getLogger, Logger
-from typing import NoReturn, Optional, Self, TypeAlias
+from logging import DEBUG, Logger
+from threading import Lock
+from typing import Any, Iterable, NoReturn, Optional, Self, Sequence, TYPE_CHECKING, TypeAlias
 
-from .colour import Colour, column_colour, row_colour
-from .language import printLang
+from .coorutils import Coor
+from .log import getModuleLogger
+from .render import printSeatingPlan
+from .seatmap import SeatMap, SeatRow
+from .ticket import Ticket, TicketStore, timestampNow
+
+if TYPE_CHECKING:
+	from .archive import TicketArchive
+	from .storage import SeatStateFile
+
+logger: Logger = getModuleLogger(__name__)
 
 Row: TypeAlias = list[int]
-Seating_plan: TypeAlias = list[Row]
+Seating_plan: TypeAlias = SeatMap  # Compatible with list[Row] when reading
 
 Ticket_index: TypeAlias = int
 Ticket_number: TypeAlias = str
@@ -31,7 +41,16 @@ Movie: TypeAlias = str
 Row_number: TypeAlias = int  # Not to be confused with Row
 Column_number: TypeAlias = int
 Price: TypeAlias = int
-Ticket: TypeAlias = tuple[Ticket_index, Ticket_number, Time, House_number, Movie, Row_number, Column_number, Price]
+
+
+class SeatNotAvailable(Exception):
+	"""The seat is not available"""
+	chinese_msg: str = "座位不供發售"
+	
+	def __init__(self, row_index: int, column_index: int) -> None:
+		self.row_index: int = row_index
+		self.column_index: int = column_index
+		super().__init__(f"Seat {row_index + 1}{chr(column_index + 65)} is not available")
 
 
 class House:
@@ -46,7 +65,12 @@ class House:
 	
 	n_House: int = 0
 	houses_table: dict[int, Self] = {}
-	tickets_table: list[Ticket] = []
+	tickets_table: TicketStore = TicketStore()  # Keyed by ticket index, like a dict
+	house_tickets_table: dict[House_number, dict[Ticket_index, None]] = {}  # Ticket indexes of each house
+	ticket_archive: Optional['TicketArchive'] = None  # Tickets which are no longer active, set by utils.loadData()
+	seat_file: Optional['SeatStateFile'] = None  # Seats of the houses loaded without them, see loadSeats()
+	seat_lock: Lock = Lock()  # Seats may be loaded by the main thread and the persistence worker at the same time
+	seat_attributes: tuple[str, ...] = ('_seating_plan', 'seat_counts', 'free_runs')  # Set by loadSeats()
 	total_revenue: int = 0
 	total_tickets: int = 0
 	
@@ -57,110 +81,251 @@ class House:
 		"""
 		self.n_row: int = row_number
 		self.n_column: int = column_number
-		self.seating_plan: Seating_plan = [[0 for _ in range(self.n_column)] for _ in range(self.n_row)]
+		self.n_seat: int = self.n_row * self.n_column
+		self.seating_plan = SeatMap(self.n_row, self.n_column)
 		House.n_House += 1
 		self.house_number: int = House.n_House
 		House.houses_table[self.house_number] = self
 		self.movie: str = ''
-		self.n_seat: int = self.n_row * self.n_column
 		self.house_revenue: int = 0
 		self.adult_price: Price = 0
 		self.child_price: Price = 0
-		logger: Logger = getLogger("House.__init__")
-		logger.info(f"House {self.house_number} is created -- {self.n_row}x{self.n_column}")
+		logger.info("House %s is created -- %sx%s", self.house_number, self.n_row, self.n_column)
+	
+	@property
+	def seating_plan(self) -> Seating_plan:
+		"""
+		The seating plan
+		
+		It should only be used when you want to READ the seating plan,
+		use setSeat() to change the status of a seat, so the seat counters are kept up to date.
+		"""
+		return self._seating_plan
+	
+	@seating_plan.setter
+	def seating_plan(self, seating_plan: Seating_plan | list[Row]) -> None:
+		"""Replace the whole seating plan, and recount the seats"""
+		if not isinstance(seating_plan, SeatMap):
+			seating_plan = SeatMap.fromList(seating_plan)
+		self._seating_plan: Seating_plan = seating_plan
+		self.recount()
 	
 	@property
 	def n_available(self) -> int:
 		"""
 		Returns the number of available seats
 		"""
-		count: int = 0
-		for row in self.seating_plan:
-			for seat in row:
-				if seat == 0:
-					count += 1
-		return count
+		return self.seat_counts[0]
+	
+	@property
+	def n_sold(self) -> int:
+		"""
+		Returns the number of sold seats
+		"""
+		return self.seat_counts[1]
+	
+	@property
+	def n_reserved(self) -> int:
+		"""
+		Returns the number of reserved seats
+		"""
+		return self.seat_counts[2]
+	
+	def countSeats(self) -> list[int]:
+		"""
+		Count the seats of each status in the whole seating plan
+		
+		:return: Number of empty, sold and reserved seats respectively
+		:rtype: list[int]
+		"""
+		return [self._seating_plan.count(0), self._seating_plan.count(1), self._seating_plan.count(2)]
+	
+	def loadSeats(self) -> None:
+		"""
+		Load the seats of a house which was loaded without them, nothing is done if its seats are loaded
+		
+		storage.PickleBackend saves the seats in a seat-state file instead of with the houses,
+		so a house only reads its seats from `House.seat_file` when they are first needed (see __getattr__()).
+		If the seats are not in the file, the sold seats are recovered from the active tickets of the house.
+		"""
+		with House.seat_lock:
+			if '_seating_plan' in self.__dict__:
+				return
+			seating_plan: Optional[SeatMap] = None
+			if House.seat_file is not None:
+				seating_plan = House.seat_file.readSeats(self)
+			if seating_plan is None:
+				logger.critical("House %s's seats are missing, recovering the sold seats from its tickets",
+				                self.house_number)
+				seating_plan = SeatMap(self.n_row, self.n_column)
+				for ticket_index in House.house_tickets_table.get(self.house_number, ()):
+					ticket: Ticket = House.tickets_table[ticket_index]
+					seating_plan.set(ticket.row_index, ticket.column_index, 1)
+			self.seating_plan = seating_plan
+	
+	def recount(self) -> None:
+		"""Reset the seat counters and the free runs by scanning the whole seating plan"""
+		self.seat_counts: list[int] = self.countSeats()
+		self.rebuildFreeRuns()
+	
+	def rebuildFreeRuns(self) -> None:
+		"""
+		Rebuild the free runs of the whole seating plan
+		
+		`self.free_runs[row_index * self.n_column + column_index]` is the number of empty seats
+		starting from that seat to the right in the same row, 0 if that seat is not empty.
+		"""
+		self.free_runs: bytearray = bytearray(self.n_seat)
+		for row_index in range(self.n_row):
+			self.rebuildRowFreeRuns(row_index)
+	
+	def rebuildRowFreeRuns(self, row_index: Row_number) -> None:
+		"""Rebuild the free runs of a row"""
+		seats: bytearray = self._seating_plan.seats
+		row_start: int = row_index * self.n_column
+		free_run: int = 0
+		for index in range(row_start + self.n_column - 1, row_start - 1, -1):
+			free_run = free_run + 1 if seats[index] == 0 else 0
+			self.free_runs[index] = free_run
+	
+	def updateFreeRuns(self, row_index: Row_number, column_index: Column_number) -> None:
+		"""
+		Update the free runs after the status of a seat is changed
+		
+		Only the seat and the empty seats right before it in the same row are affected,
+		so it stops at the first non-empty seat to the left.
+		"""
+		seats: bytearray = self._seating_plan.seats
+		row_start: int = row_index * self.n_column
+		seat_index: int = row_start + column_index
+		free_run: int = self.free_runs[seat_index + 1] if column_index + 1 < self.n_column else 0
+		for index in range(seat_index, row_start - 1, -1):
+			if seats[index] != 0:
+				if index != seat_index:
+					break
+				free_run = 0
+			else:
+				free_run += 1
+			self.free_runs[index] = free_run
+	
+	def findBestSeats(self, n_seat: int, exclude: Optional[Iterable[Coor]] = None) -> Optional[list[Coor]]:
+		"""
+		Find the best available block of `n_seat` adjacent empty seats in the same row
+		
+		Blocks are ranked by how far they are from the centre of the screen (horizontally),
+		plus how far their row is from the preferred row, two-thirds of the way back from the screen.
+		Ties go to the row closer to the screen, then to the left.
+		
+		:param n_seat: Number of seats
+		:type n_seat: int
+		:param exclude: Seats that must not be in the block, e.g. seats selected but not yet bought
+		:type exclude: Optional[Iterable[tuple[int, int]]]
+		:return: Coordinates of the seats from left to right, or None if there is no such block
+		:rtype: Optional[list[tuple[int, int]]]
+		"""
+		if not 0 < n_seat <= self.n_column:
+			return None
+		excluded_seats: set[Coor] = set(exclude) if exclude is not None else set()
+		preferred_row_index: int = (self.n_row - 1) * 2 // 3
+		
+		best_score: Optional[tuple[int, int, int]] = None
+		for row_index in range(self.n_row):
+			row_start: int = row_index * self.n_column
+			row_score: int = abs(row_index - preferred_row_index) * 2
+			for column_index in range(self.n_column - n_seat + 1):
+				if self.free_runs[row_start + column_index] < n_seat:
+					continue
+				if excluded_seats and any((row_index, column_index + i) in excluded_seats for i in range(n_seat)):
+					continue
+				# Both offsets are doubled, so the centre of an even number of columns is still an integer
+				column_score: int = abs(column_index * 2 + n_seat - self.n_column)
+				block_score: tuple[int, int, int] = (row_score + column_score, row_index, column_index)
+				if best_score is None or block_score < best_score:
+					best_score = block_score
+		
+		if best_score is None:
+			logger.info("House %s: no %s adjacent empty seats", self.house_number, n_seat)
+			return None
+		_, row_index, column_index = best_score
+		logger.info("House %s: best %s seats at %s%s", self.house_number, n_seat, row_index + 1, chr(column_index + 65))
+		return [(row_index, column_index + i) for i in range(n_seat)]
+	
+	def verifyCounters(self) -> bool:
+		"""
+		Check the seat counters against a full recount of the seating plan
+		
+		:return: Whether the seat counters are correct
+		:rtype: bool
+		"""
+		seat_counts: list[int] = self.countSeats()
+		if seat_counts != self.seat_counts:
+			logger.warning("House %s's seat counters are wrong: %s (counted: %s)", self.house_number, self.seat_counts,
+			               seat_counts)
+			return False
+		return True
+	
+	def setSeat(self, row_index: Row_number, column_index: Column_number, seat_status: int) -> None:
+		"""
+		Set the status of a seat, and update the seat counters
+		
+		:param row_index: Row index of the seat
+		:type row_index: int
+		:param column_index: Column index of the seat
+		:type column_index: int
+		:param seat_status: 0 = Empty, 1 = Sold, 2 = Reserved
+		:type seat_status: int
+		:return: None
+		"""
+		old_seat_status: int = self._seating_plan.set(row_index, column_index, seat_status)
+		if old_seat_status == seat_status:
+			return
+		self.seat_counts[old_seat_status] -= 1
+		self.seat_counts[seat_status] += 1
+		if old_seat_status == 0 or seat_status == 0:
+			self.updateFreeRuns(row_index, column_index)
+	
+	def fillSeats(self, rect: tuple[int, int, int, int], seat_status: int) -> None:
+		"""
+		Set the status of all seats in a rectangle, and update the seat counters
+		
+		The seats are changed row by row with slice assignments, instead of seat by seat.
+		
+		:param rect: Top row index, left column index, bottom row index, right column index, all inclusive
+		:type rect: tuple[int, int, int, int]
+		:param seat_status: 0 = Empty, 1 = Sold, 2 = Reserved
+		:type seat_status: int
+		:return: None
+		"""
+		top, left, bottom, right = rect
+		old_counts: list[int] = self._seating_plan.fill(top, left, bottom, right, seat_status)
+		for old_seat_status, count in enumerate(old_counts):
+			self.seat_counts[old_seat_status] -= count
+		self.seat_counts[seat_status] += sum(old_counts)
+		for row_index in range(top, bottom + 1):
+			self.rebuildRowFreeRuns(row_index)
 	
 	def clearPlan(self) -> None:
 		"""Clear the seating plan"""
-		self.seating_plan: Seating_plan = [[0 for _ in range(self.n_column)] for _ in range(self.n_row)]
-		logger: Logger = getLogger("House.clearPlan")
-		logger.info(f"House {self.house_number}'s seating plan has been cleared")
+		self._seating_plan.clear()
+		self.seat_counts: list[int] = [self.n_seat, 0, 0]
+		self.rebuildFreeRuns()
+		logger.info("House %s's seating plan has been cleared", self.house_number)
 	
 	def printSeatingPlan(self) -> None:  # pragma: no cover # skip coverage report -- IDK how to mock output
-		"""Print the seating plan"""
-		from .colour import normal_colour
-		
-		line_length: int = self.n_column * 2 + 1
-		printLang(f"{'[Screen Here]':^{line_length + 8}}",
-		          f"{'[銀幕在此]':^{line_length + 6}}")
-		print('    ' + '_' * line_length)
-		print('    |', end='')
-		for i in range(self.n_column):
-			print(column_colour + chr(i + 65) + normal_colour, end='|')
-		print()
-		print('    ' + '-' * line_length)
-		for row in range(self.n_row):
-			print(f'{row_colour}{row + 1:<2}{normal_colour}  |', end='')
-			for column in range(self.n_column):
-				match self.seating_plan[row][column]:
-					case 0:
-						symbol = Colour.GREEN_BG + Colour.BLACK + ' ' + normal_colour
-					case 1:
-						symbol = Colour.RED_BG + Colour.BLACK + 'X' + normal_colour
-					case 2:
-						symbol = Colour.YELLOW_BG + Colour.BLACK + '!' + normal_colour
-				print(symbol, end='|')  # NOQA
-			print(f'  {row_colour}{row + 1:>2}{normal_colour}')
-			print('    ' + '-' * line_length)
-		print()
-		printLang(Colour.GREEN_BG + Colour.BLACK + "  -- Empty   " + normal_colour,
-		          Colour.GREEN_BG + Colour.BLACK + "  -- 可選座位" + normal_colour)
-		printLang(Colour.RED_BG + Colour.BLACK + "X -- Sold    " + normal_colour,
-		          Colour.RED_BG + Colour.BLACK + "X -- 已售座位" + normal_colour)
-		printLang(Colour.YELLOW_BG + Colour.BLACK + "! -- Reserved" + normal_colour,
-		          Colour.YELLOW_BG + Colour.BLACK + "! -- 保留座位" + normal_colour)
-		print()
-	
-	def printSeatingPlanWithSelectedSeat(self, selected_seat_list: list[tuple[int, int]]) -> None:  # pragma: no cover # skip coverage report -- IDK how to mock output # NOQA # line too long
-		"""Print the seating plan with the selected seats shown in different colour"""
-		from .colour import normal_colour
-		
-		line_length: int = self.n_column * 2 + 1
-		printLang(f"{'[Screen Here]':^{line_length + 8}}",
-		          f"{'[銀幕在此]':^{line_length + 6}}")
-		print('    ' + '_' * line_length)
-		print('    |', end='')
-		for i in range(self.n_column):
-			print(column_colour + chr(i + 65) + normal_colour, end='|')
-		print()
-		print('    ' + '-' * line_length)
-		for row in range(self.n_row):
-			print(f'{row_colour}{row + 1:<2}{normal_colour}  |', end='')
-			for column in range(self.n_column):
-				if (row, column) in selected_seat_list:
-					print(Colour.CYAN_BG + Colour.BLACK + '?' + normal_colour, end='|')
-					continue
-				match self.seating_plan[row][column]:
-					case 0:
-						symbol = Colour.GREEN_BG + Colour.BLACK + ' ' + normal_colour
-					case 1:
-						symbol = Colour.RED_BG + Colour.BLACK + 'X' + normal_colour
-					case 2:
-						symbol = Colour.YELLOW_BG + Colour.BLACK + '!' + normal_colour
-				print(symbol, end='|')  # NOQA
-			print(f'  {row_colour}{row + 1:>2}{normal_colour}')
-			print('    ' + '-' * line_length)
-		print()
-		printLang(Colour.GREEN_BG + Colour.BLACK + "  -- Empty   " + normal_colour,
-		          Colour.GREEN_BG + Colour.BLACK + "  -- 可選座位" + normal_colour)
-		printLang(Colour.RED_BG + Colour.BLACK + "X -- Sold    " + normal_colour,
-		          Colour.RED_BG + Colour.BLACK + "X -- 已售座位" + normal_colour)
-		printLang(Colour.YELLOW_BG + Colour.BLACK + "! -- Reserved" + normal_colour,
-		          Colour.YELLOW_BG + Colour.BLACK + "! -- 保留座位" + normal_colour)
-		printLang(Colour.CYAN_BG + Colour.BLACK + "? -- Selected" + normal_colour,
-		          Colour.CYAN_BG + Colour.BLACK + "? -- 已選座位" + normal_colour)
-		print()
+		"""Print the seating plan, see render.renderSeatingPlan()"""
+		printSeatingPlan(self)
+	
+	def printSeatingPlanWithSelectedSeat(self, selected_seat_list: Iterable[Coor]) -> None:  # pragma: no cover # skip coverage report -- IDK how to mock output # NOQA # line too long
+		"""Print the seating plan with the selected seats shown in different colour, see render.renderSeatingPlan()"""
+		printSeatingPlan(self, selected_seat_list)
+	
+	def beginPurchase(self) -> 'PurchaseTransaction':
+		"""
+		Returns a new purchase transaction of this house
+		
+		See `PurchaseTransaction`
+		"""
+		return PurchaseTransaction(self)
 	
 	@classmethod
 	def get_n_tickets(cls) -> int:
@@ -168,74 +333,159 @@ class House:
 		return len(cls.tickets_table)
 	
 	@classmethod
-	def searchTicket(cls, target_ticket_index: int) -> Optional[Ticket]:
+	def addTicket(cls, old_ticket: Sequence[Any] | Ticket) -> None:
 		"""
-		Searches the ticket with the given ticket index, and returns it.
-		Assumes the (format of the) ticket index is valid.
+		Add a ticket to `House.tickets_table`
+		
+		:param old_ticket: The ticket to be added, an old 8-tuple ticket is also accepted
+		:type old_ticket: Ticket
+		:return: None
+		"""
+		ticket: Ticket = Ticket.fromTuple(old_ticket)
+		cls.tickets_table[ticket.index] = ticket
+		cls.house_tickets_table.setdefault(ticket.house_number, {})[ticket.index] = None
+	
+	@classmethod
+	def removeTicket(cls, ticket_index: Ticket_index) -> Optional[Ticket]:
+		"""
+		Remove the ticket with the given ticket index from `House.tickets_table`, and returns it.
 		If the ticket does not exist, returns None.
 		
-		It uses binary search.
+		Seating plans and revenues are NOT changed.
+		
+		:param ticket_index: Ticket index
+		:type ticket_index: int
+		:return: The removed ticket
+		:rtype: Optional[Ticket]
+		"""
+		ticket: Optional[Ticket] = cls.tickets_table.pop(ticket_index, None)
+		if ticket is not None:
+			house_ticket_indexes: Optional[dict[Ticket_index, None]] = cls.house_tickets_table.get(ticket.house_number)
+			if house_ticket_indexes is not None:
+				house_ticket_indexes.pop(ticket_index, None)
+		return ticket
+	
+	@classmethod
+	def removeHouseTickets(cls, house_number: House_number) -> list[Ticket]:
+		"""
+		Remove all the tickets of the given house from `House.tickets_table`, and returns them.
+		
+		It uses `House.house_tickets_table`,
+		so it only costs time proportional to the number of tickets of that house.
+		
+		Seating plans and revenues are NOT changed.
+		
+		:param house_number: House number
+		:type house_number: int
+		:return: The removed tickets, in the order of ticket index
+		:rtype: list[Ticket]
+		"""
+		house_ticket_indexes: dict[Ticket_index, None] = cls.house_tickets_table.pop(house_number, {})
+		tickets: list[Ticket] = []
+		for ticket_index in house_ticket_indexes:
+			ticket: Optional[Ticket] = cls.tickets_table.pop(ticket_index, None)
+			if ticket is not None:
+				tickets.append(ticket)
+		return tickets
+	
+	@classmethod
+	def clearTickets(cls) -> None:
+		"""
+		Remove all the tickets
+		
+		`House.total_tickets` is NOT changed.
+		"""
+		cls.tickets_table = TicketStore()
+		cls.house_tickets_table = {}
+	
+	@classmethod
+	def rebuildTicketIndexes(cls) -> None:
+		"""
+		Rebuild `House.house_tickets_table` from `House.tickets_table`
 		
-		ASSUMES House.tickets_table IS ALREADY SORTED (As it should be sorted anytime).
+		It should be called after `House.tickets_table` is replaced, e.g. after loading data
+		"""
+		cls.house_tickets_table = {}
+		for ticket in cls.tickets_table.values():
+			cls.house_tickets_table.setdefault(ticket.house_number, {})[ticket.index] = None
+	
+	@classmethod
+	def searchTicket(cls, target_ticket_index: int, *, archived: bool = True) -> Optional[Ticket]:
+		"""
+		Searches the ticket with the given ticket index, and returns it.
+		If the ticket does not exist, returns None.
+		
+		`House.tickets_table` is keyed by ticket index, so it is a single lookup.
+		If it is not an active ticket, the archived tickets are searched by ticket index range (see `TicketArchive`).
 		
-		:param target_ticket_index: Ticket index with a valid format
+		:param target_ticket_index: Ticket index
 		:type target_ticket_index: int
+		:param archived: Whether to search the archived tickets too, e.g. not for a refund. Keyword-only parameter
+		:type archived: bool
 		:return: Ticket
-		:rtype: Optional[tuple[int, str, str, int, str, int, int, int]]
+		:rtype: Optional[Ticket]
+		"""
+		if logger.isEnabledFor(DEBUG):
+			logger.debug("Searching ticket: %s", target_ticket_index)
+		ticket: Optional[Ticket] = cls.tickets_table.get(target_ticket_index)
+		if ticket is None and archived and cls.ticket_archive is not None:
+			ticket = cls.ticket_archive.get(target_ticket_index)
+		return ticket
+	
+	@classmethod
+	def searchTicketNumber(cls, ticket_number: Ticket_number, *, archived: bool = True) -> Optional[Ticket]:
 		"""
-		logger: Logger = getLogger("House.searchTicket")
-		logger.info(f"Searching ticket: {target_ticket_index}")
+		Searches the ticket with the given ticket number (e.g. 'T00001'), and returns it.
+		If the ticket does not exist, returns None.
+		
+		The ticket number is 'T' followed by the zero-padded ticket index,
+		so it is mapped to the ticket index instead of keeping another table.
 		
-		if not cls.tickets_table:
-			logger.info("No any tickets, just return None")
+		:param ticket_number: Ticket number
+		:type ticket_number: str
+		:param archived: Whether to search the archived tickets too, see searchTicket(). Keyword-only parameter
+		:type archived: bool
+		:return: Ticket
+		:rtype: Optional[Ticket]
+		"""
+		if not ticket_number.startswith('T') or not ticket_number[1:].isdecimal():
 			return None
+		ticket: Optional[Ticket] = cls.searchTicket(int(ticket_number[1:]), archived=archived)
+		if ticket is None or ticket.number != ticket_number:  # E.g. 'T000001' is not 'T00001'
+			return None
+		return ticket
+	
+	def __setstate__(self, state: dict) -> None:
+		"""
+		Restore a pickled house
 		
-		min_: int = 0
-		max_: int = cls.get_n_tickets() - 1
-		logger.debug(f"Min: {min_}  & Max: {max_}")
-		
-		while True:
-			logger.debug(f"Min: {min_}  & Max: {max_}")
-			if min_ == max_:
-				if cls.tickets_table[min_][0] == target_ticket_index:
-					logger.debug(f"cls.tickets_table[min_][0] = {cls.tickets_table[min_][0]}")
-					logger.info(f"Return ticket: {cls.tickets_table[min_]}")
-					return cls.tickets_table[min_]
-				else:
-					logger.info("No such ticket")
-					return None
-			
-			if max_ - min_ == 1:
-				if cls.tickets_table[max_][0] == target_ticket_index:
-					return cls.tickets_table[max_]
-				elif cls.tickets_table[min_][0] == target_ticket_index:
-					return cls.tickets_table[min_]
-				else:
-					return None
-			
-			half: int = int((max_ + min_) / 2)  # int() = floor()
-			guess_ticket_index: int = cls.tickets_table[half][0]
-			
-			logger.debug(f"half: {half}  guess_ticket_index: {guess_ticket_index}")
-			
-			if guess_ticket_index == target_ticket_index:
-				logger.info(f"Return ticket: cls.tickets_table[half] = {cls.tickets_table[half]}")
-				return cls.tickets_table[half]
-			elif guess_ticket_index > target_ticket_index:
-				max_: int = half
-				logger.debug("max_ <- half")
-				logger.debug(f"max is now {max_}")
-			else:
-				min_: int = half
-				logger.debug("min_ <- half")
-				logger.debug(f"min is now {min_}")
+		Houses pickled by older versions have no seat counters or free runs,
+		and store the seating plan as a list of lists in `seating_plan` instead of a SeatMap in `_seating_plan`
+		"""
+		if 'seating_plan' in state:
+			state['_seating_plan'] = state.pop('seating_plan')
+		if '_seating_plan' not in state:  # Pickled without the seats, see loadSeats()
+			self.__dict__.update(state)
+			return
+		if not isinstance(state['_seating_plan'], SeatMap):
+			state['_seating_plan'] = SeatMap.fromList(state['_seating_plan'])
+		self.__dict__.update(state)
+		if 'seat_counts' not in state or 'free_runs' not in state:
+			self.recount()
+	
+	def __getattr__(self, name: str) -> Any:
+		"""Only called if an attribute is missing, the seats of a house loaded without them are loaded here"""
+		if name not in House.seat_attributes:
+			raise AttributeError(f"'House' object has no attribute '{name}'")
+		self.loadSeats()
+		return self.__dict__[name]
 	
 	# THE BELOW DUNDER METHODS ARE DEFINED FOR FUTURE USAGE ONLY, NOT IN USED
 	
 	def __str__(self) -> str:
 		return f"House {self.house_number}"
 
-	def __getitem__(self, key: int) -> Row:
+	def __getitem__(self, key: int) -> SeatRow:
 		"""
 		Returns self.seating_plan[key]
 		
@@ -249,8 +499,8 @@ class House:
 		
 		:param key: Row number
 		:type key: int
-		:return: The corresponding row of the seating plan
-		:rtype: list[int]
+		:return: The corresponding row of the seating plan, a read-only view
+		:rtype: SeatRow
 		"""
 		return self.seating_plan[key]
 	
@@ -262,7 +512,7 @@ class House:
 		
 		In most of the cases, you would NOT like to use this method.
 		I can't think of any reason for implementing this method.
-		You should do `self.seating_plan[key] = value` instead.
+		You should use `self.setSeat()` to change the seats instead.
 		However, I have already defined the __getitem__ method,
 		which may cause confusion where programmers (i.e. me) think there is an error.
 		
@@ -274,8 +524,91 @@ class House:
 		:type value: list[int]
 		"""
 		class MethodShouldNotBeUsed(Exception):
-			"""House.__setitem__ method should NEVER be used, do self.seating_plan[row_number] = row instead"""
+			"""House.__setitem__ method should NEVER be used, use House.setSeat() instead"""
 			def __str__(self) -> str:
 				self.__doc__: str
 				return self.__doc__
 		raise MethodShouldNotBeUsed
+
+
+class PurchaseTransaction:
+	"""
+	A purchase (an order) of one or more seats of a house
+	
+	Seats are staged with stage(), nothing is changed until commit() is called.
+	commit() checks all the staged seats against the seating plan in one pass,
+	then either sells all of them or none of them.
+	
+	E.g.
+		transaction: PurchaseTransaction = house.beginPurchase()
+		transaction.stage(0, 0, house.adult_price)
+		transaction.stage(0, 1, house.child_price)
+		tickets: list[Ticket] = transaction.commit()
+	"""
+	
+	def __init__(self, house: House) -> None:
+		self.house: House = house
+		self.staged_seats: list[tuple[Row_number, Column_number, Price]] = []
+		self.committed: bool = False
+	
+	def stage(self, row_index: Row_number, column_index: Column_number, price: Price) -> None:
+		"""
+		Stage a seat to be sold
+		
+		:param row_index: Row index of the seat
+		:type row_index: int
+		:param column_index: Column index of the seat
+		:type column_index: int
+		:param price: Price of the ticket
+		:type price: int
+		:return: None
+		"""
+		self.staged_seats.append((row_index, column_index, price))
+	
+	def check(self) -> None:
+		"""
+		Check all the staged seats are empty, and no seat is staged twice
+		
+		:return: None
+		:raise SeatNotAvailable: If any staged seat is not available
+		"""
+		seen: set[tuple[int, int]] = set()
+		for row_index, column_index, price in self.staged_seats:
+			if (row_index, column_index) in seen or self.house.seating_plan[row_index][column_index] != 0:
+				raise SeatNotAvailable(row_index, column_index)
+			seen.add((row_index, column_index))
+	
+	def commit(self) -> list[Ticket]:
+		"""
+		Sell all the staged seats, and returns the tickets
+		
+		If any staged seat is not available, nothing is changed.
+		
+		The caller is responsible for saving the returned tickets, e.g. utils.saveChange()
+		
+		:return: The tickets of the purchase, in the order of the staged seats
+		:rtype: list[Ticket]
+		:raise SeatNotAvailable: If any staged seat is not available
+		:raise RuntimeError: If the transaction has already been committed
+		"""
+		if self.committed:
+			raise RuntimeError("Purchase transaction has already been committed")
+		self.check()
+		
+		house: House = self.house
+		timestamp: int = timestampNow()
+		tickets: list[Ticket] = []
+		for row_index, column_index, price in self.staged_seats:
+			House.total_tickets += 1
+			ticket_index: Ticket_index = House.total_tickets
+			ticket: Ticket = Ticket(
+				ticket_index, timestamp, house.house_number, house.movie, row_index, column_index, price
+			)
+			house.setSeat(row_index, column_index, 1)
+			House.addTicket(ticket)
+			house.house_revenue += price
+			House.total_revenue += price
+			tickets.append(ticket)
+		self.committed = True
+		logger.info("House %s: %s seat%s sold", house.house_number, len(tickets), 's' if len(tickets) > 1 else '')
+		return tickets
@@ -14,76 +14,64 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from logging import getLogger, Logger
-from os import path
-from typing import Literal
+from logging import Logger
+from typing import Any, Literal
 
+from .log import getModuleLogger
+from .settings import getSetting, setSetting
+
+logger: Logger = getModuleLogger(__name__)
 
 language: Literal['CHINESE', 'ENGLISH'] = 'ENGLISH'
 
+# Message catalog, message key -> (English template, Chinese template)
+# Templates are formatted with str.format(), e.g. "House {house_number}"
+message_catalog: dict[str, tuple[str, str]] = {}
+# Message key -> template of the current language, so only one template is looked up and formatted
+active_messages: dict[str, str] = {}
+
 
 def setLanguage(language_: Literal['CHINESE', 'ENGLISH']) -> None:
 	"""
 	Set the language
 	
+	The setting is kept in memory, call settings.saveSettings() to save it
+	
 	:param language_: The language code
 	:type language_: Literal['CHINESE', 'ENGLISH']
 	:return: None
 	"""
 	global language
 	
-	logger: Logger = getLogger('changeLanguage')
 	logger.info("Changing the language")
 	
 	if language_ not in ['CHINESE', 'ENGLISH']:
-		logger.info(f"Unknown language: {language_}, set to ENGLISH as default")
+		logger.info("Unknown language: %s, set to ENGLISH as default", language_)
 		language_: Literal['CHINESE', 'ENGLISH'] = 'ENGLISH'
 	
-	logger.info(f"Setting the language to {language_}")
+	logger.info("Setting the language to %s", language_)
 	language = language_
-	
-	logger.info("Saving language setting")
-	absolute_path = path.dirname(__file__)
-	relative_path = "../../data/language.txt"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	
-	logger.info("Reaching the file")
-	with open(full_path, 'w') as file:
-		logger.info("Writing the language data to the file")
-		file.write(language)
+	activateMessages()
+	setSetting('language', language)
 
 
 def loadLanguage() -> None:
 	"""
 	Load the language setting
 
-	Reads the data from data/language.txt
-	If the file does not exist, create one and set to ENGLISH
+	Reads the setting from the settings store (data/settings.toml)
+	If there is no such setting, set to ENGLISH
 
 	:return: None
 	"""
-	logger: Logger = getLogger('loadLanguage')
 	logger.info("Loading the language setting")
 	
-	absolute_path = path.dirname(__file__)
-	relative_path = "../../data/language.txt"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	
-	try:
-		logger.info("Reaching the file")
-		with open(full_path, 'r') as file:
-			# The context of the file should a valid Literal['ENGLISH', 'CHINESE']
-			language_: str = file.read().strip().upper()
-			logger.info(f"Language option stored in the file is {language_}")
-			if language_ not in ('ENGLISH', 'CHINESE'):
-				logger.info("Unknown language option, default set to ENGLISH")
-				language_: Literal['ENGLISH', 'CHINESE'] = 'ENGLISH'
-	except FileNotFoundError:
-		logger.info("File not found, default set to ENGLISH")
+	language_: str = getSetting('language')
+	logger.info("Language option stored in the settings is %s", language_)
+	if language_ not in ('ENGLISH', 'CHINESE'):
+		logger.info("Unknown language option, default set to ENGLISH")
 		language_: Literal['ENGLISH', 'CHINESE'] = 'ENGLISH'
-		
+	
 	language_: Literal['ENGLISH', 'CHINESE']
 	setLanguage(language_)  # type: ignore[arg-type] # language_ must be Literal['ENGLISH', 'CHINESE']
 
@@ -101,11 +89,7 @@ def printLang(english_message: str = '', chinese_message: str = '', /, **kwargs)
 	:param kwargs: The same keyword arguments that are used for print(), but should not contain `sep`
 	:return: None
 	"""
-	# Only important log message should be logged with this logger,
-	# to prevent spamming the log file
-	logger: Logger = getLogger('printLang')
-	
-	if 'sep' in kwargs.keys():
+	if 'sep' in kwargs:
 		logger.warning("`sep` ARGUMENT DETECTED!")
 	
 	if language == 'ENGLISH':
@@ -134,3 +118,75 @@ def inputLang(english_message: str = '', chinese_message: str = '', /) -> str:
 	else:
 		ret: str = input(chinese_message)
 	return ret
+
+
+def activateMessages() -> None:
+	"""
+	Select the templates of the current language from the message catalog
+	
+	It is called by setLanguage()
+	
+	:return: None
+	"""
+	language_index: int = 0 if language == 'ENGLISH' else 1
+	active_messages.clear()
+	active_messages.update({key: templates[language_index] for key, templates in message_catalog.items()})
+
+
+def registerMessages(messages: dict[str, tuple[str, str]]) -> None:
+	"""
+	Register messages to the message catalog, it should be called once when a module is imported
+	
+	E.g.
+		registerMessages({
+			'house_playing': ("House {house_number} is now playing: {movie}", "電影院{house_number} 正在播映：{movie}"),
+		})
+	
+	:param messages: Message key -> (English template, Chinese template)
+	:type messages: dict[str, tuple[str, str]]
+	:return: None
+	"""
+	message_catalog.update(messages)
+	language_index: int = 0 if language == 'ENGLISH' else 1
+	active_messages.update({key: templates[language_index] for key, templates in messages.items()})
+
+
+def getMessage(key: str, /, **fields: Any) -> str:
+	"""
+	Returns the message of the current language, formatted with the fields
+	
+	:param key: The message key. Position-only parameter.
+	:type key: str
+	:param fields: Fields of the template
+	:return: The message
+	:rtype: str
+	"""
+	template: str = active_messages[key]
+	return template.format(**fields) if fields else template
+
+
+def printMsg(key: str, /, *, end: str = '\n', **fields: Any) -> None:
+	"""
+	Print the message of the current language, see getMessage()
+	
+	:param key: The message key. Position-only parameter.
+	:type key: str
+	:param end: The same as the `end` argument of print()
+	:type end: str
+	:param fields: Fields of the template
+	:return: None
+	"""
+	print(getMessage(key, **fields), end=end)
+
+
+def inputMsg(key: str, /, **fields: Any) -> str:
+	"""
+	Input with the message of the current language as the input message, see getMessage()
+	
+	:param key: The message key. Position-only parameter.
+	:type key: str
+	:param fields: Fields of the template
+	:return: The input string
+	:rtype: str
+	"""
+	return input(getMessage(key, **fields))
@@ -0,0 +1,348 @@
+"""Logging subsystem, log records are written to the log file by a background thread"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import sys
+from datetime import datetime, timedelta
+from logging import Formatter, getLevelName, getLogger, Logger, LogRecord
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from os import listdir, path, remove, replace, stat
+from queue import SimpleQueue
+from re import compile as compileRegex, Pattern
+from shutil import copyfileobj
+from threading import Thread
+from time import time
+from typing import Literal, Optional
+
+"""
+The root logger only has a QueueHandler, which puts log records into `log_queue`,
+so logging on the request path never waits for the disk.
+A QueueListener takes the records from the queue and writes them to the log file in a background thread.
+
+Every module gets its logger once, at the top of the module:
+	logger: Logger = getModuleLogger(__name__)
+and log messages use %-style arguments, e.g.
+	logger.info("House %s is created", house_number)
+so the message is only formatted if the log record is written (i.e. not below the log level).
+
+The log file is rolled over when it reaches `LOG_MAX_BYTES` or at midnight,
+the rolled file is renamed to `<name>.<time>.log` and compressed to `<name>.<time>.log.gz` in another thread.
+Compressed logs older than the retention (days) are deleted,
+and the oldest ones are deleted while they take more than `LOG_MAX_TOTAL_BYTES`,
+so the logs directory is bounded however long the program runs.
+"""
+
+LogLevel = Literal['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+LOG_LEVELS: tuple[LogLevel, ...] = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+LOG_FORMAT: str = '%(asctime)s --> %(levelname)s @%(name)s.%(funcName)s --> %(message)s'
+LOG_DATE_FORMAT: str = '%Y/%m/%d %H:%M:%S'
+
+log_queue: SimpleQueue = SimpleQueue()
+queue_handler: QueueHandler = QueueHandler(log_queue)
+log_listener: Optional[QueueListener] = None
+file_handler: Optional['LogFileHandler'] = None
+
+LOG_MAX_BYTES: int = 4 * 1024 * 1024
+LOG_MAX_TOTAL_BYTES: int = 64 * 1024 * 1024
+LOG_RETENTION_DAYS: int = 14
+ROLLED_LOG_TIME_FORMAT: str = '%Y-%m-%d_%H-%M-%S'
+
+# Log files of older versions, one per run, e.g. '2023-05-01 12-00-00.txt'
+LEGACY_LOG_PATTERN: Pattern[str] = compileRegex(r'\d{4}-\d{2}-\d{2} \d{2}-\d{2}-\d{2}\.txt')
+
+
+def getModuleLogger(module_name: str) -> Logger:
+	"""
+	Returns the logger of a module, named after the module, e.g. 'house' for `SBA.house`
+	
+	It should be called once at the top of the module, not in functions
+	
+	:param module_name: `__name__` of the module
+	:type module_name: str
+	:return: The logger
+	:rtype: Logger
+	"""
+	return getLogger(module_name.rpartition('.')[2])
+
+
+def nextMidnight(timestamp: float) -> float:
+	"""Returns the timestamp of the midnight after a timestamp, in local time"""
+	date = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+	return datetime(date.year, date.month, date.day).timestamp()
+
+
+def compressLog(full_path: str) -> None:
+	"""
+	Compress a rolled log file to `<full_path>.gz`, then delete the rolled log file
+	
+	It is written to a temporary file first, so a compressed log is never half-written.
+	
+	:param full_path: Full path of the rolled log file
+	:type full_path: str
+	:return: None
+	"""
+	temporary_path: str = full_path + '.gz.tmp'
+	with open(full_path, 'rb') as source, gzip.open(temporary_path, 'wb') as target:
+		copyfileobj(source, target)
+	replace(temporary_path, full_path + '.gz')
+	remove(full_path)
+
+
+def pruneLogs(directory: str, log_name: str, retention_days: int, max_total_bytes: int) -> list[str]:
+	"""
+	Delete the compressed logs (and log files of older versions) older than the retention,
+	then delete the oldest ones while they take more than `max_total_bytes`
+	
+	:param directory: The logs directory
+	:type directory: str
+	:param log_name: Name of the log file, e.g. 'kiosk.log', compressed logs are e.g. 'kiosk.<time>.log.gz'
+	:type log_name: str
+	:param retention_days: Number of days to keep the logs
+	:type retention_days: int
+	:param max_total_bytes: Maximum total size of the kept logs
+	:type max_total_bytes: int
+	:return: Names of the deleted files
+	:rtype: list[str]
+	"""
+	root, extension = path.splitext(log_name)
+	old_logs: list[tuple[float, int, str]] = []  # (Modified time, size, name)
+	for name in listdir(directory):
+		rotated: bool = name.startswith(root + '.') and name.endswith(extension + '.gz')
+		if rotated or LEGACY_LOG_PATTERN.fullmatch(name) is not None:
+			try:
+				file_stat = stat(path.join(directory, name))
+			except FileNotFoundError:
+				continue
+			old_logs.append((file_stat.st_mtime, file_stat.st_size, name))
+	old_logs.sort(reverse=True)  # Newest first
+	
+	expire_time: float = time() - retention_days * 86400
+	deleted: list[str] = []
+	total_bytes: int = 0
+	for modified_time, size, name in old_logs:
+		total_bytes += size
+		if modified_time >= expire_time and total_bytes <= max_total_bytes:
+			continue
+		try:
+			remove(path.join(directory, name))
+		except FileNotFoundError:
+			continue
+		deleted.append(name)
+	return deleted
+
+
+class LogFileHandler(RotatingFileHandler):
+	"""
+	Writes log records to a file, which is rolled over when it reaches `max_bytes` or at midnight
+	
+	Rolled files are compressed and old logs are pruned in another thread (see compressLog() and pruneLogs()),
+	so writing a log record never waits for it.
+	The head (e.g. the program information) is written at the start of every log file.
+	"""
+	
+	def __init__(self, full_path: str, *, head: str = '', max_bytes: int = LOG_MAX_BYTES,
+	             retention_days: int = LOG_RETENTION_DAYS, max_total_bytes: int = LOG_MAX_TOTAL_BYTES) -> None:
+		self.head: str = head
+		self.retention_days: int = retention_days
+		self.max_total_bytes: int = max_total_bytes
+		self.workers: list[Thread] = []
+		try:
+			file_stat = stat(full_path)
+		except FileNotFoundError:
+			last_write_time: float = time()
+		else:
+			last_write_time: float = file_stat.st_mtime if file_stat.st_size else time()
+		self.rollover_at: float = nextMidnight(last_write_time)
+		super().__init__(full_path, maxBytes=max_bytes, encoding='utf-8')
+		
+		directory, name = path.split(self.baseFilename)
+		root, extension = path.splitext(name)
+		# Rolled files left uncompressed, e.g. the program was killed while compressing
+		self.startMaintenance([path.join(directory, file_name) for file_name in listdir(directory)
+		                       if file_name != name and file_name.startswith(root + '.') and file_name.endswith(extension)])
+		if time() >= self.rollover_at:
+			self.doRollover()
+		else:
+			self.writeHead()
+	
+	def writeHead(self) -> None:
+		"""Write the head to the log file"""
+		if self.head and self.stream is not None:
+			self.stream.write(self.head)
+			self.flush()
+	
+	def shouldRollover(self, record: LogRecord) -> bool:
+		"""Returns whether the log file should be rolled over before writing the record"""
+		if time() >= self.rollover_at:
+			return True
+		return bool(super().shouldRollover(record))
+	
+	def rolledPath(self) -> str:
+		"""Returns a path to rename the log file to when it is rolled over, e.g. logs/kiosk.2023-05-01_00-00-00.log"""
+		root, extension = path.splitext(self.baseFilename)
+		rolled_time: str = datetime.now().strftime(ROLLED_LOG_TIME_FORMAT)
+		rolled_path: str = f'{root}.{rolled_time}{extension}'
+		suffix: int = 1
+		while path.exists(rolled_path) or path.exists(rolled_path + '.gz'):
+			rolled_path = f'{root}.{rolled_time}-{suffix}{extension}'
+			suffix += 1
+		return rolled_path
+	
+	def doRollover(self) -> None:
+		"""Rename the log file, compress it in another thread, then start a new log file with the head"""
+		if self.stream is not None:
+			self.stream.close()
+			self.stream = None
+		rolled_paths: list[str] = []
+		if path.exists(self.baseFilename) and path.getsize(self.baseFilename) > 0:
+			rolled_path: str = self.rolledPath()
+			replace(self.baseFilename, rolled_path)
+			rolled_paths.append(rolled_path)
+		self.rollover_at = nextMidnight(time())
+		self.stream = self._open()
+		self.writeHead()
+		self.startMaintenance(rolled_paths)
+	
+	def startMaintenance(self, rolled_paths: list[str]) -> None:
+		"""Compress rolled log files and prune old logs in another thread"""
+		self.workers = [worker for worker in self.workers if worker.is_alive()]
+		worker: Thread = Thread(target=self.maintain, args=(rolled_paths,), name='LogMaintenance', daemon=True)
+		worker.start()
+		self.workers.append(worker)
+	
+	def maintain(self, rolled_paths: list[str]) -> None:
+		"""Compress rolled log files, then prune old logs"""
+		directory, name = path.split(self.baseFilename)
+		try:
+			for rolled_path in rolled_paths:
+				compressLog(rolled_path)
+			pruneLogs(directory, name, self.retention_days, self.max_total_bytes)
+		except OSError as error:
+			# It is not logged, the log file may be being rolled over
+			sys.stderr.write(f"Log maintenance failed: {error}\n")
+	
+	def close(self) -> None:
+		"""Close the log file, and wait for the compression and pruning to finish"""
+		for worker in self.workers:
+			worker.join()
+		self.workers.clear()
+		super().close()
+
+
+def startLogging(full_path: str, head: str = '') -> None:
+	"""
+	Start writing logs to a file in a background thread, at the log level and the log retention of the settings
+	
+	:param full_path: Full path of the log file, logs are appended to it and it is rolled over, see LogFileHandler
+	:type full_path: str
+	:param head: Text written at the start of this run and of every rolled-over log file
+	:type head: str
+	:return: None
+	"""
+	from .settings import getSetting
+	
+	global file_handler, log_listener
+	
+	stopLogging()
+	file_handler = LogFileHandler(full_path, head=head, retention_days=getLogRetention())
+	file_handler.setFormatter(Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+	log_listener = QueueListener(log_queue, file_handler)
+	log_listener.start()
+	
+	root_logger: Logger = getLogger()
+	if queue_handler not in root_logger.handlers:
+		root_logger.addHandler(queue_handler)
+	setLogLevel(getSetting('log_level'))
+
+
+def stopLogging() -> None:
+	"""
+	Write all the log records in the queue to the log file, then stop the background thread
+	
+	:return: None
+	"""
+	global file_handler, log_listener
+	
+	if log_listener is not None:
+		log_listener.stop()
+		log_listener = None
+	if file_handler is not None:
+		file_handler.close()
+		file_handler = None
+
+
+def setLogLevel(level: str) -> None:
+	"""
+	Set the log level of the program, it can be changed at runtime
+	
+	Log records below the level are dropped before their messages are formatted.
+	The setting is kept in memory, call settings.saveSettings() to save it
+	
+	:param level: The log level, one of `LOG_LEVELS`, otherwise INFO is set
+	:type level: str
+	:return: None
+	"""
+	from .settings import setSetting
+	
+	if level not in LOG_LEVELS:
+		level = 'INFO'
+	getLogger().setLevel(level)
+	setSetting('log_level', level)
+
+
+def getLogLevel() -> LogLevel:
+	"""Returns the log level of the program, INFO if it is not one of `LOG_LEVELS`"""
+	level_name: str = getLevelName(getLogger().getEffectiveLevel())
+	for level in LOG_LEVELS:
+		if level == level_name:
+			return level
+	return 'INFO'
+
+
+def getLogRetention() -> int:
+	"""Returns the number of days to keep the logs, from the settings"""
+	from .settings import getSetting
+	
+	retention_days: str = getSetting('log_retention_days')
+	if retention_days.isdecimal() and int(retention_days) > 0:
+		return int(retention_days)
+	return LOG_RETENTION_DAYS
+
+
+def setLogRetention(retention_days: int) -> list[str]:
+	"""
+	Set the number of days to keep the logs, the logs older than it are deleted immediately
+	
+	The setting is kept in memory, call settings.saveSettings() to save it
+	
+	:param retention_days: Number of days, at least 1
+	:type retention_days: int
+	:return: Names of the deleted log files
+	:rtype: list[str]
+	:raise ValueError: If the number of days is less than 1
+	"""
+	from .settings import setSetting
+	
+	if retention_days < 1:
+		raise ValueError("The log retention must be at least 1 day")
+	setSetting('log_retention_days', str(retention_days))
+	if file_handler is None:
+		return []
+	file_handler.retention_days = retention_days
+	directory, name = path.split(file_handler.baseFilename)
+	return pruneLogs(directory, name, retention_days, file_handler.max_total_bytes)
@@ -16,16 +16,28 @@
 
 
 from getpass import getpass
-from hashlib import sha3_512
-from logging import getLogger, Logger
-from os import path
+from hashlib import pbkdf2_hmac, scrypt, sha3_512
+from hmac import compare_digest, new as hmac_new
+from logging import Logger
+from os import path, replace, stat, urandom
+from time import monotonic
 from tomllib import load as loadtoml
-from typing import Any
+from typing import Any, Optional
 
 from .colour import Colour
 from .language import inputLang, printLang
+from .log import getModuleLogger
 from .utils import clearScreen
 
+logger: Logger = getModuleLogger(__name__)
+
+Account = dict[str, str]
+
+# Username -> account, loaded from data/accounts.toml by getAccounts()
+accounts_table: dict[str, Account] = {}
+# Modification time (in nanoseconds) of data/accounts.toml when `accounts_table` was loaded
+accounts_mtime: Optional[int] = None
+
 
 def hash(password: str) -> str:
 	"""
@@ -39,6 +51,255 @@ def hash(password: str) -> str:
 	return ret
 
 
+class PasswordHasher:
+	"""
+	Base class of password hashers
+	
+	A hashed password is a string that starts with the name of the hasher, e.g. 'scrypt$...',
+	so the hasher (and its cost) can be identified when verifying.
+	Hashed passwords of older versions (hexadecimal sha3_512, without a name) are verified by Sha3Hasher.
+	"""
+	
+	name: str = ''
+	
+	def hash(self, password: str) -> str:
+		"""Returns the hashed password"""
+		raise NotImplementedError
+	
+	def verify(self, password: str, hashed_password: str) -> bool:
+		"""Returns whether the password matches the hashed password, in constant time"""
+		raise NotImplementedError
+	
+	def isCurrent(self, hashed_password: str) -> bool:
+		"""Returns whether the hashed password was hashed by this hasher with the same cost"""
+		raise NotImplementedError
+
+
+class Sha3Hasher(PasswordHasher):
+	"""Unsalted `sha3_512`, used by older versions. It is only used to verify (then upgrade) old hashed passwords."""
+	
+	name = 'sha3_512'
+	
+	def hash(self, password: str) -> str:
+		return hash(password)
+	
+	def verify(self, password: str, hashed_password: str) -> bool:
+		return compare_digest(hash(password).encode(), hashed_password.encode())
+	
+	def isCurrent(self, hashed_password: str) -> bool:
+		return '$' not in hashed_password
+
+
+class ScryptHasher(PasswordHasher):
+	"""
+	Salted `hashlib.scrypt`
+	
+	Format: 'scrypt$n$r$p$salt$key', salt and key are hexadecimal
+	"""
+	
+	name = 'scrypt'
+	
+	def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1) -> None:
+		self.n: int = n
+		self.r: int = r
+		self.p: int = p
+	
+	def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+		return scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=128 * n * r * p + 2 ** 20, dklen=64)
+	
+	def hash(self, password: str) -> str:
+		salt: bytes = urandom(16)
+		key: bytes = self._derive(password, salt, self.n, self.r, self.p)
+		return f"{self.name}${self.n}${self.r}${self.p}${salt.hex()}${key.hex()}"
+	
+	def verify(self, password: str, hashed_password: str) -> bool:
+		name, n, r, p, salt, key = hashed_password.split('$')
+		return compare_digest(self._derive(password, bytes.fromhex(salt), int(n), int(r), int(p)), bytes.fromhex(key))
+	
+	def isCurrent(self, hashed_password: str) -> bool:
+		return hashed_password.startswith(f"{self.name}${self.n}${self.r}${self.p}$")
+
+
+class Pbkdf2Hasher(PasswordHasher):
+	"""
+	Salted `hashlib.pbkdf2_hmac` with sha256
+	
+	Format: 'pbkdf2_sha256$iterations$salt$key', salt and key are hexadecimal
+	"""
+	
+	name = 'pbkdf2_sha256'
+	
+	def __init__(self, iterations: int = 600_000) -> None:
+		self.iterations: int = iterations
+	
+	def hash(self, password: str) -> str:
+		salt: bytes = urandom(16)
+		key: bytes = pbkdf2_hmac('sha256', password.encode(), salt, self.iterations)
+		return f"{self.name}${self.iterations}${salt.hex()}${key.hex()}"
+	
+	def verify(self, password: str, hashed_password: str) -> bool:
+		name, iterations, salt, key = hashed_password.split('$')
+		return compare_digest(pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations)),
+		                      bytes.fromhex(key))
+	
+	def isCurrent(self, hashed_password: str) -> bool:
+		return hashed_password.startswith(f"{self.name}${self.iterations}$")
+
+
+# Hasher name -> hasher, for verifying
+# Register a hasher here to support a new kind of hashed password
+hashers: dict[str, PasswordHasher] = {
+	Sha3Hasher.name: Sha3Hasher(),
+	ScryptHasher.name: ScryptHasher(),
+	Pbkdf2Hasher.name: Pbkdf2Hasher(),
+}
+
+# New passwords are hashed, and passwords hashed by other hashers (or with another cost) are upgraded, by this hasher
+default_hasher: PasswordHasher = hashers[ScryptHasher.name]
+
+
+def getHasher(hashed_password: str) -> PasswordHasher:
+	"""
+	Returns the hasher of a hashed password
+	
+	:param hashed_password: The hashed password
+	:type hashed_password: str
+	:return: The hasher
+	:rtype: PasswordHasher
+	:raise ValueError: If the hasher is unknown
+	"""
+	if '$' not in hashed_password:
+		return hashers[Sha3Hasher.name]
+	name: str = hashed_password.split('$', 1)[0]
+	if name not in hashers:
+		raise ValueError(f"Unknown password hasher: {name}")
+	return hashers[name]
+
+
+def getAccountsPath() -> str:
+	"""Returns the full path of data/accounts.toml"""
+	return path.join(path.dirname(__file__), "../../data/accounts.toml")
+
+
+def getAccounts() -> dict[str, Account]:
+	"""
+	Returns the accounts, keyed by username
+	
+	The accounts are loaded from `data/accounts.toml` once,
+	and only reloaded when the modification time of the file changes
+	
+	:return: Username -> account
+	:rtype: dict[str, dict[str, str]]
+	:raise FileNotFoundError: If `accounts.toml` could not be found
+	"""
+	global accounts_mtime
+	
+	full_path: str = getAccountsPath()
+	mtime: int = stat(full_path).st_mtime_ns
+	if mtime == accounts_mtime:
+		return accounts_table
+	
+	logger.info("Loading accounts information")
+	with open(full_path, 'rb') as file:
+		file_data: dict[str, Any] = loadtoml(file)
+	accounts_table.clear()
+	for account in file_data.values():
+		accounts_table[account["name"]] = account
+	accounts_mtime = mtime
+	logger.info("%s accounts loaded", len(accounts_table))
+	return accounts_table
+
+
+# Successful verifications are cached for this number of seconds,
+# so quick re-logins (e.g. during a shift change) do not run the slow hasher again
+VERIFIED_CREDENTIAL_TTL: float = 300
+
+# A random key of this session, the cache stores HMACs of passwords with this key, never the passwords
+session_key: bytes = urandom(32)
+
+# Username -> (session token, hashed password, expiry time), see verifyPassword()
+verified_credentials: dict[str, tuple[bytes, str, float]] = {}
+
+
+def getSessionToken(username: str, password: str) -> bytes:
+	"""Returns the HMAC of the username and password with the session key"""
+	return hmac_new(session_key, f"{username}\0{password}".encode(), 'sha256').digest()
+
+
+def upgradeHashedPassword(account: Account, password: str) -> None:
+	"""
+	Rehash the password of an account with the default hasher, and save it to `data/accounts.toml`
+	
+	Only the hashed password is replaced in the file (comments are kept),
+	the file is written to a temporary file first, then it replaces `data/accounts.toml`.
+	
+	:param account: The account
+	:type account: dict[str, str]
+	:param password: The (verified) password
+	:type password: str
+	:return: None
+	"""
+	logger.info("Upgrading the hashed password of %s to %s", account['name'], default_hasher.name)
+	
+	old_hashed_password: str = account["hashed_password"]
+	new_hashed_password: str = default_hasher.hash(password)
+	full_path: str = getAccountsPath()
+	try:
+		with open(full_path, 'r', encoding='utf-8') as file:
+			file_text: str = file.read()
+		old_line: str = f'hashed_password = "{old_hashed_password}"'
+		if file_text.count(old_line) != 1:
+			logger.warning("Cannot find the hashed password in the file, not upgrading")
+			return
+		temporary_path: str = full_path + ".tmp"
+		with open(temporary_path, 'w', encoding='utf-8') as file:
+			file.write(file_text.replace(old_line, f'hashed_password = "{new_hashed_password}"'))
+		replace(temporary_path, full_path)
+	except OSError as error:  # Logging in must not fail because of the upgrade
+		logger.warning("Failed to upgrade the hashed password: %s", error)
+		return
+	account["hashed_password"] = new_hashed_password
+
+
+def verifyPassword(account: Account, password: str) -> bool:
+	"""
+	Verify the password of an account
+	
+	Successful verifications are cached for `VERIFIED_CREDENTIAL_TTL` seconds.
+	Passwords hashed by older versions (or with another cost) are upgraded to the default hasher.
+	
+	:param account: The account
+	:type account: dict[str, str]
+	:param password: The password
+	:type password: str
+	:return: Whether the password is correct
+	:rtype: bool
+	"""
+	username: str = account["name"]
+	hashed_password: str = account["hashed_password"]
+	session_token: bytes = getSessionToken(username, password)
+	cached: Optional[tuple[bytes, str, float]] = verified_credentials.get(username)
+	if cached is not None:
+		cached_token, cached_hashed_password, expiry_time = cached
+		cache_valid: bool = monotonic() < expiry_time and cached_hashed_password == hashed_password
+		if cache_valid and compare_digest(cached_token, session_token):
+			return True
+	
+	try:
+		hasher: PasswordHasher = getHasher(hashed_password)
+		correct: bool = hasher.verify(password, hashed_password)
+	except ValueError:  # Unknown hasher or broken hashed password
+		logger.error("Invalid hashed password of %s", username)
+		return False
+	if not correct:
+		verified_credentials.pop(username, None)
+		return False
+	if not default_hasher.isCurrent(hashed_password):
+		upgradeHashedPassword(account, password)
+	verified_credentials[username] = (session_token, account["hashed_password"], monotonic() + VERIFIED_CREDENTIAL_TTL)
+	return True
+
+
 def login(*, first_time: bool = False) -> int:
 	"""
 	Login using accounts from `data/accounts.toml`
@@ -62,76 +323,62 @@ def login(*, first_time: bool = False) -> int:
 	from .colour import normal_colour
 	from .language import language
 	
-	logger: Logger = getLogger('login')
-	
-	logger.info("Reaching accounts.toml file")
-	# Obtain the full path of the file
-	absolute_path = path.dirname(__file__)
-	relative_path = "../../data/accounts.toml"
-	full_path = path.join(absolute_path, relative_path)
+	logger.info("Getting accounts information")
 	try:
-		with open(full_path, 'rb') as file:
-			logger.info("Getting accounts information")
-			file_data: dict[str, Any] = loadtoml(file)
-			account_list: list[dict[str, str]] = list(file_data.values())
-			if first_time:
-				if language == 'ENGLISH':
-					message: str = "To initialize, please login as admin."
-				else:
-					message: str = "請登錄為管理員以初始化系統。"
-				logger.info("First time logging in, requires login as admin")
+		getAccounts()
+		if first_time:
+			if language == 'ENGLISH':
+				message: str = "To initialize, please login as admin."
 			else:
+				message: str = "請登錄為管理員以初始化系統。"
+			logger.info("First time logging in, requires login as admin")
+		else:
+			message: str = ''
+		while True:
+			clearScreen()
+			printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
+			print(Colour.RED + message + normal_colour + "\n\n\n")
+			logger.info("Waiting username input")
+			username: str = inputLang("Username: ", "用戶名稱：")
+			username: str = username.strip()
+			if username == '':
 				message: str = ''
-			while True:
-				clearScreen()
-				printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
-				print(Colour.RED + message + normal_colour + "\n\n\n")
-				logger.info("Waiting username input")
-				username: str = inputLang("Username: ", "用戶名稱：")
-				username: str = username.strip()
-				if username == '':
-					message: str = ''
-					continue
-				username_exists: bool = False
-				for account in account_list:
-					if account["name"] == username:
-						username_exists: bool = True
-						user_account: dict[str, str] = account
-				if not username_exists:
-					logger.info("Username doesn't exit")
-					if language == 'ENGLISH':
-						message: str = "Username does not exists, please try again."
-					else:
-						message: str = "用戶名稱不存在，請重新輸入。"
-					continue
-				# Make sure you use cmd.exe or powershell.exe
-				# getpass() in python terminal inside IDEs may not work, e.g. PyCharm
+				continue
+			user_account: Optional[Account] = getAccounts().get(username)
+			if user_account is None:
+				logger.info("Username doesn't exit")
 				if language == 'ENGLISH':
-					prompt: str = "Password: "
+					message: str = "Username does not exists, please try again."
 				else:
-					prompt: str = "密碼："
-				password: str = getpass(prompt).strip()
-				hashed_password: str = hash(password)
-				if user_account["hashed_password"] == hashed_password:
-					if user_account["name"] == "admin":
-						logger.info("LOGGED IN AS ADMIN")
-						return 1
-					else:  # Login as user success
-						if first_time:
-							logger.info("USER WANTS TO LOGIN BUT ONLY ADMIN CAN LOGIN NOW")
-							if language == 'ENGLISH':
-								message: str = "Sorry, only admin can log in now as initialization is required."
-							else:
-								message: str = "抱歉，現在只有管理員才能登錄。"
-							continue
-						logger.info("LOGGED IN AS USER")
-						return 0
+					message: str = "用戶名稱不存在，請重新輸入。"
+				continue
+			# Make sure you use cmd.exe or powershell.exe
+			# getpass() in python terminal inside IDEs may not work, e.g. PyCharm
+			if language == 'ENGLISH':
+				prompt: str = "Password: "
+			else:
+				prompt: str = "密碼："
+			password: str = getpass(prompt).strip()
+			if verifyPassword(user_account, password):
+				if user_account["name"] == "admin":
+					logger.info("LOGGED IN AS ADMIN")
+					return 1
+				else:  # Login as user success
+					if first_time:
+						logger.info("USER WANTS TO LOGIN BUT ONLY ADMIN CAN LOGIN NOW")
+						if language == 'ENGLISH':
+							message: str = "Sorry, only admin can log in now as initialization is required."
+						else:
+							message: str = "抱歉，現在只有管理員才能登錄。"
+						continue
+					logger.info("LOGGED IN AS USER")
+					return 0
+			else:
+				logger.info("Incorrect password")
+				if language == 'ENGLISH':
+					message: str = "Password incorrect, please try again."
 				else:
-					logger.info("Incorrect password")
-					if language == 'ENGLISH':
-						message: str = "Password incorrect, please try again."
-					else:
-						message: str = "密碼錯誤，請重新登錄。"
+					message: str = "密碼錯誤，請重新登錄。"
 	
 	except FileNotFoundError:
 		logger.critical("No accounts.toml file")
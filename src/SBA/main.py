@@ -31,16 +31,19 @@ from .utils import checkPythonVersion
 
 checkPythonVersion()
 
-from logging import getLogger, Logger
+from logging import Logger
 from time import sleep
 from traceback import format_exception
 
 from .admin import adminMode
 from .colour import loadColour
 from .language import loadLanguage
+from .log import getModuleLogger
 from .login import login
 from .user import userMode
-from .utils import clearScreen, initLog, loadData, ProgramForcedExit
+from .utils import clearScreen, detectTerminal, initLog, loadData, ProgramForcedExit
+
+logger: Logger = getModuleLogger(__name__)
 
 
 def main() -> None:
@@ -55,7 +58,6 @@ def main() -> None:
 	"""
 	
 	initLog()
-	logger: Logger = getLogger("main")
 	logger.info("Inside the main function")
 	
 	def _main() -> None:
@@ -69,10 +71,10 @@ def main() -> None:
 		
 		try:
 		
-			logger: Logger = getLogger("main._main")
 			logger.info("Inside the main loop")
 		
 			# So elegant :)
+			detectTerminal()
 			loadColour()
 			loadLanguage()
 			clearScreen()
@@ -90,7 +92,6 @@ def main() -> None:
 		# Below is an error handling disaster, need to be improved
 		# For the below input/output, no need translation, so that even the translator failed, it still works
 		except SystemExit:
-			logger: Logger = getLogger("main._main.SystemExit_handler")
 			logger.info("SystemExit. Bye.")
 			
 			print(r"Admin Exit -- Bye Bye! \(●'◡'●)/")
@@ -98,7 +99,6 @@ def main() -> None:
 		
 		except KeyboardInterrupt:
 			# This will not catch any keyboard interrupt when handling errors
-			logger: Logger = getLogger("main._main.KeyboardInterrupt_handler")
 			logger.info("Keyboard interrupted")
 			logger.info("Waiting for confirm")
 			confirm: str = input("\n\nYou just pressed a special keystroke.\n"
@@ -113,7 +113,6 @@ def main() -> None:
 			_main()
 
 		except ProgramForcedExit as error:
-			logger: Logger = getLogger("main._main.ProgramForcedExit")
 			logger.error("ProgramForcedExit")
 			logger.info("TRACEBACK STARTS")
 			for error_message_line in format_exception(error):
@@ -127,8 +126,7 @@ def main() -> None:
 		
 		except Exception as error:
 			
-			logger: Logger = getLogger("main._main.Exception_handler")
-			logger.critical(f"ERROR --- {error.__class__.__name__}")
+			logger.critical("ERROR --- %s", error.__class__.__name__)
 			logger.info("TRACEBACK STARTS")
 			for error_message_line in format_exception(error):
 				error_message_line: str = error_message_line.strip()
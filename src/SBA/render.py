@@ -0,0 +1,262 @@
+"""Renders seating plans to the terminal"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from functools import lru_cache
+from os import get_terminal_size
+from re import compile as compileRegex, Pattern
+from typing import Iterable, Optional, TYPE_CHECKING
+from unicodedata import east_asian_width
+
+from .colour import Colour, column_colour, row_colour
+from .coorutils import Coor
+
+if TYPE_CHECKING:
+	from .house import House
+
+
+class FrameTemplate:
+	"""
+	Pre-built strings of a seating plan frame, for one colour mode, language and number of columns
+	
+	Every cell of the frame is one of a few strings,
+	so they are built once and a frame is just joining them.
+	"""
+	
+	__slots__ = ('header', 'separator', 'seat_glyphs', 'selected_glyph', 'row_heads', 'row_tails',
+	             'legend', 'selected_legend')
+	
+	def __init__(self, normal_colour: str, language: str, n_column: int) -> None:
+		line_length: int = n_column * 2 + 1
+		self.separator: str = '    ' + '-' * line_length + '\n'
+		if language == 'ENGLISH':
+			screen: str = f"{'[Screen Here]':^{line_length + 8}}"
+		else:
+			screen: str = f"{'[銀幕在此]':^{line_length + 6}}"
+		column_labels: str = ''.join(column_colour + chr(i + 65) + normal_colour + '|' for i in range(n_column))
+		self.header: str = f"{screen}\n    {'_' * line_length}\n    |{column_labels}\n{self.separator}"
+		
+		# Index = seat status, 0 = Empty, 1 = Sold, 2 = Reserved
+		self.seat_glyphs: tuple[str, str, str] = (
+			Colour.GREEN_BG + Colour.BLACK + ' ' + normal_colour + '|',
+			Colour.RED_BG + Colour.BLACK + 'X' + normal_colour + '|',
+			Colour.YELLOW_BG + Colour.BLACK + '!' + normal_colour + '|',
+		)
+		self.selected_glyph: str = Colour.CYAN_BG + Colour.BLACK + '?' + normal_colour + '|'
+		
+		# Index = row index, rows are at most 99
+		self.row_heads: tuple[str, ...] = tuple(f'{row_colour}{row + 1:<2}{normal_colour}  |' for row in range(99))
+		self.row_tails: tuple[str, ...] = tuple(f'  {row_colour}{row + 1:>2}{normal_colour}\n' for row in range(99))
+		
+		if language == 'ENGLISH':
+			legend_lines: list[str] = ["  -- Empty   ", "X -- Sold    ", "! -- Reserved"]
+			selected_legend_line: str = "? -- Selected"
+		else:
+			legend_lines: list[str] = ["  -- 可選座位", "X -- 已售座位", "! -- 保留座位"]
+			selected_legend_line: str = "? -- 已選座位"
+		legend: str = '\n' + ''.join(
+			background + Colour.BLACK + line + normal_colour + '\n'
+			for background, line in zip((Colour.GREEN_BG, Colour.RED_BG, Colour.YELLOW_BG), legend_lines)
+		)
+		self.legend: str = legend + '\n'
+		self.selected_legend: str = legend + Colour.CYAN_BG + Colour.BLACK + selected_legend_line + normal_colour + '\n\n'
+
+
+@lru_cache(maxsize=16)
+def getFrameTemplate(normal_colour: str, language: str, n_column: int) -> FrameTemplate:
+	"""Returns the cached FrameTemplate"""
+	return FrameTemplate(normal_colour, language, n_column)
+
+
+def renderSeatingPlan(house: 'House', selected_seats: Optional[Iterable[Coor]] = None) -> str:
+	"""
+	Returns the whole frame of the seating plan of a house as a string,
+	with the selected seats shown in different colour
+	
+	:param house: The house
+	:type house: House
+	:param selected_seats: Coordinates of the selected seats,
+		None if it is not selecting seats (the 'Selected' legend is not shown)
+	:type selected_seats: Optional[Iterable[tuple[int, int]]]
+	:return: The frame
+	:rtype: str
+	"""
+	from .colour import normal_colour
+	from .language import language
+	
+	template: FrameTemplate = getFrameTemplate(normal_colour, language, house.n_column)
+	selected_columns: dict[int, set[int]] = {}
+	for row_index, column_index in selected_seats or ():
+		selected_columns.setdefault(row_index, set()).add(column_index)
+	
+	seat_glyphs: tuple[str, str, str] = template.seat_glyphs
+	seats: bytearray = house.seating_plan.seats
+	n_column: int = house.n_column
+	parts: list[str] = [template.header]
+	for row_index in range(house.n_row):
+		row_start: int = row_index * n_column
+		cells: list[str] = [seat_glyphs[seat] for seat in seats[row_start:row_start + n_column]]
+		for column_index in selected_columns.get(row_index, ()):
+			cells[column_index] = template.selected_glyph
+		parts.append(template.row_heads[row_index])
+		parts.extend(cells)
+		parts.append(template.row_tails[row_index])
+		parts.append(template.separator)
+	parts.append(template.legend if selected_seats is None else template.selected_legend)
+	return ''.join(parts)
+
+
+def printSeatingPlan(house: 'House', selected_seats: Optional[Iterable[Coor]] = None) -> None:  # pragma: no cover
+	"""Print the seating plan of a house with a single write, see renderSeatingPlan()"""
+	sys.stdout.write(renderSeatingPlan(house, selected_seats))
+	sys.stdout.flush()
+
+
+class DrawnFrame:
+	"""A seating plan screen drawn on the terminal, used to redraw only the changed seats"""
+	
+	__slots__ = ('key', 'seats', 'selected_seats', 'header_line_counts')
+	
+	def __init__(self, key: tuple, seats: bytes, selected_seats: set[Coor], header_line_counts: list[int]) -> None:
+		self.key: tuple = key
+		self.seats: bytes = seats
+		self.selected_seats: set[Coor] = selected_seats
+		self.header_line_counts: list[int] = header_line_counts
+
+
+# The last screen drawn for each house, by house number
+# It must be forgotten once anything else is drawn, see forgetFrames()
+last_frames: dict[int, DrawnFrame] = {}
+
+ANSI_SGR_PATTERN: Pattern[str] = compileRegex(r'\033\[[0-9;]*m')
+
+
+def forgetFrames() -> None:
+	"""Forget all the drawn screens, so the next screen is fully drawn. Called when the screen is cleared."""
+	last_frames.clear()
+
+
+def displayWidth(line: str) -> int:
+	"""Returns the number of terminal columns a line takes, wide (e.g. Chinese) characters take two"""
+	line = ANSI_SGR_PATTERN.sub('', line)
+	return sum(2 if east_asian_width(char) in ('W', 'F') else 1 for char in line)
+
+
+def countScreenLines(text: str, n_terminal_column: int) -> list[int]:
+	"""Returns the number of terminal lines each line of the text takes, including wrapped lines"""
+	return [max(1, -(-displayWidth(line) // n_terminal_column)) for line in text.split('\n')]
+
+
+def renderSeatingPlanScreen(house: 'House', header: str, footer: str, selected_seats: Iterable[Coor],
+                            terminal_size: tuple[int, int]) -> tuple[str, bool]:
+	"""
+	Returns what to write to draw a screen of a header, the seating plan and a footer,
+	and whether it is a full repaint (the screen should be cleared first).
+	
+	If the same house was drawn last time with the same layout,
+	the cursor is moved to rewrite the header and only the seats whose status or selection changed,
+	then the footer is rewritten.
+	Otherwise, or if the screen does not fit in the terminal (lines would wrap or scroll),
+	the whole screen is drawn.
+	
+	:param house: The house
+	:type house: House
+	:param header: Text above the seating plan, ends with a newline
+	:type header: str
+	:param footer: Text below the seating plan, including the input prompt
+	:type footer: str
+	:param selected_seats: Coordinates of the selected seats
+	:type selected_seats: Iterable[tuple[int, int]]
+	:param terminal_size: Number of columns and lines of the terminal
+	:type terminal_size: tuple[int, int]
+	:return: Text to write, and whether it is a full repaint
+	:rtype: tuple[str, bool]
+	"""
+	from .colour import normal_colour
+	from .language import language
+	
+	template: FrameTemplate = getFrameTemplate(normal_colour, language, house.n_column)
+	selected: set[Coor] = set(selected_seats)
+	seats: bytes = bytes(house.seating_plan.seats)
+	frame: str = renderSeatingPlan(house, selected)
+	n_terminal_column, n_terminal_line = terminal_size
+	header_line_counts: list[int] = countScreenLines(header.removesuffix('\n'), n_terminal_column)
+	n_plan_line: int = frame.count('\n')
+	# Plus one line for the input after the footer
+	n_screen_line: int = sum(header_line_counts) + n_plan_line + sum(countScreenLines(footer, n_terminal_column)) + 1
+	fits: bool = max(countScreenLines(frame, n_terminal_column)) == 1 and n_screen_line <= n_terminal_line
+	key: tuple = (template, house.n_row, house.n_column, terminal_size)
+	last_frame: Optional[DrawnFrame] = last_frames.pop(house.house_number, None)
+	if not fits:
+		return header + frame + footer, True
+	last_frames[house.house_number] = DrawnFrame(key, seats, selected, header_line_counts)
+	if last_frame is None or last_frame.key != key or last_frame.header_line_counts != header_line_counts:
+		return header + frame + footer, True
+	
+	# Rewrite the header line by line, erasing the rest of each line
+	parts: list[str] = ['\033[H', header.removesuffix('\n').replace('\n', '\033[K\n'), '\033[K\n']
+	
+	changed_indexes: set[int] = set()
+	if seats != last_frame.seats:
+		changed_indexes.update(index for index, (seat, last_seat) in enumerate(zip(seats, last_frame.seats))
+		                       if seat != last_seat)
+	changed_indexes.update(row_index * house.n_column + column_index
+	                       for row_index, column_index in selected ^ last_frame.selected_seats)
+	plan_top_line: int = sum(header_line_counts) + 5  # 4 lines of screen and column letters, 1-based
+	for index in sorted(changed_indexes):
+		row_index, column_index = divmod(index, house.n_column)
+		if (row_index, column_index) in selected:
+			glyph: str = template.selected_glyph
+		else:
+			glyph: str = template.seat_glyphs[seats[index]]
+		parts.append(f'\033[{plan_top_line + row_index * 2};{column_index * 2 + 6}H{glyph}')
+	
+	# Rewrite the footer, erasing everything below
+	parts.append(f'\033[{sum(header_line_counts) + n_plan_line + 1};1H\033[J')
+	parts.append(footer)
+	return ''.join(parts), False
+
+
+def drawSeatingPlanScreen(house: 'House', header: str, footer: str,
+                          selected_seats: Iterable[Coor]) -> None:  # pragma: no cover
+	"""
+	Draw a screen of a header, the seating plan and a footer with a single write,
+	redrawing only the changed seats if possible, see renderSeatingPlanScreen()
+	"""
+	from .utils import clearScreen
+	
+	if sys.stdout.isatty():
+		try:
+			n_terminal_column, n_terminal_line = get_terminal_size()
+			terminal_size: tuple[int, int] = (n_terminal_column, n_terminal_line)
+		except OSError:
+			terminal_size: tuple[int, int] = (0, 0)
+	else:  # Cursor movements are meaningless if it is not a terminal
+		terminal_size: tuple[int, int] = (0, 0)
+	if terminal_size == (0, 0):
+		clearScreen()
+		sys.stdout.write(header + renderSeatingPlan(house, selected_seats) + footer)
+		sys.stdout.flush()
+		return
+	
+	text, full_repaint = renderSeatingPlanScreen(house, header, footer, selected_seats, terminal_size)
+	if full_repaint:
+		frame: Optional[DrawnFrame] = last_frames.get(house.house_number)
+		clearScreen()  # It forgets the drawn screens
+		if frame is not None:
+			last_frames[house.house_number] = frame
+	sys.stdout.write(text)
+	sys.stdout.flush()
@@ -0,0 +1,175 @@
+"""Defines SeatMap, a compact storage of a seating plan"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Iterator, Optional, Self
+
+
+class SeatRow:
+	"""
+	A read-only view of a row of a SeatMap
+
+	It behaves like the list of seats of that row when reading,
+	so `seat_map[row_index][column_index]` works as before.
+	"""
+
+	__slots__ = ('seats', 'start', 'n_column')
+
+	def __init__(self, seats: bytearray, start: int, n_column: int) -> None:
+		self.seats: bytearray = seats
+		self.start: int = start
+		self.n_column: int = n_column
+
+	def __getitem__(self, column_index: int) -> int:
+		if not -self.n_column <= column_index < self.n_column:
+			raise IndexError("seat index out of range")
+		if column_index < 0:
+			column_index += self.n_column
+		return self.seats[self.start + column_index]
+
+	def __len__(self) -> int:
+		return self.n_column
+
+	def __iter__(self) -> Iterator[int]:
+		return iter(self.seats[self.start:self.start + self.n_column])
+
+	def __eq__(self, other: Any) -> bool:
+		return list(self) == list(other)
+
+	def __repr__(self) -> str:
+		return repr(list(self))
+
+
+class SeatMap:
+	"""
+	A seating plan stored in a single bytearray, one byte per seat, row by row
+
+	0 = Empty (O)
+	1 = Sold (X)
+	2 = Reserved (!)
+
+	Reading is compatible with the old list of lists seating plan,
+	`seat_map[row_index]` returns a SeatRow, and `seat_map[row_index][column_index]` returns the seat.
+	Whole-plan operations (count, clear, copy) are single bytearray operations.
+	"""
+
+	__slots__ = ('n_row', 'n_column', 'seats')
+
+	def __init__(self, n_row: int, n_column: int, seats: Optional[bytearray] = None) -> None:
+		self.n_row: int = n_row
+		self.n_column: int = n_column
+		if seats is None:
+			seats = bytearray(n_row * n_column)
+		if len(seats) != n_row * n_column:
+			raise ValueError("Number of seats does not match the size of the seating plan")
+		self.seats: bytearray = seats
+
+	@classmethod
+	def fromList(cls, seating_plan: list[list[int]]) -> Self:
+		"""
+		Create a SeatMap from a list of lists seating plan
+
+		:param seating_plan: A list of rows, each row is a list of seats
+		:type seating_plan: list[list[int]]
+		:return: The SeatMap
+		:rtype: SeatMap
+		"""
+		n_row: int = len(seating_plan)
+		n_column: int = len(seating_plan[0]) if seating_plan else 0
+		seats: bytearray = bytearray()
+		for row in seating_plan:
+			if len(row) != n_column:
+				raise ValueError("All rows of a seating plan must have the same number of seats")
+			seats.extend(row)
+		return cls(n_row, n_column, seats)
+
+	def toList(self) -> list[list[int]]:
+		"""
+		Returns the seating plan as a list of lists
+
+		:return: A list of rows, each row is a list of seats
+		:rtype: list[list[int]]
+		"""
+		return [list(self.seats[start:start + self.n_column])
+		        for start in range(0, self.n_row * self.n_column, self.n_column)]
+
+	def get(self, row_index: int, column_index: int) -> int:
+		"""Returns the status of a seat"""
+		return self.seats[row_index * self.n_column + column_index]
+
+	def set(self, row_index: int, column_index: int, seat_status: int) -> int:
+		"""
+		Set the status of a seat, and returns the old status
+
+		Use House.setSeat() instead of calling it directly, so the seat counters are updated.
+		"""
+		index: int = row_index * self.n_column + column_index
+		old_seat_status: int = self.seats[index]
+		self.seats[index] = seat_status
+		return old_seat_status
+
+	def fill(self, top: int, left: int, bottom: int, right: int, seat_status: int) -> list[int]:
+		"""
+		Set the status of all seats in a rectangle, one slice assignment per row,
+		and returns the number of empty, sold and reserved seats in the rectangle before
+		
+		Use House.fillSeats() instead of calling it directly, so the seat counters are updated.
+		"""
+		old_counts: list[int] = [0, 0, 0]
+		row_seats: bytes = bytes([seat_status]) * (right - left + 1)
+		for row_start in range(top * self.n_column, (bottom + 1) * self.n_column, self.n_column):
+			old_row_seats: bytearray = self.seats[row_start + left:row_start + right + 1]
+			old_counts[1] += old_row_seats.count(1)
+			old_counts[2] += old_row_seats.count(2)
+			self.seats[row_start + left:row_start + right + 1] = row_seats
+		old_counts[0] = (bottom - top + 1) * (right - left + 1) - old_counts[1] - old_counts[2]
+		return old_counts
+	
+	def count(self, seat_status: int) -> int:
+		"""Returns the number of seats with the given status"""
+		return self.seats.count(seat_status)
+
+	def clear(self) -> None:
+		"""Set all seats to empty"""
+		self.seats[:] = bytes(len(self.seats))
+
+	def copy(self) -> 'SeatMap':
+		"""Returns a copy of the SeatMap"""
+		return SeatMap(self.n_row, self.n_column, bytearray(self.seats))
+
+	def __getitem__(self, row_index: int) -> SeatRow:
+		if not -self.n_row <= row_index < self.n_row:
+			raise IndexError("row index out of range")
+		if row_index < 0:
+			row_index += self.n_row
+		return SeatRow(self.seats, row_index * self.n_column, self.n_column)
+
+	def __len__(self) -> int:
+		return self.n_row
+
+	def __iter__(self) -> Iterator[SeatRow]:
+		for row_index in range(self.n_row):
+			yield SeatRow(self.seats, row_index * self.n_column, self.n_column)
+
+	def __eq__(self, other: Any) -> bool:
+		if isinstance(other, SeatMap):
+			return (self.n_row, self.n_column, self.seats) == (other.n_row, other.n_column, other.seats)
+		return self.toList() == other
+
+	def __repr__(self) -> str:
+		return f"SeatMap({self.toList()})"
+
+	def __reduce__(self) -> tuple:
+		return SeatMap, (self.n_row, self.n_column, bytearray(self.seats))
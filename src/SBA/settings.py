@@ -0,0 +1,190 @@
+"""Settings store, keeps the settings in memory and saves them to data/settings.toml"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from logging import Logger
+from os import makedirs, path, remove, replace
+from tomllib import load as loadtoml, TOMLDecodeError
+
+from .log import getModuleLogger
+
+logger: Logger = getModuleLogger(__name__)
+
+"""
+Settings are read from the file once, then kept in memory.
+setSetting() only marks the settings dirty if the value really changes,
+and saveSettings() only writes the file if the settings are dirty,
+so saving data (which happens after every ticket sale) does not touch the settings file.
+"""
+
+DEFAULT_SETTINGS: dict[str, str] = {
+	'language': 'ENGLISH',
+	'colour_mode': 'DARK',
+	'log_level': 'INFO',
+	'log_retention_days': '14',
+	'storage_backend': 'PICKLE',
+	'save_latency_ms': '1000',
+}
+
+# Settings were stored in these files by older versions, they are migrated to data/settings.toml
+LEGACY_SETTING_FILES: dict[str, str] = {
+	'language': 'language.txt',
+	'colour_mode': 'colour.txt',
+}
+
+settings: dict[str, str] = DEFAULT_SETTINGS.copy()
+settings_loaded: bool = False
+settings_dirty: bool = False
+
+
+def getDataPath(filename: str) -> str:
+	"""Returns the full path of a file in the data folder"""
+	return path.join(path.dirname(__file__), "../../data", filename)
+
+
+def getSetting(key: str) -> str:
+	"""
+	Returns the value of a setting, settings are loaded if they were not
+	
+	:param key: The setting key, e.g. 'language'
+	:type key: str
+	:return: The value
+	:rtype: str
+	"""
+	if not settings_loaded:
+		loadSettings()
+	return settings[key]
+
+
+def setSetting(key: str, value: str) -> None:
+	"""
+	Set the value of a setting in memory, it is saved by saveSettings()
+	
+	:param key: The setting key, e.g. 'language'
+	:type key: str
+	:param value: The value
+	:type value: str
+	:return: None
+	"""
+	global settings_dirty
+	
+	if not settings_loaded:
+		loadSettings()
+	if settings[key] != value:
+		settings[key] = value
+		settings_dirty = True
+
+
+def loadSettings() -> None:
+	"""
+	Load the settings from data/settings.toml
+	
+	If the file does not exist, settings are migrated from the files used by older versions
+	(data/language.txt and data/colour.txt), or default settings are used.
+	
+	:return: None
+	"""
+	global settings_dirty, settings_loaded
+	
+	logger.info("Loading settings")
+	
+	settings.clear()
+	settings.update(DEFAULT_SETTINGS)
+	settings_dirty = False
+	settings_loaded = True
+	
+	full_path: str = getDataPath("settings.toml")
+	logger.debug("Full path = %s", full_path)
+	try:
+		with open(full_path, 'rb') as file:
+			file_data: dict = loadtoml(file)
+	except FileNotFoundError:
+		logger.info("No settings file, finding settings files of older versions")
+	except TOMLDecodeError:
+		logger.warning("Invalid settings file, using default settings")
+		settings_dirty = True
+		return
+	else:
+		for key in DEFAULT_SETTINGS:
+			if isinstance(file_data.get(key), str):
+				settings[key] = file_data[key].strip().upper()
+		logger.info("Settings loaded: %s", settings)
+		return
+	
+	for key, filename in LEGACY_SETTING_FILES.items():
+		try:
+			with open(getDataPath(filename), 'r') as file:
+				settings[key] = file.read().strip().upper()
+		except FileNotFoundError:
+			continue
+		logger.info("Migrating %s from %s", key, filename)
+		settings_dirty = True
+	logger.info("Settings loaded: %s", settings)
+
+
+def saveSettings() -> bool:
+	"""
+	Save the settings to data/settings.toml if they changed
+	
+	The settings are written to a temporary file first, then it replaces data/settings.toml,
+	so the settings file is never half-written.
+	
+	:return: Whether the settings file was written
+	:rtype: bool
+	"""
+	global settings_dirty
+	
+	if not settings_dirty:
+		return False
+	
+	logger.info("Saving settings: %s", settings)
+	
+	full_path: str = getDataPath("settings.toml")
+	logger.debug("Full path = %s", full_path)
+	makedirs(path.dirname(full_path), exist_ok=True)
+	temporary_path: str = full_path + ".tmp"
+	with open(temporary_path, 'w', encoding='utf-8') as file:
+		for key, value in settings.items():
+			file.write(f'{key} = "{value}"\n')
+	replace(temporary_path, full_path)
+	settings_dirty = False
+	return True
+
+
+def deleteSettings() -> bool:
+	"""
+	Reset the settings to default, and delete the settings file (and settings files of older versions)
+	
+	:return: Whether any settings file was deleted
+	:rtype: bool
+	"""
+	global settings_dirty, settings_loaded
+	
+	logger.info("Deleting settings")
+	
+	settings.clear()
+	settings.update(DEFAULT_SETTINGS)
+	settings_loaded = True
+	settings_dirty = False
+	
+	deleted: bool = False
+	for filename in ("settings.toml", *LEGACY_SETTING_FILES.values()):
+		try:
+			remove(getDataPath(filename))
+		except FileNotFoundError:
+			continue
+		logger.info("Deleted %s", filename)
+		deleted = True
+	return deleted
@@ -0,0 +1,1020 @@
+"""Storage backends, which save and load the houses and tickets data"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+from logging import Logger
+from mmap import mmap
+from os import close, fsync, makedirs, name, O_RDONLY, open as openFd, path, remove, replace
+from pickle import dump, HIGHEST_PROTOCOL, load, loads, Pickler
+from struct import error as StructError, Struct
+from typing import Any, BinaryIO, Callable, Iterator, Optional, TypeAlias
+from zlib import crc32
+
+from .house import House, Ticket, TicketStore
+from .log import getModuleLogger
+from .seatmap import SeatMap
+from .settings import getDataPath, getSetting
+
+logger: Logger = getModuleLogger(__name__)
+
+"""
+A storage backend saves the whole houses and tickets data (a snapshot) with save(),
+loads it with load(), and saves a single change with saveChange().
+Changes are already applied to the houses and tickets in memory before they are saved.
+
+PickleBackend (the default) pickles the snapshot into data/houses and data/tickets,
+and appends changes to data/journal.
+SQLiteBackend stores the data in data/data.sqlite3, and saves a change by updating only the changed rows.
+
+The backend is selected by the 'storage_backend' setting, see getStorage().
+"""
+
+# A change record is a tuple, the first item is the kind of the change:
+# ('SELL', (ticket, ...))
+# ('REFUND', ticket_index, (house_number, row_index, column_index))  -- The seat of the ticket
+# ('DELETE', ticket_index, (house_number, row_index, column_index))  -- Records of older versions have no seat
+# ('OVERRIDE', house_number, ((top, left, bottom, right), ...), seat_status)  -- Rectangles, inclusive
+# In data/journal, ('BEGIN', journal_generation) is always the first record
+JournalRecord: TypeAlias = tuple[Any, ...]
+
+# Prints and/or logs a progress message, takes an English message and a Chinese message
+Reporter: TypeAlias = Callable[[str, str], None]
+
+# Number of records in the journal before it is compacted into a new snapshot
+JOURNAL_COMPACTION_THRESHOLD: int = 1000
+
+# A snapshot file (data/houses and data/tickets) starts with a header:
+# magic, length of the pickle and CRC-32 of the pickle
+SNAPSHOT_MAGIC: bytes = b'SBASNAP1'
+SNAPSHOT_HEADER: Struct = Struct('>8sQI')
+
+# The seat-state file (data/seats) starts with a header: magic, generation and number of houses,
+# then an entry for each house: house number, number of rows and number of columns
+SEAT_FILE_MAGIC: bytes = b'SBASEAT1'
+SEAT_FILE_HEADER: Struct = Struct('>8sQI')
+SEAT_FILE_ENTRY: Struct = Struct('>III')
+
+
+class SnapshotCorrupted(Exception):
+	"""The snapshot file is corrupted"""
+	chinese_msg: str = "快照檔案已損壞"
+
+
+def logReport(english_message: str, chinese_message: str) -> None:
+	"""The default reporter, which only logs the English message"""
+	logger.info(english_message)
+
+
+class ChecksumWriter:
+	"""A file-like object which writes to a file, and keeps the length and the CRC-32 of what is written"""
+	
+	__slots__ = ('file', 'length', 'checksum')
+	
+	def __init__(self, file: BinaryIO) -> None:
+		self.file: BinaryIO = file
+		self.length: int = 0
+		self.checksum: int = 0
+	
+	def write(self, data: bytes) -> int:
+		self.length += len(data)
+		self.checksum = crc32(data, self.checksum)
+		return self.file.write(data)
+
+
+def writeSnapshotFile(full_path: str, data: Any, pickler: type[Pickler] = Pickler) -> None:
+	"""
+	Pickle the data into a snapshot file with a header (see `SNAPSHOT_HEADER`), and fsync it
+	
+	The data is pickled straight into the file while the checksum is calculated,
+	then the header is written at the start of the file, so the pickle is never copied in memory.
+	
+	:param full_path: Full path of the file, it should be a temporary file which replaces the snapshot file later
+	:type full_path: str
+	:param data: The data
+	:type data: Any
+	:param pickler: The Pickler class, e.g. SeatlessPickler
+	:type pickler: type[Pickler]
+	:return: None
+	"""
+	with open(full_path, 'wb') as file:
+		file.write(bytes(SNAPSHOT_HEADER.size))  # Written after the pickle
+		writer: ChecksumWriter = ChecksumWriter(file)
+		pickler(writer, protocol=HIGHEST_PROTOCOL).dump(data)
+		file.seek(0)
+		file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, writer.length, writer.checksum))
+		file.flush()
+		fdatasync(file.fileno())
+
+
+def readSnapshotFile(full_path: str) -> Any:
+	"""
+	Read a snapshot file, the checksum is verified
+	
+	Snapshot files written by older versions have no header, they are unpickled directly.
+	
+	:param full_path: Full path of the file
+	:type full_path: str
+	:return: The data
+	:rtype: Any
+	:raise FileNotFoundError: If there is no such file
+	:raise SnapshotCorrupted: If the file is empty, truncated or its checksum does not match
+	"""
+	with open(full_path, 'rb') as file:
+		content: bytes = file.read()
+	if not content.startswith(SNAPSHOT_MAGIC):
+		try:
+			return loads(content)
+		except Exception as error:  # Unpickling broken data can raise almost anything
+			raise SnapshotCorrupted(f"{path.basename(full_path)} is not a valid snapshot: {error!r}") from error
+	if len(content) < SNAPSHOT_HEADER.size:
+		raise SnapshotCorrupted(f"{path.basename(full_path)} has a truncated header")
+	magic, length, checksum = SNAPSHOT_HEADER.unpack_from(content)
+	payload: memoryview = memoryview(content)[SNAPSHOT_HEADER.size:]
+	if len(payload) != length:
+		raise SnapshotCorrupted(f"{path.basename(full_path)} has {len(payload)} bytes of data, {length} expected")
+	if crc32(payload) != checksum:
+		raise SnapshotCorrupted(f"{path.basename(full_path)} has a wrong checksum")
+	return loads(payload)
+
+
+def matchSnapshots(houses_data: list, tickets_data: list) -> bool:
+	"""Returns whether the houses snapshot goes with the tickets snapshot, or they are written by older versions"""
+	if len(houses_data) < 5 or len(tickets_data) < 3:  # No generation
+		return True
+	return houses_data[4] == tickets_data[2]
+
+
+def fdatasync(fd: int) -> None:
+	"""Flush the data of a file to the disk, without its timestamps if the platform can (not Windows)"""
+	if hasattr(os, 'fdatasync'):
+		os.fdatasync(fd)
+	else:
+		fsync(fd)
+
+
+def fsyncDirectory(directory: str) -> None:
+	"""Fsync a directory, so the renames in it are durable. Windows cannot and does not need to."""
+	if name == 'nt':
+		return
+	fd: int = openFd(directory, O_RDONLY)
+	try:
+		fsync(fd)
+	finally:
+		close(fd)
+
+
+class SeatStateFile:
+	"""
+	The seats of all houses in a fixed-layout binary file, which is memory-mapped
+	
+	The file starts with a header (`SEAT_FILE_HEADER`) and an entry for each house (`SEAT_FILE_ENTRY`),
+	followed by the seats of the houses in the same order, one byte per seat, row by row, like SeatMap.
+	It is written for each snapshot by writeSeatStateFile(), the header records the generation of the snapshot.
+	
+	Opening the file only reads the header and the entries, however many seats there are,
+	and readSeats() copies the seats of a house out of the file when the house needs them (see House.loadSeats()).
+	The seats in memory are never the file itself, writeRecords() writes the seats changed by change records
+	in place after the records are saved in the journal, so the file only holds the seats of the snapshot
+	and of the changes in its journal, and replaying the journal on top of it gives the same seats.
+	"""
+	
+	def __init__(self, full_path: str) -> None:
+		self.full_path: str = full_path
+		self.mapping: Optional[mmap] = None
+		self.generation: int = 0
+		self.layout: dict[int, tuple[int, int, int]] = {}  # House number: (n_row, n_column, offset of the seats)
+	
+	def open(self) -> bool:
+		"""
+		Map the file and read its layout
+		
+		:return: Whether the file is mapped, False if there is no such file or it is corrupted
+		:rtype: bool
+		"""
+		self.close()
+		try:
+			with open(self.full_path, 'r+b') as file:
+				mapping: mmap = mmap(file.fileno(), 0)  # The mapping stays valid after the file is closed
+		except FileNotFoundError:
+			logger.info("No seat-state file %s", path.basename(self.full_path))
+			return False
+		except (OSError, ValueError) as error:  # ValueError: empty file
+			logger.error("Cannot map the seat-state file: %r", error)
+			return False
+		
+		layout: dict[int, tuple[int, int, int]] = {}
+		try:
+			magic, generation, n_house = SEAT_FILE_HEADER.unpack_from(mapping)
+			if magic != SEAT_FILE_MAGIC:
+				raise ValueError("wrong magic")
+			offset: int = SEAT_FILE_HEADER.size + n_house * SEAT_FILE_ENTRY.size
+			for entry_offset in range(SEAT_FILE_HEADER.size, SEAT_FILE_HEADER.size + n_house * SEAT_FILE_ENTRY.size,
+			                          SEAT_FILE_ENTRY.size):
+				house_number, n_row, n_column = SEAT_FILE_ENTRY.unpack_from(mapping, entry_offset)
+				layout[house_number] = (n_row, n_column, offset)
+				offset += n_row * n_column
+			if offset != len(mapping):
+				raise ValueError(f"{len(mapping)} bytes, {offset} expected")
+		except (ValueError, StructError) as error:
+			logger.error("Corrupted seat-state file, ignored: %s", error)
+			mapping.close()
+			return False
+		
+		self.mapping = mapping
+		self.generation = generation
+		self.layout = layout
+		return True
+	
+	def readSeats(self, house: House) -> Optional[SeatMap]:
+		"""
+		Returns a copy of the seats of a house, or None if the house is not in the file with the same size
+		
+		:param house: The house
+		:type house: House
+		:return: The seats of the house
+		:rtype: Optional[SeatMap]
+		"""
+		entry: Optional[tuple[int, int, int]] = self.layout.get(house.house_number)
+		if self.mapping is None or entry is None or entry[:2] != (house.n_row, house.n_column):
+			return None
+		offset: int = entry[2]
+		logger.debug("Reading house %s's seats from the seat-state file", house.house_number)
+		return SeatMap(house.n_row, house.n_column, bytearray(self.mapping[offset:offset + house.n_seat]))
+	
+	def writeRecords(self, records: list[JournalRecord]) -> None:
+		"""
+		Write the seats changed by change records in place, and msync them
+		
+		It must only be called after the records are saved in the journal,
+		so the seats in the file are never newer than the journal.
+		The houses created after the snapshot are not in the file, their seats are written with the next snapshot.
+		
+		:param records: Change records, see `JournalRecord`
+		:type records: list[tuple]
+		:return: None
+		"""
+		if self.mapping is None:
+			return
+		for record in records:
+			match record:
+				case ('SELL', tickets):
+					for ticket in tickets:
+						ticket = Ticket.fromTuple(ticket)
+						self.writeRect(ticket.house_number,
+						               (ticket.row_index, ticket.column_index, ticket.row_index, ticket.column_index), 1)
+				case ('REFUND' | 'DELETE', _, (house_number, row_index, column_index)):
+					self.writeRect(house_number, (row_index, column_index, row_index, column_index), 0)
+				case ('OVERRIDE', house_number, rects, seat_status):
+					for rect in rects:
+						self.writeRect(house_number, rect, seat_status)
+		self.mapping.flush()
+	
+	def writeRect(self, house_number: int, rect: tuple[int, int, int, int], seat_status: int) -> None:
+		"""Set the status of all seats in a rectangle (top, left, bottom, right, inclusive) of a house in the file"""
+		entry: Optional[tuple[int, int, int]] = self.layout.get(house_number)
+		top, left, bottom, right = rect
+		if self.mapping is None or entry is None or bottom >= entry[0] or right >= entry[1]:
+			return
+		n_column, offset = entry[1:]
+		row_seats: bytes = bytes([seat_status]) * (right - left + 1)
+		for row_start in range(offset + top * n_column, offset + (bottom + 1) * n_column, n_column):
+			self.mapping[row_start + left:row_start + right + 1] = row_seats
+	
+	def close(self) -> None:
+		"""Unmap the file"""
+		self.generation = 0
+		self.layout = {}
+		if self.mapping is not None:
+			self.mapping.close()
+			self.mapping = None
+
+
+def writeSeatStateFile(full_path: str, houses: dict[int, House], generation: int) -> None:
+	"""
+	Write the layout and the seats of the houses into a seat-state file (see `SeatStateFile`), and fsync it
+	
+	:param full_path: Full path of the file, it should be a temporary file which replaces the seat-state file later
+	:type full_path: str
+	:param houses: The houses, e.g. `House.houses_table`
+	:type houses: dict[int, House]
+	:param generation: The generation of the snapshot the seats go with
+	:type generation: int
+	:return: None
+	"""
+	with open(full_path, 'wb') as file:
+		file.write(SEAT_FILE_HEADER.pack(SEAT_FILE_MAGIC, generation, len(houses)))
+		for house in houses.values():
+			file.write(SEAT_FILE_ENTRY.pack(house.house_number, house.n_row, house.n_column))
+		for house in houses.values():
+			file.write(house.seating_plan.seats)
+		file.flush()
+		fdatasync(file.fileno())
+
+
+class SeatlessPickler(Pickler):
+	"""Pickles houses without their seats, which are saved in the seat-state file, see `PickleBackend`"""
+	
+	def reducer_override(self, obj: Any) -> Any:
+		if isinstance(obj, House):
+			state: dict[str, Any] = {name: value for name, value in vars(obj).items()
+			                         if name not in House.seat_attributes}
+			return object.__new__, (House,), state
+		return NotImplemented
+
+
+def applyJournalRecord(record: JournalRecord) -> None:
+	"""
+	Apply a journal record to the houses and tickets data
+	
+	Records which have already been applied to the snapshot are ignored,
+	so replaying a record twice is harmless.
+	
+	:param record: A journal record, see `JournalRecord`
+	:type record: tuple
+	:return: None
+	"""
+	
+	match record:
+		case ('SELL', tickets):
+			for ticket in tickets:
+				ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price = ticket
+				if ticket_index <= House.total_tickets:  # Already in the snapshot
+					continue
+				House.total_tickets = ticket_index
+				House.addTicket(ticket)
+				House.total_revenue += price
+				if house_number in House.houses_table:
+					house: House = House.houses_table[house_number]
+					house.setSeat(row_index, column_index, 1)
+					house.house_revenue += price
+		case ('REFUND' | 'DELETE' as kind, ticket_index, *_):
+			ticket: Optional[Ticket] = House.searchTicket(ticket_index)
+			if ticket is None:  # Already removed in the snapshot
+				return
+			ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price = ticket
+			if house_number in House.houses_table:
+				house: House = House.houses_table[house_number]
+				house.setSeat(row_index, column_index, 0)
+				if kind == 'REFUND':
+					house.house_revenue -= price
+			if kind == 'REFUND':
+				House.total_revenue -= price
+			House.removeTicket(ticket_index)
+		case ('OVERRIDE', house_number, rects, seat_status):
+			if house_number not in House.houses_table:
+				return
+			house: House = House.houses_table[house_number]
+			for rect in rects:
+				if len(rect) == 2:  # A (row_index, column_index) seat, written by older versions
+					rect = (*rect, *rect)
+				house.fillSeats(rect, seat_status)
+		case _:
+			logger.warning("Unknown journal record: %s", record[0])
+
+
+class StorageBackend:
+	"""Interface of a storage backend, see the subclasses"""
+	
+	name: str = ''
+	
+	def save(self, report: Reporter = logReport) -> None:
+		"""
+		Save the whole houses and tickets data
+		
+		:param report: Called with the progress messages
+		:type report: Callable[[str, str], None]
+		:return: None
+		"""
+		raise NotImplementedError
+	
+	def load(self, report: Reporter = logReport) -> bool:
+		"""
+		Load the whole houses and tickets data, the data in memory is kept if there is no saved data
+		
+		:param report: Called with the progress messages
+		:type report: Callable[[str, str], None]
+		:return: Whether any saved data was found
+		:rtype: bool
+		"""
+		raise NotImplementedError
+	
+	def saveChange(self, record: JournalRecord) -> None:
+		"""
+		Save a single change, which has already been applied to the data in memory
+		
+		:param record: A change record, see `JournalRecord`
+		:type record: tuple
+		:return: None
+		"""
+		raise NotImplementedError
+	
+	def saveChanges(self, records: list[JournalRecord]) -> None:
+		"""
+		Save a group of changes, which have already been applied to the data in memory
+		
+		Backends save them together if they can, e.g. with a single fsync.
+		
+		:param records: Change records in the order they were made, see `JournalRecord`
+		:type records: list[tuple]
+		:return: None
+		"""
+		for record in records:
+			self.saveChange(record)
+	
+	def delete(self) -> bool:
+		"""
+		Delete all the saved data
+		
+		:return: Whether any saved data was deleted
+		:rtype: bool
+		"""
+		raise NotImplementedError
+	
+	def close(self) -> None:
+		"""Release the resources, e.g. the database connection"""
+
+
+class PickleBackend(StorageBackend):
+	"""
+	Pickles `House.total_revenue` and `House.houses_table` into `data/houses`,
+	and `House.total_tickets` and `House.tickets_table` into `data/tickets`
+	
+	Each change is appended to `data/journal` instead of saving all the data again,
+	so the cost of saving a change does not grow with the number of tickets.
+	The journal is replayed on top of the snapshot by load().
+	When the journal has more than `JOURNAL_COMPACTION_THRESHOLD` records,
+	it is compacted into a new snapshot.
+	
+	A snapshot is written to `<file>.tmp` and fsynced, then the snapshot file is renamed to `<file>.prev`,
+	and `<file>.tmp` is renamed to the snapshot file, so a power cut never leaves a half-written snapshot.
+	If the snapshot file is missing or corrupted (see readSnapshotFile()), `<file>.prev` is loaded instead.
+	The journal of the previous snapshot is also kept in `data/journal.prev`, and replayed with it.
+	
+	`data/tickets` is only written if the tickets changed since it was last written,
+	the houses snapshot records the generation of the tickets snapshot it goes with.
+	
+	The seats are not pickled with the houses, they are in `data/seats`, a memory-mapped `SeatStateFile`
+	written with each snapshot (and `data/seats.prev`, like the other snapshot files).
+	A house only reads its seats from the file when they are first needed, see House.loadSeats().
+	The seats changed by the change records are written to the file in place after the records are in the journal.
+	"""
+	
+	name: str = 'PICKLE'
+	
+	def __init__(self, directory: str) -> None:
+		self.directory: str = directory
+		self.journal_generation: int = 0  # The journal belongs to the snapshot with the same generation
+		self.journal_length: int = 0
+		self.journal_path: str = self.getPath('journal')  # `data/journal.prev` if the previous snapshot was loaded
+		self.corrupted_paths: set[str] = set()  # Corrupted snapshot files found by load()
+		# Files newer than the loaded snapshot, which go with no snapshot that can be loaded, found by load()
+		self.stale_paths: set[str] = set()
+		self.tickets_generation: int = 0
+		# The TicketStore, its version and `House.total_tickets` when the tickets snapshot was written
+		self.saved_tickets: Optional[tuple[TicketStore, int, int]] = None
+		self.seat_file: SeatStateFile = SeatStateFile(self.getPath('seats'))
+	
+	def getPath(self, filename: str) -> str:
+		"""Returns the full path of a file of the backend"""
+		full_path: str = path.join(self.directory, filename)
+		logger.debug("Full path = %s", full_path)
+		return full_path
+	
+	def save(self, report: Reporter = logReport) -> None:
+		report("Reaching the data folder", "正在尋找 data 資料夾")
+		if not path.isdir(self.directory):
+			report("No data folder, creating one", "無 data 資料夾，正在創建")
+			makedirs(self.directory)
+		
+		self.journal_generation += 1
+		
+		report("Writing seats data", "正在寫入座位資料")
+		writeSeatStateFile(self.getPath('seats.tmp'), House.houses_table, self.journal_generation)
+		filenames: list[str] = ['seats']
+		if self.ticketsChanged():
+			report("Writing tickets data", "正在寫入電影票資料")
+			self.tickets_generation = self.journal_generation
+			data: list[int | TicketStore] = [House.total_tickets, House.tickets_table, self.tickets_generation]
+			writeSnapshotFile(self.getPath('tickets.tmp'), data)
+			filenames.append('tickets')
+		else:
+			report("Tickets data unchanged", "電影票資料沒有更改")
+		
+		report("Writing houses data", "正在寫入電影院資料")
+		data: list[int | dict] = [House.total_revenue, House.houses_table, House.n_House, self.journal_generation,
+		                          self.tickets_generation]
+		writeSnapshotFile(self.getPath('houses.tmp'), data, SeatlessPickler)
+		filenames.append('houses')  # Last, as it records the generations of the others
+		
+		# The seats of every house have been read by writeSeatStateFile(), and a mapped file cannot be replaced on Windows
+		self.closeSeatFile()
+		# The previous snapshot is kept, unless it is corrupted
+		for filename in filenames:
+			full_path: str = self.getPath(filename)
+			if path.exists(full_path):
+				if full_path in self.corrupted_paths:
+					replace(full_path, full_path + '.corrupted')
+				elif full_path in self.stale_paths:
+					remove(full_path)
+				else:
+					replace(full_path, full_path + '.prev')
+			replace(full_path + '.tmp', full_path)
+		self.corrupted_paths.clear()
+		fsyncDirectory(self.directory)
+		if 'tickets' in filenames:
+			self.saved_tickets = (House.tickets_table, House.tickets_table.version, House.total_tickets)
+		self.seat_file = SeatStateFile(self.getPath('seats'))
+		self.seat_file.open()
+		
+		# The journal goes with the previous snapshot now, unless the previous snapshot was loaded with its journal.
+		# The new journal is not fsynced, it is fsynced with the first record by saveChanges().
+		# If it is lost, the old journal does not belong to the new snapshot, so it is ignored by load()
+		report("Restarting the journal", "正在重設更改日誌")
+		journal_path: str = self.getPath('journal')
+		if self.journal_path == journal_path and path.exists(journal_path):
+			replace(journal_path, journal_path + '.prev')
+		with open(journal_path, 'wb') as file:
+			dump(('BEGIN', self.journal_generation), file)
+		self.journal_path = journal_path
+		self.journal_length = 0
+		self.stale_paths.clear()
+	
+	def ticketsChanged(self) -> bool:
+		"""Returns whether the tickets changed since the tickets snapshot was written"""
+		if self.saved_tickets is None:
+			return True
+		tickets_table, version, total_tickets = self.saved_tickets
+		saved_state: tuple[int, int] = (version, total_tickets)
+		return tickets_table is not House.tickets_table or saved_state != (tickets_table.version, House.total_tickets)
+	
+	def readSnapshots(self, filename: str, report: Reporter) -> Iterator[list]:
+		"""Yields the valid snapshots of a file, the snapshot file then the previous snapshot file"""
+		for full_path in (self.getPath(filename), self.getPath(filename + '.prev')):
+			try:
+				yield readSnapshotFile(full_path)
+			except FileNotFoundError:
+				continue
+			except SnapshotCorrupted as error:
+				logger.error("Corrupted snapshot: %s", error)
+				report(f"ERROR: {error}", f"錯誤：{path.basename(full_path)} {error.chinese_msg}")
+				self.corrupted_paths.add(full_path)
+	
+	def load(self, report: Reporter = logReport) -> bool:
+		self.corrupted_paths.clear()
+		self.stale_paths.clear()
+		self.saved_tickets = None
+		self.closeSeatFile()  # The data in memory is kept if there is no saved data
+		report("Finding houses data", "正在尋找電影院資料")
+		houses_snapshots: Iterator[list] = self.readSnapshots('houses', report)
+		houses_data: Optional[list] = next(houses_snapshots, None)
+		report("Finding tickets data", "正在尋找電影票資料")
+		tickets_snapshots: Iterator[list] = self.readSnapshots('tickets', report)
+		tickets_data: Optional[list] = next(tickets_snapshots, None)
+		
+		if houses_data is not None and tickets_data is not None and not matchSnapshots(houses_data, tickets_data):
+			# The power was cut between replacing the two snapshot files, or one of them is corrupted
+			logger.warning("Houses snapshot does not go with tickets snapshot")
+			houses_candidates: list[list] = [houses_data, *houses_snapshots]
+			tickets_candidates: list[list] = [tickets_data, *tickets_snapshots]
+			matched: Optional[tuple[list, list]] = next(((houses, tickets) for houses in houses_candidates
+			                                             for tickets in tickets_candidates
+			                                             if matchSnapshots(houses, tickets)), None)
+			if matched is not None:
+				houses_data, tickets_data = matched
+			else:
+				logger.critical("No houses and tickets snapshots which go together, loading the latest ones")
+		
+		if houses_data is not None:
+			House.total_revenue = houses_data[0]
+			House.houses_table = houses_data[1]
+			House.n_House = houses_data[2]
+			House.n_House = len(House.houses_table)
+			# Houses data saved by older versions does not have a journal generation
+			self.journal_generation = houses_data[3] if len(houses_data) > 3 else 0
+			self.tickets_generation = houses_data[4] if len(houses_data) > 4 else 0
+			report("Houses data loaded", "已載入電影院資料")
+		else:
+			report("No houses data found", "無電影院資料")
+		
+		if tickets_data is not None:
+			House.total_tickets = tickets_data[0]
+			House.tickets_table = tickets_data[1]
+			if isinstance(House.tickets_table, dict):  # Tickets data saved by older versions
+				House.tickets_table = House.tickets_table.values()
+			if not isinstance(House.tickets_table, TicketStore):
+				House.tickets_table = TicketStore.fromTickets(House.tickets_table)
+			House.rebuildTicketIndexes()
+			report("Tickets data loaded", "已載入電影票資料")
+		else:
+			report("No tickets data found", "無電影票資料")
+		found: bool = houses_data is not None or tickets_data is not None
+		
+		# Houses data saved by older versions has the seats in it, and no seat-state file
+		report("Finding seats data", "正在尋找座位資料")
+		for filename in ('seats', 'seats.prev'):
+			self.seat_file = SeatStateFile(self.getPath(filename))
+			if self.seat_file.open() and self.seat_file.generation == self.journal_generation:
+				if filename == 'seats.prev' and path.exists(self.getPath('seats')):
+					self.stale_paths.add(self.getPath('seats'))
+				report("Seats data mapped", "已映射座位資料")
+				break
+			self.seat_file.close()
+		House.seat_file = self.seat_file
+		
+		report("Replaying the journal", "正在重播更改日誌")
+		n_records: int = self.replayJournal()
+		report(f"{n_records} journal record{'s' if n_records > 1 else ''} replayed",
+		       f"已重播{n_records}項更改日誌")
+		return found or n_records > 0
+	
+	def saveChange(self, record: JournalRecord) -> None:
+		"""Append a single change record to the journal, see `PickleBackend`"""
+		self.saveChanges([record])
+	
+	def saveChanges(self, records: list[JournalRecord]) -> None:
+		"""Append change records to the journal with a single fsync, then write their seats, see `PickleBackend`"""
+		logger.info("Writing %s journal record(s): %s", len(records), ', '.join(record[0] for record in records))
+		
+		if not path.isdir(self.directory):
+			makedirs(self.directory)
+		
+		with open(self.journal_path, 'ab') as file:
+			if file.tell() == 0:  # New journal
+				dump(('BEGIN', self.journal_generation), file)
+			for record in records:
+				dump(record, file)
+			file.flush()
+			fsync(file.fileno())
+		self.journal_length += len(records)
+		self.seat_file.writeRecords(records)  # Never before the records are in the journal
+		
+		if self.journal_length >= JOURNAL_COMPACTION_THRESHOLD:
+			logger.info("Compacting the journal into a new snapshot")
+			self.save()
+	
+	def replayJournal(self) -> int:
+		"""
+		Replay the journal of the loaded snapshot on top of it
+		
+		It is `data/journal`, or `data/journal.prev` if the previous snapshot was loaded.
+		A journal written for another snapshot (e.g. the program stopped
+		after writing a snapshot but before restarting the journal) is not replayed,
+		and `data/journal` is kept as `data/journal.prev` if neither belongs to the loaded snapshot.
+		A truncated or garbled record at the end of the journal
+		(e.g. the power is cut when writing the record) is also ignored.
+		The ignored part is cut off, so the records appended later by saveChanges() can be replayed.
+		
+		:return: Number of records replayed
+		:rtype: int
+		"""
+		journal_path: str = self.getPath('journal')
+		self.journal_path = journal_path
+		self.journal_length = 0
+		for full_path in (journal_path, journal_path + '.prev'):
+			try:
+				with open(full_path, 'r+b') as file:
+					try:
+						header: JournalRecord = load(file)
+					except Exception:  # Unpickling broken data can raise almost anything
+						header = ()
+					if header != ('BEGIN', self.journal_generation):
+						logger.info("Journal %s %s does not belong to snapshot %s, ignored",
+						            path.basename(full_path), header, self.journal_generation)
+						continue
+					self.journal_length = self.replayRecords(file)
+			except FileNotFoundError:
+				logger.info("No %s", path.basename(full_path))
+				continue
+			self.journal_path = full_path
+			if full_path != journal_path and path.exists(journal_path):
+				self.stale_paths.add(journal_path)
+			return self.journal_length
+		
+		if path.exists(journal_path):  # It may belong to the previous snapshot
+			replace(journal_path, journal_path + '.prev')
+		return 0
+	
+	@staticmethod
+	def replayRecords(file: BinaryIO) -> int:
+		"""
+		Replay the records of a journal after its header, and cut off a truncated or garbled record at the end
+		
+		:param file: The journal, opened for reading and writing
+		:type file: BinaryIO
+		:return: Number of records replayed
+		:rtype: int
+		"""
+		n_records: int = 0
+		while True:
+			good_offset: int = file.tell()  # The end of the last complete record
+			try:
+				record: JournalRecord = load(file)
+			except EOFError:
+				break
+			except Exception as error:  # Unpickling broken data can raise almost anything
+				logger.warning("Truncated journal record, ignored: %r", error)
+				break
+			applyJournalRecord(record)
+			n_records += 1
+		
+		file.seek(0, os.SEEK_END)
+		if file.tell() > good_offset:
+			logger.warning("Cutting the journal from %s bytes to %s bytes", file.tell(), good_offset)
+			file.truncate(good_offset)
+			file.flush()
+			fsync(file.fileno())
+		return n_records
+	
+	def closeSeatFile(self) -> None:
+		"""Read the seats of the houses which have not read them yet, then unmap the seat-state file"""
+		for house in House.houses_table.values():
+			house.loadSeats()
+		if House.seat_file is self.seat_file:
+			House.seat_file = None
+		self.seat_file.close()
+	
+	def delete(self) -> bool:
+		self.closeSeatFile()
+		self.journal_generation = 0
+		self.journal_length = 0
+		self.journal_path = self.getPath('journal')
+		self.tickets_generation = 0
+		self.saved_tickets = None
+		deleted: bool = False
+		for filename in ('houses', 'tickets', 'seats', 'journal', 'houses.prev', 'tickets.prev', 'seats.prev',
+		                 'journal.prev', 'houses.tmp', 'tickets.tmp', 'seats.tmp', 'houses.corrupted', 'tickets.corrupted'):
+			try:
+				remove(self.getPath(filename))
+			except FileNotFoundError:
+				logger.info("No saved %s", filename)
+				continue
+			logger.info("Deleted saved %s", filename)
+			deleted = True
+		return deleted
+	
+	def close(self) -> None:
+		self.closeSeatFile()
+
+
+class SQLiteBackend(StorageBackend):
+	"""
+	Stores the houses, seats and tickets data in an SQLite database, `data/data.sqlite3`
+	
+	Only the seats which are not empty are stored.
+	A change (e.g. selling a ticket) only updates the changed rows in a single transaction,
+	and the database is in WAL mode, so saving a change costs the same however many tickets there are.
+	The SQL statements are constants, so they are prepared once and reused by the statement cache of sqlite3.
+	"""
+	
+	name: str = 'SQLITE'
+	
+	SCHEMA: str = """
+		CREATE TABLE IF NOT EXISTS totals (
+			name TEXT PRIMARY KEY,
+			value INTEGER NOT NULL
+		);
+		CREATE TABLE IF NOT EXISTS houses (
+			house_number INTEGER PRIMARY KEY,
+			n_row INTEGER NOT NULL,
+			n_column INTEGER NOT NULL,
+			movie TEXT NOT NULL,
+			house_revenue INTEGER NOT NULL,
+			adult_price INTEGER NOT NULL,
+			child_price INTEGER NOT NULL
+		);
+		CREATE TABLE IF NOT EXISTS seats (
+			house_number INTEGER NOT NULL,
+			row_index INTEGER NOT NULL,
+			column_index INTEGER NOT NULL,
+			seat_status INTEGER NOT NULL,
+			PRIMARY KEY (house_number, row_index, column_index)
+		) WITHOUT ROWID;
+		CREATE TABLE IF NOT EXISTS tickets (
+			ticket_index INTEGER PRIMARY KEY,
+			timestamp INTEGER NOT NULL,
+			house_number INTEGER NOT NULL,
+			movie TEXT NOT NULL,
+			row_index INTEGER NOT NULL,
+			column_index INTEGER NOT NULL,
+			price INTEGER NOT NULL
+		);
+		CREATE INDEX IF NOT EXISTS tickets_house_number ON tickets (house_number);
+	"""
+	
+	UPSERT_TOTAL: str = "INSERT OR REPLACE INTO totals (name, value) VALUES (?, ?)"
+	UPSERT_HOUSE: str = ("INSERT OR REPLACE INTO houses (house_number, n_row, n_column, movie, house_revenue, "
+	                     "adult_price, child_price) VALUES (?, ?, ?, ?, ?, ?, ?)")
+	UPDATE_HOUSE_REVENUE: str = "UPDATE houses SET house_revenue = ? WHERE house_number = ?"
+	UPSERT_SEAT: str = ("INSERT OR REPLACE INTO seats (house_number, row_index, column_index, seat_status) "
+	                    "VALUES (?, ?, ?, ?)")
+	DELETE_SEAT: str = "DELETE FROM seats WHERE house_number = ? AND row_index = ? AND column_index = ?"
+	INSERT_TICKET: str = ("INSERT OR REPLACE INTO tickets (ticket_index, timestamp, house_number, movie, "
+	                      "row_index, column_index, price) VALUES (?, ?, ?, ?, ?, ?, ?)")
+	SELECT_TICKET_SEAT: str = "SELECT house_number, row_index, column_index FROM tickets WHERE ticket_index = ?"
+	DELETE_TICKET: str = "DELETE FROM tickets WHERE ticket_index = ?"
+	
+	def __init__(self, full_path: str) -> None:
+		self.full_path: str = full_path
+		self.connection: Optional[sqlite3.Connection] = None
+	
+	def connect(self) -> sqlite3.Connection:
+		"""Returns the connection to the database, the database is created if it does not exist"""
+		if self.connection is None:
+			logger.debug("Full path = %s", self.full_path)
+			makedirs(path.dirname(self.full_path), exist_ok=True)
+			# The connection is used by the persistence worker thread, one thread at a time (see utils.state_lock)
+			self.connection = sqlite3.connect(self.full_path, check_same_thread=False)
+			self.connection.execute("PRAGMA journal_mode = WAL")
+			self.connection.execute("PRAGMA synchronous = FULL")  # A committed sale must survive a power cut
+			with self.connection:
+				self.connection.executescript(self.SCHEMA)
+		return self.connection
+	
+	@staticmethod
+	def houseRow(house: House) -> tuple[int, int, int, str, int, int, int]:
+		"""Returns the row of a house in the houses table"""
+		return (house.house_number, house.n_row, house.n_column, house.movie, house.house_revenue,
+		        house.adult_price, house.child_price)
+	
+	@staticmethod
+	def ticketRow(ticket: Ticket) -> tuple[int, int, int, str, int, int, int]:
+		"""Returns the row of a ticket in the tickets table"""
+		return (ticket.index, ticket.timestamp, ticket.house_number, ticket.movie,
+		        ticket.row_index, ticket.column_index, ticket.price)
+	
+	def saveTotals(self, connection: sqlite3.Connection) -> None:
+		"""Save `House.total_revenue` and `House.total_tickets`, in the transaction of the caller"""
+		connection.executemany(self.UPSERT_TOTAL, (('total_revenue', House.total_revenue),
+		                                           ('total_tickets', House.total_tickets)))
+	
+	def saveSeat(self, connection: sqlite3.Connection, house_number: int, row_index: int, column_index: int) -> None:
+		"""Save the status of a seat in memory, in the transaction of the caller"""
+		house: Optional[House] = House.houses_table.get(house_number)
+		if house is None:
+			return
+		seat_status: int = house.seating_plan.get(row_index, column_index)
+		if seat_status:
+			connection.execute(self.UPSERT_SEAT, (house_number, row_index, column_index, seat_status))
+		else:
+			connection.execute(self.DELETE_SEAT, (house_number, row_index, column_index))
+	
+	def saveHouseRevenue(self, connection: sqlite3.Connection, house_number: int) -> None:
+		"""Save the revenue of a house in memory, in the transaction of the caller"""
+		house: Optional[House] = House.houses_table.get(house_number)
+		if house is not None:
+			connection.execute(self.UPDATE_HOUSE_REVENUE, (house.house_revenue, house_number))
+	
+	def save(self, report: Reporter = logReport) -> None:
+		report("Writing data to the database", "正在寫入資料庫")
+		connection: sqlite3.Connection = self.connect()
+		with connection:
+			connection.execute("DELETE FROM houses")
+			connection.execute("DELETE FROM seats")
+			connection.execute("DELETE FROM tickets")
+			self.saveTotals(connection)
+			connection.executemany(self.UPSERT_HOUSE, map(self.houseRow, House.houses_table.values()))
+			for house in House.houses_table.values():
+				seats: bytearray = house.seating_plan.seats
+				connection.executemany(self.UPSERT_SEAT, (
+					(house.house_number, *divmod(index, house.n_column), seats[index])
+					for index in range(house.n_seat) if seats[index]
+				))
+			connection.executemany(self.INSERT_TICKET, map(self.ticketRow, House.tickets_table.values()))
+	
+	def load(self, report: Reporter = logReport) -> bool:
+		report("Finding the database", "正在尋找資料庫")
+		if not path.exists(self.full_path):
+			report("No database found", "無資料庫")
+			return False
+		connection: sqlite3.Connection = self.connect()
+		
+		report("Reading houses data", "正在讀取電影院資料")
+		totals: dict[str, int] = dict(connection.execute("SELECT name, value FROM totals"))
+		House.total_revenue = totals.get('total_revenue', 0)
+		House.total_tickets = totals.get('total_tickets', 0)
+		house_rows: list[tuple] = connection.execute("SELECT * FROM houses ORDER BY house_number").fetchall()
+		seat_maps: dict[int, SeatMap] = {house_number: SeatMap(n_row, n_column)
+		                                 for house_number, n_row, n_column, *_ in house_rows}
+		for house_number, row_index, column_index, seat_status in connection.execute("SELECT * FROM seats"):
+			if house_number in seat_maps:
+				seat_maps[house_number].set(row_index, column_index, seat_status)
+		houses_table: dict[int, House] = {}
+		for house_number, n_row, n_column, movie, house_revenue, adult_price, child_price in house_rows:
+			house: House = House.__new__(House)
+			house.__setstate__({
+				'n_row': n_row, 'n_column': n_column, 'n_seat': n_row * n_column,
+				'_seating_plan': seat_maps[house_number], 'house_number': house_number, 'movie': movie,
+				'house_revenue': house_revenue, 'adult_price': adult_price, 'child_price': child_price,
+			})
+			houses_table[house_number] = house
+		House.houses_table = houses_table
+		House.n_House = len(House.houses_table)
+		report("Houses data loaded", "已載入電影院資料")
+		
+		report("Reading tickets data", "正在讀取電影票資料")
+		House.tickets_table = TicketStore.fromTickets(
+			Ticket(*row) for row in connection.execute("SELECT * FROM tickets ORDER BY ticket_index")
+		)
+		House.rebuildTicketIndexes()
+		report("Tickets data loaded", "已載入電影票資料")
+		return True
+	
+	def saveChange(self, record: JournalRecord) -> None:
+		"""Save a single change by updating only the changed rows, see `SQLiteBackend`"""
+		self.saveChanges([record])
+	
+	def saveChanges(self, records: list[JournalRecord]) -> None:
+		"""Save changes by updating only the changed rows, in a single transaction"""
+		logger.info("Saving %s change(s): %s", len(records), ', '.join(record[0] for record in records))
+		connection: sqlite3.Connection = self.connect()
+		with connection:
+			for record in records:
+				self.applyChange(connection, record)
+			self.saveTotals(connection)
+	
+	def applyChange(self, connection: sqlite3.Connection, record: JournalRecord) -> None:
+		"""Update the rows changed by a change record, in the transaction of the caller"""
+		match record:
+			case ('SELL', tickets):
+				for ticket in tickets:
+					ticket = Ticket.fromTuple(ticket)
+					connection.execute(self.INSERT_TICKET, self.ticketRow(ticket))
+					self.saveSeat(connection, ticket.house_number, ticket.row_index, ticket.column_index)
+				for house_number in {Ticket.fromTuple(ticket).house_number for ticket in tickets}:
+					self.saveHouseRevenue(connection, house_number)
+			case ('REFUND' | 'DELETE', ticket_index, *_):
+				seat: Optional[tuple[int, int, int]] = connection.execute(
+					self.SELECT_TICKET_SEAT, (ticket_index,)).fetchone()
+				if seat is None:
+					return
+				connection.execute(self.DELETE_TICKET, (ticket_index,))
+				self.saveSeat(connection, *seat)
+				self.saveHouseRevenue(connection, seat[0])
+			case ('OVERRIDE', house_number, rects, seat_status):
+				for top, left, bottom, right in rects:
+					cells = ((house_number, row_index, column_index)
+					         for row_index in range(top, bottom + 1) for column_index in range(left, right + 1))
+					if seat_status:
+						connection.executemany(self.UPSERT_SEAT, ((*cell, seat_status) for cell in cells))
+					else:
+						connection.executemany(self.DELETE_SEAT, cells)
+			case _:
+				logger.warning("Unknown change record: %s", record[0])
+	
+	def delete(self) -> bool:
+		self.close()
+		deleted: bool = False
+		for suffix in ('', '-wal', '-shm'):
+			try:
+				remove(self.full_path + suffix)
+			except FileNotFoundError:
+				continue
+			logger.info("Deleted %s", path.basename(self.full_path + suffix))
+			deleted = True
+		return deleted
+	
+	def close(self) -> None:
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
+
+
+storage_backends: dict[str, Callable[[], StorageBackend]] = {
+	'PICKLE': lambda: PickleBackend(getDataPath('')),
+	'SQLITE': lambda: SQLiteBackend(getDataPath('data.sqlite3')),
+}
+
+storage: Optional[StorageBackend] = None
+
+
+def getStorage() -> StorageBackend:
+	"""
+	Returns the storage backend selected by the 'storage_backend' setting, PICKLE if it is unknown
+	
+	:return: The storage backend
+	:rtype: StorageBackend
+	"""
+	global storage
+	
+	if storage is None:
+		backend_name: str = getSetting('storage_backend')
+		if backend_name not in storage_backends:
+			logger.warning("Unknown storage backend %s, using PICKLE", backend_name)
+			backend_name = 'PICKLE'
+		storage = storage_backends[backend_name]()
+		logger.info("Storage backend: %s", storage.name)
+	return storage
@@ -0,0 +1,328 @@
+"""Defines Ticket and TicketStore"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import compress
+from typing import Any, Iterable, Iterator, Optional, Self, Sequence
+
+# Timestamps are seconds since this (naive, local) time,
+# so converting them back to a time string does not depend on the time zone or the platform
+EPOCH: datetime = datetime(1970, 1, 1)
+
+
+def timestampNow() -> int:
+	"""Returns the timestamp of now"""
+	return timestampFromString(datetime.now().isoformat(timespec="seconds"))
+
+
+def timestampFromString(time: str) -> int:
+	"""
+	Returns the timestamp of an ISO format time string, e.g. '2023-09-09T01:06:02'
+
+	:param time: ISO format time string
+	:type time: str
+	:return: Timestamp
+	:rtype: int
+	"""
+	return int((datetime.fromisoformat(time) - EPOCH).total_seconds())
+
+
+def timestampToString(timestamp: int) -> str:
+	"""
+	Returns the ISO format time string of a timestamp, e.g. '2023-09-09T01:06:02'
+
+	:param timestamp: Timestamp
+	:type timestamp: int
+	:return: ISO format time string
+	:rtype: str
+	"""
+	return (EPOCH + timedelta(seconds=timestamp)).isoformat(timespec="seconds")
+
+
+class Ticket:
+	"""
+	A ticket
+
+	It unpacks (and can be indexed and compared) like the old 8-tuple ticket:
+		ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price = ticket
+
+	The ticket number (e.g. 'T00001') and the time string are not stored,
+	they are derived from the ticket index and the timestamp.
+	"""
+
+	__slots__ = ('index', 'timestamp', 'house_number', 'movie', 'row_index', 'column_index', 'price')
+
+	def __init__(self, index: int, timestamp: int, house_number: int, movie: str,
+	             row_index: int, column_index: int, price: int) -> None:
+		self.index: int = index
+		self.timestamp: int = timestamp
+		self.house_number: int = house_number
+		self.movie: str = movie
+		self.row_index: int = row_index
+		self.column_index: int = column_index
+		self.price: int = price
+
+	@classmethod
+	def fromTuple(cls, ticket: 'Sequence[Any] | Ticket') -> Self:
+		"""
+		Create a Ticket from an old 8-tuple ticket (or another Ticket)
+
+		:param ticket: (ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price)
+		:type ticket: tuple[int, str, str, int, str, int, int, int] | Ticket
+		:return: The ticket
+		:rtype: Ticket
+		"""
+		if isinstance(ticket, cls):
+			return ticket
+		ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price = ticket
+		return cls(ticket_index, timestampFromString(time), house_number, movie, row_index, column_index, price)
+
+	@property
+	def number(self) -> str:
+		"""Ticket number, e.g. 'T00001'"""
+		return f"T{self.index:0>5}"
+
+	@property
+	def time(self) -> str:
+		"""ISO format time string, e.g. '2023-09-09T01:06:02'"""
+		return timestampToString(self.timestamp)
+
+	def astuple(self) -> tuple[int, str, str, int, str, int, int, int]:
+		"""Returns the ticket as an old 8-tuple ticket"""
+		return (self.index, self.number, self.time, self.house_number, self.movie,
+		        self.row_index, self.column_index, self.price)
+
+	def __iter__(self) -> Iterator[Any]:
+		return iter(self.astuple())
+
+	def __len__(self) -> int:
+		return 8
+
+	def __getitem__(self, key: int | slice) -> Any:
+		return self.astuple()[key]
+
+	def __eq__(self, other: Any) -> bool:
+		if isinstance(other, (Ticket, tuple, list)):
+			return self.astuple() == tuple(other)
+		return NotImplemented
+
+	def __hash__(self) -> int:
+		return hash(self.astuple())
+
+	def __repr__(self) -> str:
+		return f"Ticket{self.astuple()}"
+
+	def __reduce__(self) -> tuple:
+		return Ticket, (self.index, self.timestamp, self.house_number, self.movie,
+		                self.row_index, self.column_index, self.price)
+
+
+class TicketStore:
+	"""
+	A columnar store of tickets, keyed by ticket index
+
+	Instead of one object per ticket, each field is stored in a parallel array,
+	and movie titles are stored once in a movie table.
+	Ticket indexes are stored in their own column in ascending order, so a ticket is found by binary search,
+	and the store only takes space for the tickets in it, not for every ticket index in between.
+	Removed tickets leave a hole (house number 0, as house numbers start from 1),
+	the holes are dropped by compact() once they are more than the active tickets.
+
+	It can be used like a dict of ticket index to Ticket (get, pop, items, values, `in` ...),
+	Ticket objects are created when they are read.
+	"""
+
+	def __init__(self) -> None:
+		self.indexes: array = array('q')
+		self.timestamps: array = array('q')
+		self.house_numbers: array = array('i')
+		self.movie_ids: array = array('i')
+		self.row_indexes: array = array('i')
+		self.column_indexes: array = array('i')
+		self.prices: array = array('i')
+		self.movies: list[str] = []
+		self.movie_table: dict[str, int] = {}
+		self.n_ticket: int = 0
+		self.version: int = 0  # Incremented on every change, so a saved copy can tell whether it is out of date
+
+	@classmethod
+	def fromTickets(cls, tickets: Iterable[Sequence[Any] | Ticket]) -> Self:
+		"""
+		Create a TicketStore from tickets (or old 8-tuple tickets) in the order of ticket index
+
+		:param tickets: Tickets
+		:type tickets: Iterable[Ticket]
+		:return: The TicketStore
+		:rtype: TicketStore
+		"""
+		store: Self = cls()
+		for old_ticket in tickets:
+			ticket: Ticket = Ticket.fromTuple(old_ticket)
+			store[ticket.index] = ticket
+		return store
+
+	def _position(self, ticket_index: int) -> int:
+		"""Returns the position of an active ticket, or -1 if there is no such ticket"""
+		position: int = bisect_left(self.indexes, ticket_index)
+		if position < len(self.indexes) and self.indexes[position] == ticket_index and self.house_numbers[position] != 0:
+			return position
+		return -1
+
+	def _movieId(self, movie: str) -> int:
+		"""Returns the id of the movie in the movie table, adds it if it is new"""
+		movie_id: Optional[int] = self.movie_table.get(movie)
+		if movie_id is None:
+			movie_id = len(self.movies)
+			self.movies.append(movie)
+			self.movie_table[movie] = movie_id
+		return movie_id
+
+	def _columns(self) -> tuple[array, ...]:
+		"""Returns all the columns"""
+		return (self.indexes, self.timestamps, self.house_numbers, self.movie_ids,
+		        self.row_indexes, self.column_indexes, self.prices)
+
+	def _ticketAt(self, position: int) -> Ticket:
+		return Ticket(self.indexes[position], self.timestamps[position], self.house_numbers[position],
+		              self.movies[self.movie_ids[position]], self.row_indexes[position],
+		              self.column_indexes[position], self.prices[position])
+
+	def get(self, ticket_index: int, default: Optional[Ticket] = None) -> Optional[Ticket]:
+		"""Returns the ticket with the given ticket index, or `default` if there is no such ticket"""
+		position: int = self._position(ticket_index)
+		if position == -1:
+			return default
+		return self._ticketAt(position)
+
+	def pop(self, ticket_index: int, default: Any = None) -> Any:
+		"""Remove the ticket with the given ticket index and returns it, or `default` if there is no such ticket"""
+		position: int = self._position(ticket_index)
+		if position == -1:
+			return default
+		ticket: Ticket = self._ticketAt(position)
+		self.house_numbers[position] = 0
+		self.n_ticket -= 1
+		self.version += 1
+		if len(self.indexes) > 2 * self.n_ticket:  # Compacted once holes are the majority, so it is amortised O(1)
+			self.compact()
+		return ticket
+
+	def keys(self) -> Iterator[int]:
+		"""Returns an iterator of active ticket indexes, in order"""
+		return iter(self)
+
+	def values(self) -> Iterator[Ticket]:
+		"""Returns an iterator of active tickets, in the order of ticket index"""
+		for position, house_number in enumerate(self.house_numbers):
+			if house_number != 0:
+				yield self._ticketAt(position)
+
+	def items(self) -> Iterator[tuple[int, Ticket]]:
+		"""Returns an iterator of (ticket index, ticket) of active tickets, in order"""
+		for ticket in self.values():
+			yield ticket.index, ticket
+
+	def __getitem__(self, ticket_index: int) -> Ticket:
+		position: int = self._position(ticket_index)
+		if position == -1:
+			raise KeyError(ticket_index)
+		return self._ticketAt(position)
+
+	def __setitem__(self, ticket_index: int, old_ticket: Sequence[Any] | Ticket) -> None:
+		ticket: Ticket = Ticket.fromTuple(old_ticket)
+		if ticket.index != ticket_index:
+			raise ValueError("Ticket index does not match the key")
+		if ticket.house_number <= 0:
+			raise ValueError("House number must be positive")
+		position: int = len(self.indexes)
+		if position and self.indexes[-1] >= ticket_index:  # Not a new ticket, which has the largest index
+			position = bisect_left(self.indexes, ticket_index)
+		if position == len(self.indexes) or self.indexes[position] != ticket_index:
+			for column in self._columns():
+				column.insert(position, 0)
+			self.indexes[position] = ticket_index
+		if self.house_numbers[position] == 0:
+			self.n_ticket += 1
+		self.timestamps[position] = ticket.timestamp
+		self.house_numbers[position] = ticket.house_number
+		self.movie_ids[position] = self._movieId(ticket.movie)
+		self.row_indexes[position] = ticket.row_index
+		self.column_indexes[position] = ticket.column_index
+		self.prices[position] = ticket.price
+		self.version += 1
+
+	def compact(self) -> int:
+		"""
+		Drop the holes left by removed tickets, so the store only takes space for the active tickets
+		
+		:return: Number of holes dropped
+		:rtype: int
+		"""
+		n_hole: int = len(self.indexes) - self.n_ticket
+		if not n_hole:
+			return 0
+		active: list[bool] = [house_number != 0 for house_number in self.house_numbers]
+		columns: list[array] = [array(column.typecode, compress(column, active)) for column in self._columns()]
+		(self.indexes, self.timestamps, self.house_numbers, self.movie_ids,
+		 self.row_indexes, self.column_indexes, self.prices) = columns
+		return n_hole
+	
+	def __delitem__(self, ticket_index: int) -> None:
+		if self.pop(ticket_index) is None:
+			raise KeyError(ticket_index)
+
+	def __contains__(self, ticket_index: Any) -> bool:
+		return isinstance(ticket_index, int) and self._position(ticket_index) != -1
+
+	def __iter__(self) -> Iterator[int]:
+		for position, house_number in enumerate(self.house_numbers):
+			if house_number != 0:
+				yield self.indexes[position]
+
+	def __len__(self) -> int:
+		return self.n_ticket
+
+	def __repr__(self) -> str:
+		return f"TicketStore({list(self.values())})"
+
+	def __reduce__(self) -> tuple:
+		return _restoreTicketStore, (None, self.n_ticket, self.movies,
+		                             *(column.tobytes() for column in self._columns()))
+
+
+def _restoreTicketStore(first_index: Optional[int], n_ticket: int, movies: list[str],
+                        *columns_data: bytes) -> TicketStore:
+	"""
+	Restore a pickled TicketStore
+
+	A TicketStore pickled by older versions has no ticket index column,
+	the ticket index of a ticket was its position plus `first_index`.
+	"""
+	store: TicketStore = TicketStore()
+	columns: tuple[array, ...] = store._columns()
+	if first_index is not None:
+		columns = columns[1:]
+	for column, data in zip(columns, columns_data):
+		column.frombytes(data)
+	if first_index is not None:
+		store.indexes.extend(range(first_index, first_index + len(store.house_numbers)))
+	store.movies = movies
+	store.movie_table = {movie: movie_id for movie_id, movie in enumerate(movies)}
+	store.n_ticket = n_ticket
+	store.compact()
+	return store
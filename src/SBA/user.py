@@ -15,17 +15,59 @@
 # limitations under the License.
 
 
-from datetime import datetime
-from logging import getLogger, Logger
+from logging import Logger
 from time import sleep
 from typing import Optional
 from webbrowser import open as openWebBrowser
 
 from .colour import Colour, column_colour, row_colour
-from .coorutils import CoordinateExpressionException, getCoorsFromCoorExpr
-from .house import House, Ticket
-from .language import inputLang, printLang
-from .utils import clearScreen, saveData
+from .coorutils import Coor, CoordinateExpressionException, getCoorsFromCoorExpr
+from .house import House, PurchaseTransaction, SeatNotAvailable, Ticket
+from .language import getMessage, inputLang, printLang, printMsg, registerMessages
+from .log import getModuleLogger
+from .render import drawSeatingPlanScreen
+from .utils import clearScreen, saveChange, state_lock
+
+logger: Logger = getModuleLogger(__name__)
+
+registerMessages({
+	'user.house_available': ("House {house_number}: {movie:<50} {count_colour}{n_available}{normal_colour}/{n_seat}",
+	                         "電影院{house_number}：{movie:<50} {count_colour}{n_available}{normal_colour}/{n_seat}"),
+	'user.house_playing': ("House {house_number} is now playing: {movie}",
+	                       "電影院{house_number} 正在播映：{movie}"),
+	'user.n_available': ("Number of available seat{s}: {n_available}/{n_seat}",
+	                     "可選座位數：{n_available}/{n_seat}"),
+	'user.prices': ("Price: ${adult_price}\nChild price: ${child_price}",
+	                "成人票價：${adult_price}\n兒童票價：${child_price}"),
+	'user.adult_tickets_selected': ("You had selected {n_ticket} adult ticket{s}",
+	                                "你已選擇了{n_ticket}張成人票"),
+	'user.payment': ("You have selected {n_ticket} seat{s}\n"
+	                 "Number of adult{s_adult}(${adult_price}): {n_adult}\n"
+	                 "Number of child{s_child}(${child_price}): {n_child}\n"
+	                 "Payment: ${total_adult_price}(adult) + ${total_child_price}(child) = ${total_price}",
+	                 "你已選擇了{n_ticket}張電影票\n"
+	                 "成人票（${adult_price}）：{n_adult}張\n"
+	                 "兒童票（${child_price}）：{n_child}張\n"
+	                 "應繳款項：${total_adult_price}（成人） + ${total_child_price}（兒童） = ${total_price}"),
+	'user.select_seats_header': ("CINEMA KIOSK SYSTEM\n\n\n\n{error_colour}{error}{normal_colour}\n\n\n\n",
+	                             "電影售票系統\n\n\n\n{error_colour}{error}{normal_colour}\n\n\n\n"),
+	'user.select_seats': ("Please enter (part of) the coordinate, You have brought {n_ticket} seat{s}, "
+	                      "selected {n_selected} seat{s_selected} and remains {n_remaining} seat{s_remaining} to select "
+	                      "(Or enter * for the best available seats, or hit Enter to go back to the menu)\n->",
+	                      "請輸入（部分）選擇的座位編號，"
+	                      "你購買了{n_ticket}個座位，你選擇了{n_selected}個座位，你還需要選擇{n_remaining}個座位"
+	                      "（或輸入 * 以選擇最佳的可選座位，或按 Enter 以返回主頁面）\n->"),
+	'user.ticket': ("{ticket_no:<6} @{time} House {house_no:<2} -- {movie:<25} ~ "
+	                "Seat<{row_colour}{row}{column_colour}{column}{normal_colour}> ${price}",
+	                "{ticket_no:<6} @{time} 電影院{house_no:<2} -- {movie:<25} ~ "
+	                "座位<{row_colour}{row}{column_colour}{column}{normal_colour}> ${price}"),
+	'user.bought_ticket': ("{ticket_no:<6} @{time}: House {house_no:<2} -- {movie:<25} ~"
+	                       "Seat<{row_colour}{row}{column_colour}{column}{normal_colour}> ${price}\n",
+	                       "{ticket_no:<6} @{time}: 電影院{house_no:<2} -- {movie:<25} ~"
+	                       "座位<{row_colour}{row}{column_colour}{column}{normal_colour}> ${price}\n"),
+	'user.logout_countdown': ("\rYou will be logged out after {second} seconds...",
+	                          "\r你將會於{second}秒後登出......"),
+})
 
 message: str = ""
 
@@ -41,7 +83,6 @@ def buyTicket() -> None:
 	
 	global message
 	
-	logger: Logger = getLogger("buyTicket")
 	logger.info("User Mode 1: Buy a ticket")
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n\n\n\n\n", "電影售票系統\n\n\n\n\n\n\n")
@@ -49,12 +90,9 @@ def buyTicket() -> None:
 	total_available_house_count: int = 0
 	for house in House.houses_table.values():
 		if house.movie and house.n_available != 0:
-			printLang(f"House {house.house_number}: {house.movie:<50} "
-			          f"{Colour.GREEN if house.n_available > 0 else Colour.RED}"
-			          f"{house.n_available}{normal_colour}/{house.n_seat}",
-			          f"電影院{house.house_number}：{house.movie:<50} "
-			          f"{Colour.GREEN if house.n_available > 0 else Colour.RED}"
-			          f"{house.n_available}{normal_colour}/{house.n_seat}")
+			printMsg('user.house_available', house_number=house.house_number, movie=house.movie,
+			         count_colour=Colour.GREEN if house.n_available > 0 else Colour.RED,
+			         n_available=house.n_available, normal_colour=normal_colour, n_seat=house.n_seat)
 			total_available_house_count += 1
 	if total_available_house_count == 0:
 		if language == "ENGLISH":
@@ -93,7 +131,7 @@ def buyTicket() -> None:
 			message = "錯誤：此電影院暫不開放"
 		logger.info("House not open, going back to the user menu")
 		return
-	logger.info(f"User selected house {house_num}")
+	logger.info("User selected house %s", house_num)
 	
 	# Get number of adult tickets
 	get_adult_ticket_number_message: str = ''
@@ -101,13 +139,10 @@ def buyTicket() -> None:
 		clearScreen()
 		printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
 		print(Colour.RED + get_adult_ticket_number_message + normal_colour + "\n\n\n")
-		printLang(f"House {house.house_number} is now playing: {house.movie}",
-		          f"電影院{house.house_number} 正在播映：{house.movie}")
-		printLang(f"Number of available seat{'s' if house.n_available > 1 else ''}: "
-		          f"{house.n_available}/{house.n_seat}",
-		          f"可選座位數：{house.n_available}/{house.n_seat}")
-		printLang(f"Price: ${house.adult_price}", f"成人票價：${house.adult_price}")
-		printLang(f"Child price: ${house.child_price}", f"兒童票價：${house.child_price}")
+		printMsg('user.house_playing', house_number=house.house_number, movie=house.movie)
+		printMsg('user.n_available', s='s' if house.n_available > 1 else '',
+		         n_available=house.n_available, n_seat=house.n_seat)
+		printMsg('user.prices', adult_price=house.adult_price, child_price=house.child_price)
 		
 		house.printSeatingPlan()
 		
@@ -135,13 +170,11 @@ def buyTicket() -> None:
 		clearScreen()
 		printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
 		print(Colour.RED + get_child_ticket_number_message + normal_colour + "\n\n\n")
-		printLang(f"House {house.house_number} is now playing: {house.movie}",
-		          f"電影院{house.house_number} 正在播映：{house.movie}")
-		printLang(f"Price: ${house.adult_price}", f"成人票價：${house.adult_price}")
-		printLang(f"Child price: ${house.child_price}", f"兒童票價：${house.child_price}")
+		printMsg('user.house_playing', house_number=house.house_number, movie=house.movie)
+		printMsg('user.prices', adult_price=house.adult_price, child_price=house.child_price)
 		house.printSeatingPlan()
 		
-		printLang(f"You had selected {adult_ticket_count} adult ticket{'s' if adult_ticket_count > 1 else ''}")
+		printMsg('user.adult_tickets_selected', n_ticket=adult_ticket_count, s='s' if adult_ticket_count > 1 else '')
 		printLang("Please enter the number of child ticket: ", "請輸入兒童票的數量：")
 		child_ticket_count_str: str = input('->').strip().replace(' ', '')
 		if not child_ticket_count_str.isdecimal():
@@ -168,21 +201,15 @@ def buyTicket() -> None:
 	# Confirm
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
-	printLang(f"House {house.house_number} is now playing: {house.movie}",
-	          f"電影院{house.house_number} 正在播映：{house.movie}")
+	printMsg('user.house_playing', house_number=house.house_number, movie=house.movie)
 	house.printSeatingPlan()
 	total_adult_price: int = house.adult_price * adult_ticket_count
 	total_child_price: int = house.child_price * child_ticket_count
 	total_price: int = total_adult_price + total_child_price
-	printLang(f"You have selected {total_ticket_number} seat{'s' if total_ticket_number else ''}\n"
-	          f"Number of adult{'s' if adult_ticket_count > 1 else ''}(${house.adult_price}): {adult_ticket_count}\n"
-	          f"Number of child{'ren' if child_ticket_count > 1 else ''}(${house.child_price}): {child_ticket_count}\n"
-	          f"Payment: ${total_adult_price}(adult) + ${total_child_price}(child) = ${total_price}",
-	          f"你已選擇了{total_ticket_number}張電影票\n"
-	          f"成人票（${house.adult_price}）：{adult_ticket_count}張\n"
-	          f"兒童票（${house.child_price}）：{child_ticket_count}張\n"
-	          f"應繳款項：${total_adult_price}（成人） + ${total_child_price}（兒童） = ${total_price}"
-	          )
+	printMsg('user.payment', n_ticket=total_ticket_number, s='s' if total_ticket_number > 1 else '',
+	         s_adult='s' if adult_ticket_count > 1 else '', adult_price=house.adult_price, n_adult=adult_ticket_count,
+	         s_child='ren' if child_ticket_count > 1 else '', child_price=house.child_price, n_child=child_ticket_count,
+	         total_adult_price=total_adult_price, total_child_price=total_child_price, total_price=total_price)
 	confirm: str = inputLang("Please confirm: [Y/n]\n", "請確認：[Y/n]\n").strip().upper()
 	if confirm != 'Y' and confirm != '':
 		if language == 'ENGLISH':
@@ -192,41 +219,50 @@ def buyTicket() -> None:
 		return
 	
 	# Select seat
+	payment: str = getMessage('user.payment', n_ticket=total_ticket_number, s='s' if total_ticket_number > 1 else '',
+	                          s_adult='s' if adult_ticket_count > 1 else '', adult_price=house.adult_price,
+	                          n_adult=adult_ticket_count, s_child='ren' if child_ticket_count > 1 else '',
+	                          child_price=house.child_price, n_child=child_ticket_count,
+	                          total_adult_price=total_adult_price, total_child_price=total_child_price,
+	                          total_price=total_price)
+	house_playing: str = getMessage('user.house_playing', house_number=house.house_number, movie=house.movie)
 	selected_seat_list: list[tuple[int, int]] = []
 	select_ticket_message: str = ''
 	while True:
-		clearScreen()
-		printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
-		print(Colour.RED + select_ticket_message + normal_colour + "\n\n\n")
-		printLang(f"House {house.house_number} is now playing: {house.movie}",
-		          f"電影院{house.house_number} 正在播映：{house.movie}")
-		house.printSeatingPlanWithSelectedSeat(selected_seat_list)
-		printLang(f"You have selected {total_ticket_number} seat{'s' if total_ticket_number else ''}\n"
-		          f"Number of adult{'s' if adult_ticket_count > 1 else ''}(${house.adult_price}): {adult_ticket_count}\n"
-		          f"Number of child{'ren' if child_ticket_count > 1 else ''}(${house.child_price}): {child_ticket_count}\n"
-		          f"Payment: ${total_adult_price}(adult) + ${total_child_price}(child) = ${total_price}",
-		          f"你已選擇了{total_ticket_number}張電影票\n"
-		          f"成人票（${house.adult_price}）：{adult_ticket_count}張\n"
-		          f"兒童票（${house.child_price}）：{child_ticket_count}張\n"
-		          f"應繳款項：${total_adult_price}（成人） + ${total_child_price}（兒童）= ${total_price}"
-		          )
+		# Only the changed seats are redrawn after the first round, see render.drawSeatingPlanScreen()
 		selected_seat_count: int = len(selected_seat_list)
-		coor_expr: str = inputLang("Please enter (part of) the coordinate, "
-		                           f"You have brought {total_ticket_number} "
-		                           f"seat{'s' if total_ticket_number > 1 else ''}, "
-		                           f"selected {selected_seat_count} seat{'s' if len(selected_seat_list) > 1 else ''} "
-		                           f"and remains {total_ticket_number-selected_seat_count} "
-		                           f"seat{'s' if total_ticket_number-selected_seat_count > 1 else ''} to select "
-		                           "(Or hit Enter to go back to the menu)\n->",
-		                           "請輸入（部分）選擇的座位編號，"
-		                           f"你購買了{total_ticket_number}個座位，你選擇了{selected_seat_count}個座位，"
-		                           f"你還需要選擇{total_ticket_number-selected_seat_count}個座位"
-		                           "（或按 Enter 以返回主頁面）\n->").strip().replace(' ', '')
+		n_remaining_seat: int = total_ticket_number - selected_seat_count
+		header: str = getMessage('user.select_seats_header', error_colour=Colour.RED, error=select_ticket_message,
+		                         normal_colour=normal_colour) + house_playing + '\n'
+		footer: str = payment + '\n' + getMessage('user.select_seats', n_ticket=total_ticket_number,
+		                                          s='s' if total_ticket_number > 1 else '',
+		                                          n_selected=selected_seat_count,
+		                                          s_selected='s' if selected_seat_count > 1 else '',
+		                                          n_remaining=n_remaining_seat,
+		                                          s_remaining='s' if n_remaining_seat > 1 else '')
+		drawSeatingPlanScreen(house, header, footer, selected_seat_list)
+		coor_expr: str = input().strip().replace(' ', '')
 		
 		if coor_expr == '':
 			message = ''
 			return
 		
+		if coor_expr == '*':
+			best_seat_list: Optional[list[Coor]] = house.findBestSeats(total_ticket_number - selected_seat_count,
+			                                                           exclude=selected_seat_list)
+			if best_seat_list is None:
+				if language == 'ENGLISH':
+					select_ticket_message = (f"ERROR: No {total_ticket_number - selected_seat_count} adjacent seats "
+					                         "available, please select the seats yourself")
+				else:
+					select_ticket_message = (f"錯誤：沒有{total_ticket_number - selected_seat_count}個相連的可選座位，"
+					                         "請自行選擇座位")
+				continue
+			selected_seat_list.extend(best_seat_list)
+			selected_seat_list.sort()
+			logger.info("Best available seats selected: %s", best_seat_list)
+			break
+		
 		try:
 			selected_seat_list.extend(getCoorsFromCoorExpr(coor_expr, n_row=house.n_row, n_column=house.n_column))
 		except CoordinateExpressionException as error:
@@ -235,12 +271,12 @@ def buyTicket() -> None:
 			else:
 				select_ticket_message = f"錯誤：{error.chinese_msg}"
 			continue
-	
+		
 		# Remove repeated
 		selected_seat_list_no_repeat: set[tuple[int, int]] = set(selected_seat_list)
 		selected_seat_list: list[tuple[int, int]] = list(selected_seat_list_no_repeat)
 		selected_seat_list: list[tuple[int, int]] = sorted(selected_seat_list, key=lambda tup: tup)
-	
+		
 		if len(selected_seat_list) > total_ticket_number:
 			if language == 'ENGLISH':
 				message = "ERROR: Selected too many seats"
@@ -256,25 +292,19 @@ def buyTicket() -> None:
 				else:
 					message = f"錯誤：座位{row_index+1}{chr(column_index+65)}不供發售"
 				return  # Return instead of continue, as buyer can't deselect a selected seat
-	
+		
 		if len(selected_seat_list) == total_ticket_number:
 			break
 	
 	# Confirm
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
-	printLang(f"House {house.house_number} is now playing: {house.movie}",
-	          f"電影院{house.house_number} 正在播映：{house.movie}")
+	printMsg('user.house_playing', house_number=house.house_number, movie=house.movie)
 	house.printSeatingPlanWithSelectedSeat(selected_seat_list)
-	printLang(f"You have selected {total_ticket_number} seat{'s' if total_ticket_number else ''}\n"
-	          f"Number of adult{'s' if adult_ticket_count > 1 else ''}(${house.adult_price}): {adult_ticket_count}\n"
-	          f"Number of child{'ren' if child_ticket_count > 1 else ''}(${house.child_price}): {child_ticket_count}\n"
-	          f"Payment: ${total_adult_price}(adult) + ${total_child_price}(child) = ${total_price}",
-	          f"你已選擇了{total_ticket_number}張電影票\n"
-	          f"成人票（${house.adult_price}）：{adult_ticket_count}張\n"
-	          f"兒童票（${house.child_price}）：{child_ticket_count}張\n"
-	          f"應繳款項：${total_adult_price}（成人） + ${total_child_price}（兒童） = ${total_price}"
-	          )
+	printMsg('user.payment', n_ticket=total_ticket_number, s='s' if total_ticket_number > 1 else '',
+	         s_adult='s' if adult_ticket_count > 1 else '', adult_price=house.adult_price, n_adult=adult_ticket_count,
+	         s_child='ren' if child_ticket_count > 1 else '', child_price=house.child_price, n_child=child_ticket_count,
+	         total_adult_price=total_adult_price, total_child_price=total_child_price, total_price=total_price)
 	confirm: str = inputLang("Please confirm: [Y/n]\n", "請確認：[Y/n]\n").strip().upper()
 	if confirm != 'Y' and confirm != '':
 		if language == 'ENGLISH':
@@ -284,62 +314,35 @@ def buyTicket() -> None:
 		return
 	
 	# Buy
-	# Child
+	# Child tickets first, then adult tickets
+	transaction: PurchaseTransaction = house.beginPurchase()
+	for row_index, column_index in selected_seat_list[:child_ticket_count]:
+		transaction.stage(row_index, column_index, house.child_price)
+	for row_index, column_index in selected_seat_list[child_ticket_count:]:
+		transaction.stage(row_index, column_index, house.adult_price)
+	try:
+		with state_lock:
+			tickets: list[Ticket] = transaction.commit()
+	except SeatNotAvailable as error:
+		logger.info("Purchase failed: %s", error)
+		if language == 'ENGLISH':
+			message = f"ERROR: Seat {error.row_index + 1}{chr(error.column_index + 65)} is not available"
+		else:
+			message = f"錯誤：座位{error.row_index + 1}{chr(error.column_index + 65)}不供發售"
+		return
+	saveChange(('SELL', tuple(tickets)))
+	
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
-	printLang(f"House {house.house_number} is now playing: {house.movie}",
-	          f"電影院{house.house_number} 正在播映：{house.movie}")
+	printMsg('user.house_playing', house_number=house.house_number, movie=house.movie)
 	house.printSeatingPlanWithSelectedSeat(selected_seat_list)
 	printLang("Your ticket:", "你的電影票如下：")
-	for row_index, column_index in selected_seat_list[:child_ticket_count]:
-		house.seating_plan[row_index][column_index] = 1
-		House.total_tickets += 1
-		ticket_index: int = House.total_tickets
-		ticket_number: str = f"T{ticket_index:0>5}"
-		time: str = datetime.now().isoformat(timespec="seconds")
-		price: int = house.child_price
-		ticket: Ticket = (
-			ticket_index, ticket_number, time, house.house_number, house.movie, row_index, column_index, price
-		)
-		printLang(f"{ticket_number:<6} @{time}: "
-		          f"House {house.house_number:<2} -- {house.movie:<25} ~"
-		          f"Seat<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-		          f"${price}\n",
-		          f"{ticket_number:<6} @{time}: "
-		          f"電影院{house.house_number:<2} -- {house.movie:<25} ~"
-		          f"座位<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-		          f"${price}\n"
-		          )
-		House.tickets_table.append(ticket)
-		house.house_revenue += price
-		House.total_revenue += price
-		saveData()
-	# Adult
-	for row_index, column_index in selected_seat_list[child_ticket_count:]:
-		house.seating_plan[row_index][column_index] = 1
-		House.total_tickets += 1
-		ticket_index: int = House.total_tickets
-		ticket_number: str = f"T{ticket_index:0>5}"
-		time: str = datetime.now().isoformat(timespec="seconds")
-		price: int = house.adult_price
-		ticket: Ticket = (
-			ticket_index, ticket_number, time, house.house_number, house.movie, row_index, column_index, price
-		)
-		printLang(f"{ticket_number:<6} @{time}: "
-		          f"House {house.house_number:<2} -- {house.movie:<25} ~"
-		          f"Seat<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-		          f"${price}\n",
-		          f"{ticket_number:<6} @{time}: "
-		          f"電影院{house.house_number:<2} -- {house.movie:<25} ~"
-		          f"座位<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-		          f"${price}\n"
-		          )
-		House.tickets_table.append(ticket)
-		house.house_revenue += price
-		House.total_revenue += price
-		saveData()
+	for ticket in tickets:
+		ticket_index, ticket_number, time, house_no, movie, row_index, column_index, price = ticket
+		printMsg('user.bought_ticket', ticket_no=ticket_number, time=time, house_no=house_no, movie=movie,
+		         row_colour=row_colour, row=row_index + 1, column_colour=column_colour, column=chr(column_index + 65),
+		         normal_colour=normal_colour, price=price)
 	
-	saveData()
 	printLang("\n\nThank you for your purchase!", "\n\n感謝您的購買！")
 	inputLang("\nHit Enter to go back to the main menu", "按 Enter 以返回主頁面")
 	message = ""
@@ -356,11 +359,10 @@ def checkTicket() -> None:
 	
 	global message
 	
-	logger: Logger = getLogger("checkTicket")
 	logger.info("User Mode 2: Check ticket information")
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n\n\n\n\n", "電影售票系統\n\n\n\n\n\n\n")
-	if not House.tickets_table:
+	if not House.tickets_table and not House.ticket_archive:
 		if language == "ENGLISH":
 			message = "Sorry, there are no tickets"
 		else:
@@ -419,8 +421,7 @@ def checkTicket() -> None:
 		logger.info("Invalid ticket number, going back to the control panel menu")
 		return
 	print()
-	ticket_index: int = int(ticket_number[1:])
-	ticket: Optional[Ticket] = House.searchTicket(ticket_index)
+	ticket: Optional[Ticket] = House.searchTicketNumber(ticket_number)
 	if ticket is None:
 		logger.info("No such ticket, going back to the user menu")
 		printLang("No such ticket", "無此電影票")
@@ -430,15 +431,9 @@ def checkTicket() -> None:
 		message = ""
 		return
 	ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
-	printLang(f"{ticket_no:<6} @{time} "
-	          f"House {house_no:<2} -- {movie:<25} ~ "
-	          f"Seat<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-	          f"${price}",
-	          f"{ticket_no:<6} @{time} "
-	          f"電影院{house_no:<2} -- {movie:<25} ~ "
-	          f"座位<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-	          f"${price}"
-	          )
+	printMsg('user.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+	         row_colour=row_colour, row=row_index + 1, column_colour=column_colour, column=chr(column_index + 65),
+	         normal_colour=normal_colour, price=price)
 	print("\n\n")
 	inputLang("\nHit Enter to go back to the main menu", "按 Enter 以返回主頁面")
 	message = ""
@@ -455,7 +450,6 @@ def ticketRefund() -> None:
 	
 	global message
 	
-	logger: Logger = getLogger("ticketRefund")
 	logger.info("User Mode 3: Ticket refund")
 	clearScreen()
 	printLang("CINEMA KIOSK SYSTEM\n\n\n\n\n\n\n\n\n\n\n\n",
@@ -519,8 +513,7 @@ def ticketRefund() -> None:
 		logger.info("Invalid ticket number, going back to the control panel menu")
 		return
 	print()
-	ticket_index: int = int(ticket_number[1:])
-	ticket: Optional[Ticket] = House.searchTicket(ticket_index)
+	ticket: Optional[Ticket] = House.searchTicketNumber(ticket_number, archived=False)  # Only active tickets
 	if ticket is None:
 		logger.info("No such ticket, going back to the user menu")
 		printLang("No such ticket", "無此電影票")
@@ -530,27 +523,22 @@ def ticketRefund() -> None:
 		message = ""
 		return
 	ticket_index, ticket_no, time, house_no, movie, row_index, column_index, price = ticket
-	logger.info(f"User want to delete this ticket: {ticket}")
-	printLang(f"{ticket_no:<6} @{time} "
-	          f"House {house_no:<2} -- {movie:<25} ~ "
-	          f"Seat<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-	          f"${price}",
-	          f"{ticket_no:<6} @{time} "
-	          f"電影院{house_no:<2} -- {movie:<25} ~ "
-	          f"座位<{row_colour}{row_index + 1}{column_colour}{chr(column_index + 65)}{normal_colour}> "
-	          f"${price}"
-	          )
+	logger.info("User want to delete this ticket: %s", ticket)
+	printMsg('user.ticket', ticket_no=ticket_no, time=time, house_no=house_no, movie=movie,
+	         row_colour=row_colour, row=row_index + 1, column_colour=column_colour, column=chr(column_index + 65),
+	         normal_colour=normal_colour, price=price)
 	printLang("\nAre you sure you want to get refund of this ticket? (y/N)",
 	          "\n你確定要為此電影票退款嗎？（y/N）")
 	logger.info("Confirming")
 	confirm: str = input("-> ").strip().upper()
 	if confirm == 'Y':
-		House.houses_table[house_no].seating_plan[row_index][column_index] = 0
-		House.total_revenue -= price
-		House.houses_table[house_no].house_revenue -= price
-		House.tickets_table.remove(ticket)
+		with state_lock:
+			House.houses_table[house_no].setSeat(row_index, column_index, 0)
+			House.total_revenue -= price
+			House.houses_table[house_no].house_revenue -= price
+			House.removeTicket(ticket_index)
 		logger.info("Ticket deleted")
-		saveData()
+		saveChange(('REFUND', ticket_index, (house_no, row_index, column_index)))
 		printLang("\nRefund succeed!", "\n退款成功！")
 		message = ''
 		return
@@ -576,7 +564,6 @@ def userMode() -> None:
 	
 	message = ""
 	while True:
-		logger: Logger = getLogger("userMode")
 		logger.info("Entered the user menu")
 		clearScreen()
 		printLang("CINEMA KIOSK SYSTEM\n\n\n", "電影售票系統\n\n\n")
@@ -623,13 +610,10 @@ def userMode() -> None:
 			continue
 		
 		if mode == '0':
-			logger: Logger = getLogger("userMode.mode_0")
 			logger.info("User Mode 0: Log out")
 			logger.info("USER LOGOUT")
 			for i in range(3, 0, -1):
-				printLang(f"\rYou will be logged out after {i} seconds...",
-				          f"\r你將會於{i}秒後登出......",
-				          end='')
+				printMsg('user.logout_countdown', second=i, end='')
 				sleep(1)
 			return
 		
@@ -644,7 +628,6 @@ def userMode() -> None:
 		
 		# HELP
 		elif mode == '4':
-			logger: Logger = getLogger("userMode.mode_4")
 			logger.info("User Mode 4: Help")
 			openWebBrowser("https://joeccp.github.io/SBA/")
 			logger.info("Opened a website browser and visit https://joeccp.github.io/SBA/")
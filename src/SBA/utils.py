@@ -17,15 +17,29 @@
 
 from atexit import register
 from datetime import datetime
-from logging import basicConfig, DEBUG, getLogger, Logger
-from os import get_terminal_size, name, makedirs, path, system
-from pickle import dump, load
+from logging import Logger
+from os import environ, get_terminal_size, name, makedirs, path, system
 from platform import system as systemPlatform  # NOQA: lowercase function imported as uppercase function
-from sys import argv, version_info
+from sys import argv, stdout, version_info
+from threading import Condition, RLock, Thread
+from time import monotonic
+from typing import Optional
 
-from .colour import loadColour, setColour
-from .house import House
-from .language import loadLanguage, printLang, setLanguage
+from .archive import TicketArchive
+from .colour import loadColour
+from .house import House, Ticket
+from .language import loadLanguage, printLang
+from .log import getModuleLogger, startLogging, stopLogging
+from .render import forgetFrames
+from .settings import DEFAULT_SETTINGS, getDataPath, getSetting, saveSettings
+from .storage import getStorage, JournalRecord, PickleBackend, StorageBackend
+
+logger: Logger = getModuleLogger(__name__)
+
+# Cursor home, clear the screen, clear the scrollback, like what 'clear' does
+ANSI_CLEAR_SCREEN: str = '\033[H\033[2J\033[3J'
+
+terminal_supports_ansi: Optional[bool] = None  # Detected by detectTerminal()
 
 
 class ProgramForcedExit(Exception):
@@ -57,7 +71,6 @@ def checkPythonVersion() -> None:
 	# (typing.Self, which is used in house.House, was also introduced in Python 3.11)
 	# (match-case syntax, which is used in House.printPlan, was introduced in Python 3.10)
 	
-	logger: Logger = getLogger("checkPythonVersion")
 	major_version, minor_version, *_ = version_info
 	if major_version < 3:
 		logger.critical("I am running on Python %s!", major_version)
@@ -72,13 +85,63 @@ def checkPythonVersion() -> None:
 		raise ProgramForcedExit(err_msg)
 
 
+def enableWindowsAnsi() -> bool:
+	"""
+	Enable ANSI escape sequences (virtual terminal processing) in the Windows console
+	
+	:return: Whether it is enabled
+	:rtype: bool
+	"""
+	try:
+		from ctypes import byref, c_ulong, windll  # type: ignore[attr-defined] # Windows only
+		kernel32 = windll.kernel32
+		handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+		mode: c_ulong = c_ulong()
+		if not kernel32.GetConsoleMode(handle, byref(mode)):
+			return False
+		return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+	except (ImportError, AttributeError, OSError):
+		return False
+
+
+def detectTerminal() -> None:
+	"""
+	Detect whether the terminal supports ANSI escape sequences, for clearScreen()
+	
+	It should be called once at startup, before anything coloured is printed,
+	as it also enables ANSI escape sequences in the Windows console.
+	
+	:return: None
+	"""
+	global terminal_supports_ansi
+	
+	if not stdout.isatty():
+		terminal_supports_ansi = True  # Same as what 'clear' would write, without starting a process
+	elif name == 'nt':
+		terminal_supports_ansi = enableWindowsAnsi()
+	else:
+		terminal_supports_ansi = environ.get('TERM', '') != 'dumb'
+	logger.info("Terminal supports ANSI escape sequences: %s", terminal_supports_ansi)
+
+
 def clearScreen() -> None:
 	"""
 	Clear the screen
 
+	Clears with ANSI escape sequences if the terminal supports them (see detectTerminal()),
+	otherwise runs 'cls' or 'clear'.
+	
 	:return: None
 	"""
 	
+	if terminal_supports_ansi is None:
+		detectTerminal()
+	
+	if terminal_supports_ansi:
+		print(ANSI_CLEAR_SCREEN, end='', flush=True)
+		forgetFrames()  # Seating plans drawn before are cleared
+		return
+	
 	try:
 		terminal_width, terminal_height = get_terminal_size()
 		# Print empty lines in case system('cls') or system('clear') does not work
@@ -93,21 +156,202 @@ def clearScreen() -> None:
 			system('cls')
 		else:
 			system('clear')
+		forgetFrames()  # Seating plans drawn before are cleared
+
+
+# Held when changing the houses and tickets data, and when saving or loading it,
+# so the persistence worker never saves half-changed data
+state_lock: RLock = RLock()
+
+FLUSH_TIMEOUT: float = 30.0  # Seconds to wait for the data to be saved by flushData()
+
+
+class PersistenceWorker(Thread):
+	"""
+	Saves the houses and tickets data in a background thread, so nobody waits for the disk
+	
+	Change records (see saveChange()) are saved as soon as the worker gets to them,
+	all the records queued by then are saved together (e.g. a single fsync for a burst of sales).
+	
+	A snapshot is requested by marking the data dirty (see requestSnapshot()),
+	it is written `latency` seconds after the first request,
+	so a burst of changes (e.g. updating a house and clearing its seats) is written once.
+	
+	flush() writes everything queued immediately, and waits for it.
+	If saving fails, it is logged and retried `latency` seconds later.
+	"""
+	
+	def __init__(self, storage: StorageBackend, latency: float) -> None:
+		super().__init__(name='PersistenceWorker', daemon=True)
+		self.storage: StorageBackend = storage
+		self.latency: float = latency
+		self.condition: Condition = Condition()
+		self.pending_records: list[JournalRecord] = []
+		self.snapshot_due: Optional[float] = None  # time.monotonic() when the requested snapshot is written
+		self.retry_at: float = 0.0  # time.monotonic() when saving is retried after an error
+		self.busy: bool = False
+		self.stopping: bool = False
+	
+	def saveChange(self, record: JournalRecord) -> None:
+		"""Queue a change record to be saved"""
+		with self.condition:
+			self.pending_records.append(record)
+			self.condition.notify_all()
+	
+	def requestSnapshot(self) -> None:
+		"""Mark the data dirty, a snapshot is written within `latency` seconds"""
+		with self.condition:
+			if self.snapshot_due is None:
+				self.snapshot_due = monotonic() + self.latency
+				self.condition.notify_all()
+	
+	def isIdle(self) -> bool:
+		"""Returns whether everything queued is saved, call it with `condition` held"""
+		return not self.pending_records and self.snapshot_due is None and not self.busy
+	
+	def flush(self, timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+		"""
+		Write everything queued now, and wait for it
+		
+		:param timeout: Seconds to wait, None to wait forever
+		:type timeout: Optional[float]
+		:return: Whether everything queued is saved
+		:rtype: bool
+		"""
+		with self.condition:
+			if self.snapshot_due is not None:
+				self.snapshot_due = monotonic()
+			self.retry_at = 0.0
+			self.condition.notify_all()
+			return self.condition.wait_for(self.isIdle, timeout)
+	
+	def stop(self, timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+		"""Flush, then stop the thread. Returns whether everything queued is saved"""
+		flushed: bool = self.flush(timeout)
+		with self.condition:
+			self.stopping = True
+			self.condition.notify_all()
+		self.join(timeout)
+		return flushed
+	
+	def waitForWork(self) -> Optional[list[JournalRecord]]:
+		"""
+		Wait until there is something to save, call it with `condition` held
+		
+		:return: The change records to save, an empty list to write a snapshot, or None if the worker is stopped
+		:rtype: Optional[list[tuple]]
+		"""
+		while True:
+			now: float = monotonic()
+			if self.retry_at > now:
+				self.condition.wait(self.retry_at - now)
+			elif self.pending_records:  # Records are saved before the snapshot, in the order they were made
+				records: list[JournalRecord] = self.pending_records
+				self.pending_records = []
+				return records
+			elif self.snapshot_due is not None and self.snapshot_due <= now:
+				self.snapshot_due = None
+				return []
+			elif self.snapshot_due is not None:
+				self.condition.wait(self.snapshot_due - now)
+			elif self.stopping:
+				return None
+			else:
+				self.condition.wait()
+	
+	def run(self) -> None:
+		logger.info("Persistence worker started, latency = %s seconds", self.latency)
+		while True:
+			with self.condition:
+				records: Optional[list[JournalRecord]] = self.waitForWork()
+				if records is None:
+					break
+				self.busy = True
+			try:
+				with state_lock:
+					if records:
+						self.storage.saveChanges(records)
+					else:
+						self.storage.save()
+			except Exception:  # Nothing is lost, it is retried
+				logger.exception("Failed to save data, retrying in %s seconds", self.latency)
+				with self.condition:
+					if records:
+						self.pending_records[:0] = records
+					elif self.snapshot_due is None:
+						self.snapshot_due = monotonic()
+					self.retry_at = monotonic() + self.latency
+			finally:
+				with self.condition:
+					self.busy = False
+					self.condition.notify_all()
+		logger.info("Persistence worker stopped")
+
+
+persistence_worker: Optional[PersistenceWorker] = None
+
+
+def getSaveLatency() -> float:
+	"""Returns the latency budget of the persistence worker in seconds, from the 'save_latency_ms' setting"""
+	try:
+		latency_ms: int = int(getSetting('save_latency_ms'))
+		if latency_ms < 0:
+			raise ValueError
+	except ValueError:
+		logger.warning("Invalid save latency %s, using the default", getSetting('save_latency_ms'))
+		latency_ms = int(DEFAULT_SETTINGS['save_latency_ms'])
+	return latency_ms / 1000
+
+
+def getPersistenceWorker() -> PersistenceWorker:
+	"""
+	Returns the persistence worker, it is started if it is not running
+	
+	It is flushed when the program exits, see flushData()
+	
+	:return: The persistence worker
+	:rtype: PersistenceWorker
+	"""
+	global persistence_worker
+	
+	if persistence_worker is None or not persistence_worker.is_alive():
+		if persistence_worker is None:
+			register(flushData)  # Registered after endLog(), so it is called before the log is closed
+		persistence_worker = PersistenceWorker(getStorage(), getSaveLatency())
+		persistence_worker.start()
+	return persistence_worker
+
+
+def flushData(timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+	"""
+	Write everything queued by saveData() and saveChange() now, and wait for it
+	
+	:param timeout: Seconds to wait, None to wait forever
+	:type timeout: Optional[float]
+	:return: Whether everything queued is saved
+	:rtype: bool
+	"""
+	if persistence_worker is None:
+		return True
+	logger.info("Flushing data")
+	flushed: bool = persistence_worker.flush(timeout)
+	if not flushed:
+		logger.critical("Data is not saved after %s seconds", timeout)
+	return flushed
 
 
 def saveData(*, print_log: bool = False) -> None:
 	"""
-	Save `House.total_revenue` and `House.houses_table` into `data/houses`,
-	and save `House.total_tickets` and `House.tickets_table` into `data/tickets`
+	Save the houses and tickets data with the storage backend, see storage.getStorage()
+	
+	The data is marked dirty, and saved by the persistence worker within the latency budget
+	(the 'save_latency_ms' setting), see `PersistenceWorker`.
+	In admin mode (`print_log`), the data is saved now.
 	
 	:param print_log: Whether to print logs, it is for admin mode. Keyword-only parameter
 	:type print_log: bool
 	:return: None
 	"""
-	from .colour import colour_mode
-	from .language import language
-	
-	logger: Logger = getLogger('saveData')
 	logger.info("Saving Data")
 	
 	def internalLog(english_message: str, chinese_message: str) -> None:
@@ -124,52 +368,33 @@ def saveData(*, print_log: bool = False) -> None:
 			printLang(english_message, chinese_message)
 		logger.info(english_message)
 	
-	absolute_path = path.dirname(__file__)
-	
-	relative_path = '../../data'
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	internalLog("Reaching the data folder", "正在尋找 data 資料夾")
-	if not path.isdir(full_path):
-		internalLog("No data folder, creating one", "無 data 資料夾，正在創建")
-		makedirs(full_path)
-	
-	internalLog("Writing houses data", "正在寫入電影院資料")
-	relative_path = "../../data/houses"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	with open(full_path, 'wb') as file:
-		data: list[int | dict] = [House.total_revenue, House.houses_table, House.n_House]
-		dump(data, file)
-	
-	internalLog("Writing tickets data", "正在寫入電影票資料")
-	relative_path = "../../data/tickets"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	with open(full_path, 'wb') as file:
-		data: list[int] = [House.total_tickets, House.tickets_table]
-		dump(data, file)
-	
-	internalLog("Writing colour scheme setting", "正在寫入顔色設定")
-	setColour(colour_mode)
+	if print_log:
+		flushData()
+		with state_lock:
+			getStorage().save(internalLog)
+	else:
+		getPersistenceWorker().requestSnapshot()
+		internalLog("Data will be saved in the background", "資料將於背景儲存")
 	
-	internalLog("Writing language option", "正在寫入語言設定")
-	setLanguage(language)
+	# The settings file is only written if a setting was changed
+	if saveSettings():
+		internalLog("Settings written", "已寫入設定")
 	
 	internalLog("Data saving process finished", "儲存資料程序完成")
 
 
 def loadData(*, print_log: bool = False) -> None:
 	"""
-	Load `House.total_revenue` and `House.houses_table` from `data/houses`,
-	and load `House.total_tickets` and `House.tickets_table` from `data/tickets`
+	Load the houses and tickets data with the storage backend, see storage.getStorage()
 
+	Changes which are not saved yet are saved first, see flushData().
+	If the storage backend has no saved data, but there is data saved by the pickle backend
+	(e.g. the storage backend was just changed), the data is loaded from it and saved with the storage backend.
+	
 	:param print_log: Whether to print logs, it is for admin mode. Keyword-only parameter
 	:type print_log: bool
 	:return: None
 	"""
-	
-	logger: Logger = getLogger('loadData')
 	logger.info("Loading Data")
 	
 	def internalLog(english_message: str, chinese_message: str) -> None:
@@ -186,47 +411,17 @@ def loadData(*, print_log: bool = False) -> None:
 			printLang(english_message, chinese_message)
 		logger.info(english_message)
 	
-	absolute_path = path.dirname(__file__)
-	
-	relative_path = "../../data/houses"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	try:
-		internalLog("Finding houses data", "正在尋找電影院資料")
-		try:
-			with open(full_path, 'rb') as file:
-				data: list = load(file)
-		except EOFError:
-			internalLog("Houses data is empty", "電影院資料爲空")
-			raise EOFError
-		House.total_revenue = data[0]
-		House.houses_table = data[1]
-		House.n_House = data[2]
-		House.n_House = len(House.houses_table)
-		internalLog("Houses data loaded", "已載入電影院資料")
-	except FileNotFoundError:
-		internalLog("No houses data found", "無電影院資料")
-	except EOFError:
-		pass
-	
-	relative_path = "../../data/tickets"
-	full_path = path.join(absolute_path, relative_path)
-	logger.debug(f"Full path = {full_path}")
-	try:
-		internalLog("Finding tickets data", "正在尋找電影票資料")
-		try:
-			with open(full_path, 'rb') as file:
-				data: dict = load(file)
-		except EOFError:
-			internalLog("Tickets data is empty", "電影票資料爲空")
-			raise EOFError
-		House.total_tickets = data[0]
-		House.tickets_table = data[1]
-		internalLog("Tickets data loaded", "已載入電影票資料")
-	except FileNotFoundError:
-		internalLog("No tickets data found", "無電影票資料")
-	except EOFError:
-		pass
+	flushData()
+	storage: StorageBackend = getStorage()
+	House.ticket_archive = getTicketArchive()  # Archived tickets are only read when they are needed
+	with state_lock:
+		if not storage.load(internalLog) and not isinstance(storage, PickleBackend):
+			internalLog("Finding data saved by the pickle backend", "正在尋找以 pickle 儲存的資料")
+			pickle_backend: PickleBackend = PickleBackend(getDataPath(''))
+			if pickle_backend.load(internalLog):
+				pickle_backend.close()  # The seats of all houses are read from its seat-state file
+				storage.save(internalLog)
+				internalLog(f"Data migrated to the {storage.name} backend", f"已轉移資料至 {storage.name}")
 	
 	internalLog("Loading colour scheme", "正在載入配色設定")
 	loadColour()
@@ -234,26 +429,97 @@ def loadData(*, print_log: bool = False) -> None:
 	
 	internalLog("Loading language setting", "正在載入語言設定")
 	loadLanguage()
-	internalLog("Colour scheme loaded", "已載入語言設定")
+	internalLog("Language setting loaded", "已載入語言設定")
 	
 	internalLog("Data loading process finished", "載入資料程序完成")
 
 
+def saveChange(record: JournalRecord) -> None:
+	"""
+	Save a single change (e.g. a sale), which has already been applied to the houses and tickets data,
+	with the storage backend
+	
+	Only the change itself is saved, instead of the whole houses and tickets data,
+	so the cost of saving a change does not grow with the number of tickets.
+	The change is saved by the persistence worker, together with the other changes queued by then.
+	
+	:param record: A change record, see `storage.JournalRecord`
+	:type record: tuple
+	:return: None
+	"""
+	getPersistenceWorker().saveChange(record)
+
+
+def deleteData() -> bool:
+	"""
+	Delete all the saved houses and tickets data
+	
+	Changes which are not saved yet are saved first, so they are not written after the data is deleted.
+	
+	:return: Whether any saved data was deleted
+	:rtype: bool
+	"""
+	flushData()
+	with state_lock:
+		deleted: bool = getStorage().delete()
+		return getTicketArchive().delete() or deleted
+
+
+ticket_archive: Optional[TicketArchive] = None
+
+
+def getTicketArchive() -> TicketArchive:
+	"""Returns the archived tickets in data/archive, see `archive.TicketArchive`"""
+	global ticket_archive
+	
+	if ticket_archive is None:
+		ticket_archive = TicketArchive(getDataPath('archive'))
+	return ticket_archive
+
+
+def archiveTickets(tickets: list[Ticket]) -> int:
+	"""
+	Archive tickets which are no longer active (e.g. the seats of their house were cleared),
+	instead of forgetting them, they can still be found by House.searchTicket() but cannot be refunded
+	
+	Their removal from `House.tickets_table` is saved first, so after a crash they never come back
+	as active tickets which are archived too.
+	
+	:param tickets: Tickets removed from `House.tickets_table`
+	:type tickets: list[Ticket]
+	:return: Number of tickets archived
+	:rtype: int
+	"""
+	if not tickets:
+		return 0
+	getPersistenceWorker().requestSnapshot()
+	if not flushData():  # Archived anyway, TicketArchive.append() skips them if they are archived again
+		logger.error("The removal of %s tickets is not saved before archiving them", len(tickets))
+	House.ticket_archive = getTicketArchive()
+	try:
+		return House.ticket_archive.append(tickets)
+	except OSError:
+		logger.exception("Failed to archive %s tickets", len(tickets))
+		return 0
+
+
 LOG_FILE_FULL_PATH: str = ''
 
 
 def initLog() -> None:
 	"""
-	Initialize the log file
+	Initialize the log file, logs/kiosk.log
+	
+	Logs of every run are appended to it, each run starts with a head of the program information.
+	It is rolled over and compressed when it is too large or at midnight, see log.LogFileHandler
 	
 	:return: None
 	"""
 	global LOG_FILE_FULL_PATH
 	PROGRAM_START_TIME: datetime = datetime.now()
 	PROGRAM_START_TIME_STRING: str = PROGRAM_START_TIME.isoformat(sep=' ', timespec='seconds')
-	PROGRAM_START_TIME_STRING: str = PROGRAM_START_TIME_STRING.replace(':', '-')  # file name can't have ':'
 	absolute_path = path.dirname(__file__)
-	relative_path = f'../../logs/{PROGRAM_START_TIME_STRING}.txt'
+	relative_path = '../../logs/kiosk.log'
 	full_path = path.join(absolute_path, relative_path)
 	LOG_FILE_FULL_PATH = full_path
 	head_msg: str = ("--- LOG FILE ---\n"
@@ -263,16 +529,8 @@ def initLog() -> None:
 	                 f"# Arguments: {argv}\n"
 	                 f"# Path: {path.abspath(__file__)}\n"
 	                 "# ~INFO~\n")
-	with open(full_path, 'w') as file:
-		file.write(head_msg)
-	basicConfig(
-		filename=full_path,
-		encoding='utf-8',
-		level=DEBUG,
-		format='%(asctime)s --> %(levelname)s @%(name)s --> %(message)s',
-		datefmt='%Y/%m/%d %H:%M:%S',
-	)
-	logger: Logger = getLogger('initLog')
+	makedirs(path.dirname(full_path), exist_ok=True)
+	startLogging(full_path, head_msg)
 	logger.info('Program started')
 
 
@@ -283,8 +541,9 @@ def endLog() -> None:
 	
 	:return: None
 	"""
+	stopLogging()  # Log records in the queue are written first
 	try:
 		with open(LOG_FILE_FULL_PATH, 'a') as file:
-			file.write('--- LOG FILE ---')
+			file.write('--- LOG FILE ---\n')
 	except FileNotFoundError:
 		pass
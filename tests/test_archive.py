@@ -0,0 +1,95 @@
+"""Unit tests for the ticket archive"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from os import listdir, path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..src.SBA.archive import TicketArchive
+from ..src.SBA.house import House, PurchaseTransaction
+from ..src.SBA.ticket import Ticket
+
+
+class Test_archive(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def setUp(self) -> None:
+		self.data_directory: TemporaryDirectory = TemporaryDirectory()
+		self.archive: TicketArchive = TicketArchive(path.join(self.data_directory.name, 'archive'))
+		House.houses_table = {}
+		House.n_House = 0
+		House.clearTickets()
+		House.total_tickets = 0
+		House.total_revenue = 0
+		House.ticket_archive = self.archive
+	
+	def tearDown(self) -> None:
+		House.ticket_archive = None
+		House.houses_table = {}
+		House.n_House = 0
+		House.clearTickets()
+		House.total_tickets = 0
+		House.total_revenue = 0
+		self.data_directory.cleanup()
+	
+	def sellAll(self, houses: list[House]) -> None:
+		"""Sell every seat of the houses, one ticket at a time, taking turns"""
+		for row_index in range(houses[0].n_row):
+			for column_index in range(houses[0].n_column):
+				for house in houses:
+					transaction: PurchaseTransaction = house.beginPurchase()
+					transaction.stage(row_index, column_index, 50)
+					transaction.commit()
+	
+	def test_archive(self):
+		"""Tests tickets removed from the active tickets can be found in the archive, but not as active tickets"""
+		houses: list[House] = [House(row_number=2, column_number=3), House(row_number=2, column_number=3)]
+		self.sellAll(houses)
+		self.assertFalse(self.archive)
+		self.assertIsNone(self.archive.get(1))
+		
+		tickets: list[Ticket] = House.removeHouseTickets(1)
+		self.assertEqual(self.archive.append(tickets), 6)
+		self.assertEqual(listdir(self.archive.directory), ['tickets-0000000001-0000000011'])
+		self.assertEqual(House.searchTicketNumber('T00003'), tickets[1])
+		self.assertIsNone(House.searchTicketNumber('T00003', archived=False))
+		self.assertEqual(House.searchTicket(4), House.tickets_table[4])
+		self.assertIsNone(House.searchTicket(13))
+		
+		tickets += House.removeHouseTickets(2)
+		self.assertEqual(self.archive.append(tickets[6:]), 6)
+		self.assertEqual(len(House.tickets_table.house_numbers), 0)  # Compacted
+		self.assertEqual(House.searchTicket(4).house_number, 2)
+		
+		archive: TicketArchive = TicketArchive(self.archive.directory)  # As if the program was started again
+		self.assertEqual(archive.segments, None)
+		self.assertEqual(archive.get(12), tickets[-1])
+		self.assertEqual(list(archive.values()), tickets)
+		self.assertEqual(archive.append([]), 0)
+		
+		self.assertTrue(archive.delete())
+		self.assertFalse(path.exists(self.archive.directory))
+		self.assertFalse(archive.delete())
+	
+	def test_alreadyArchived(self):
+		"""Tests tickets which are already archived are not archived again, e.g. after a crash"""
+		House(row_number=1, column_number=3)
+		self.sellAll(list(House.houses_table.values()))
+		tickets: list[Ticket] = House.removeHouseTickets(1)
+		self.assertEqual(self.archive.append(tickets[:2]), 2)
+		self.assertEqual(self.archive.append(tickets[:2]), 0)
+		self.assertEqual(self.archive.append(tickets), 1)
+		self.assertEqual(len(listdir(self.archive.directory)), 2)
+		self.assertEqual(list(TicketArchive(self.archive.directory).values()), tickets)
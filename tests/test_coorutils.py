@@ -237,3 +237,39 @@ class Test_getCoorsFromCoorExpr(TestCase):  # NOQA: disable 'all caps in class n
 		                  (3, 3), (3, 4), (3, 5), (3, 6), (3, 7)])
 		self.assertEqual(getCoorsFromCoorExpr('3A:5A'), [(2, 0), (3, 0), (4, 0)])
 		self.assertEqual(getCoorsFromCoorExpr('5C:5G'), [(4, 2), (4, 3), (4, 4), (4, 5), (4, 6)])
+	
+	def test_cache(self) -> None:
+		"""Tests cached results are not shared with the caller, and the cache is keyed by the house size too"""
+		coordinates: list[Coor] = getCoorsFromCoorExpr('5C:5E')
+		coordinates.append((0, 0))
+		self.assertEqual(getCoorsFromCoorExpr('5C:5E'), [(4, 2), (4, 3), (4, 4)])
+		with self.assertRaises(ColumnNumberOutOfRange):
+			getCoorsFromCoorExpr('5C:5E', n_column=4)
+		with self.assertRaises(TypeError):
+			getCoorsFromCoorExpr('5C:5E', n_row=True)  # NOQA
+
+
+class Test_getRegionFromCoorExpr(TestCase):  # NOQA: disable 'all caps in class name' warning
+	def test_region(self) -> None:
+		"""Tests comma-separated coordinate expressions and exclusions"""
+		region: CoorRegion = getRegionFromCoorExpr('1A:10Z, !5M:5N', n_row=10)
+		self.assertEqual(region.n_seat, 258)
+		self.assertEqual(set(region), set(getCoorsFromCoorExpr('1A:10Z')) - {(4, 12), (4, 13)})
+		self.assertNotIn((4, 12), region)
+		self.assertIn((4, 14), region)
+		self.assertEqual(getRegionFromCoorExpr('2B').rects, [(1, 1, 1, 1)])
+		self.assertEqual(getRegionFromCoorExpr('2H:4D').rects, [(1, 3, 3, 7)])  # Top-right to bottom-left
+		self.assertEqual(getRegionFromCoorExpr('1A:3C, 2B:4D').n_seat, 9 + 9 - 4)  # Overlapping
+		self.assertEqual(getRegionFromCoorExpr('1A:3C, !1A:3C').rects, [])
+		self.assertEqual(getRegionFromCoorExpr('!1A, 1A').rects, [(0, 0, 0, 0)])  # From left to right
+	
+	def test_invalidSyntax(self) -> None:
+		"""Tests exceptions of each coordinate expression are raised"""
+		with self.assertRaises(EmptyCoordinate):
+			getRegionFromCoorExpr('1A,')
+		with self.assertRaises(EmptyCoordinate):
+			getRegionFromCoorExpr('1A, !')
+		with self.assertRaises(InvalidCharacter):
+			getRegionFromCoorExpr('1A, !!2B')
+		with self.assertRaises(RowNumberOutOfRange):
+			getRegionFromCoorExpr('1A, !12A', n_row=10)
@@ -16,7 +16,7 @@
 
 from unittest import TestCase
 
-from ..src.SBA.house import House
+from ..src.SBA.house import House, PurchaseTransaction, SeatNotAvailable
 
 
 class Test_House(TestCase):  # NOQA: disable 'all caps in class name' warning
@@ -26,7 +26,7 @@ class Test_House(TestCase):  # NOQA: disable 'all caps in class name' warning
 		"""Before testing, reset all house data"""
 		House.houses_table = {}
 		House.n_House = 0
-		House.tickets_table = []
+		House.clearTickets()
 		House.total_tickets = 0
 	
 	@classmethod
@@ -34,12 +34,13 @@ class Test_House(TestCase):  # NOQA: disable 'all caps in class name' warning
 		"""After testing, reset all house data"""
 		House.houses_table = {}
 		House.n_House = 0
-		House.tickets_table = []
+		House.clearTickets()
 		House.total_tickets = 0
 	
 	def setUp(self) -> None:
 		"""Clear houses table before each test so house number will be 1 every time"""
 		House.houses_table = {}
+		House.n_House = 0
 	
 	def test_initHouse(self):
 		"""Tests the basic attributes of a House instance"""
@@ -94,31 +95,43 @@ class Test_House(TestCase):  # NOQA: disable 'all caps in class name' warning
 		"""Tests separation about tickets"""
 		house: House = House(row_number=99, column_number=26)
 		house.movie = "An Excellent Movie"
-		House.tickets_table = [
-			[1, "T00001", '0186-05-05T00:00:00', 1, "An Excellent Movie", 0, 0, 0],
-			[2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0],
-			[3, "T00003", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 2, 0],
-			[4, "T00004", '2018-08-01T03:05:00', 1, "An Excellent Movie", 0, 3, 0],
-			[5, "T00005", '2018-09-04T04:08:06', 1, "An Excellent Movie", 0, 4, 0],
-			[6, "T00006", '2020-08-13T00:06:09', 1, "An Excellent Movie", 0, 5, 0],
-			[7, "T00007", '2020-09-13T01:02:05', 1, "An Excellent Movie", 0, 6, 0],
-			[8, "T00008", '2021-11-26T01:03:09', 1, "An Excellent Movie", 0, 7, 0],
-			[9, "T00009", '2023-07-26T01:04:00', 1, "An Excellent Movie", 0, 8, 0],
-			[10, "T00010", '2023-07-26T22:22:22', 1, "An Excellent Movie", 0, 9, 0],
-			[11, "T00011", '2023-09-09T01:05:03', 1, "An Excellent Movie", 0, 10, 0],
-			[12, "T00012", '2023-09-09T01:06:02', 1, "An Excellent Movie", 0, 11, 0],
-		]
+		House.clearTickets()
+		for ticket in [
+			(1, "T00001", '0186-05-05T00:00:00', 1, "An Excellent Movie", 0, 0, 0),
+			(2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0),
+			(3, "T00003", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 2, 0),
+			(4, "T00004", '2018-08-01T03:05:00', 1, "An Excellent Movie", 0, 3, 0),
+			(5, "T00005", '2018-09-04T04:08:06', 1, "An Excellent Movie", 0, 4, 0),
+			(6, "T00006", '2020-08-13T00:06:09', 1, "An Excellent Movie", 0, 5, 0),
+			(7, "T00007", '2020-09-13T01:02:05', 1, "An Excellent Movie", 0, 6, 0),
+			(8, "T00008", '2021-11-26T01:03:09', 1, "An Excellent Movie", 0, 7, 0),
+			(9, "T00009", '2023-07-26T01:04:00', 1, "An Excellent Movie", 0, 8, 0),
+			(10, "T00010", '2023-07-26T22:22:22', 1, "An Excellent Movie", 0, 9, 0),
+			(11, "T00011", '2023-09-09T01:05:03', 1, "An Excellent Movie", 0, 10, 0),
+			(12, "T00012", '2023-09-09T01:06:02', 1, "An Excellent Movie", 0, 11, 0),
+		]:
+			House.addTicket(ticket)
 		House.total_tickets = 12
 		
 		self.assertEqual(House.get_n_tickets(), 12)
 		self.assertEqual(
 			House.searchTicket(2),
-			[2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0]
+			(2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0)
+		)
+		self.assertEqual(
+			House.searchTicketNumber("T00002"),
+			(2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0)
 		)
+		self.assertEqual(House.searchTicketNumber("T000002"), None)
+		self.assertEqual(House.searchTicketNumber("T00013"), None)
 		self.assertEqual(House.searchTicket(0), None)
 		self.assertEqual(House.searchTicket(13), None)
 		
-		House.tickets_table.remove([2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0])
+		self.assertEqual(
+			House.removeTicket(2),
+			(2, "T00002", '2006-02-27T00:00:00', 1, "An Excellent Movie", 0, 1, 0)
+		)
+		self.assertEqual(House.removeTicket(2), None)
 		self.assertEqual(House.total_tickets, 12)  # Total tickets should not change
 		self.assertEqual(House.get_n_tickets(), 11)
 		self.assertEqual(
@@ -127,5 +140,132 @@ class Test_House(TestCase):  # NOQA: disable 'all caps in class name' warning
 		)
 		self.assertEqual(
 			House.searchTicket(3),
-			[3, "T00003", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 2, 0]
+			(3, "T00003", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 2, 0)
 		)
+	
+	def test_purchaseTransaction(self):
+		"""Tests a purchase is all-or-nothing"""
+		House.clearTickets()
+		House.total_tickets = 0
+		House.total_revenue = 0
+		house: House = House(row_number=3, column_number=3)
+		house.movie = "An Excellent Movie"
+		
+		transaction: PurchaseTransaction = house.beginPurchase()
+		transaction.stage(0, 0, 50)
+		transaction.stage(0, 1, 30)
+		tickets = transaction.commit()
+		self.assertEqual([ticket[0] for ticket in tickets], [1, 2])
+		self.assertEqual([ticket[1] for ticket in tickets], ["T00001", "T00002"])
+		self.assertEqual(house.seating_plan[0], [1, 1, 0])
+		self.assertEqual(house.n_available, 7)
+		self.assertEqual(house.house_revenue, 80)
+		self.assertEqual(House.total_revenue, 80)
+		self.assertEqual(House.get_n_tickets(), 2)
+		with self.assertRaises(RuntimeError):
+			transaction.commit()
+		
+		transaction: PurchaseTransaction = house.beginPurchase()
+		transaction.stage(1, 0, 50)
+		transaction.stage(0, 1, 50)  # Sold
+		with self.assertRaises(SeatNotAvailable):
+			transaction.commit()
+		transaction: PurchaseTransaction = house.beginPurchase()
+		transaction.stage(2, 2, 50)
+		transaction.stage(2, 2, 50)  # Twice
+		with self.assertRaises(SeatNotAvailable):
+			transaction.commit()
+		self.assertEqual(house.n_available, 7)
+		self.assertEqual(House.total_tickets, 2)
+		self.assertEqual(House.total_revenue, 80)
+		self.assertEqual(House.get_n_tickets(), 2)
+	
+	def test_houseTickets(self):
+		"""Tests removing all the tickets of a house"""
+		House.clearTickets()
+		House.total_tickets = 0
+		house_1: House = House(row_number=2, column_number=2)
+		house_2: House = House(row_number=2, column_number=2)
+		for house, row_index, column_index in [
+			(house_1, 0, 0), (house_2, 0, 0), (house_1, 0, 1), (house_2, 1, 1), (house_1, 1, 0)
+		]:
+			transaction: PurchaseTransaction = house.beginPurchase()
+			transaction.stage(row_index, column_index, 10)
+			transaction.commit()
+		self.assertEqual(list(House.house_tickets_table[house_1.house_number]), [1, 3, 5])
+		self.assertEqual(list(House.house_tickets_table[house_2.house_number]), [2, 4])
+		
+		House.removeTicket(3)
+		self.assertEqual(list(House.house_tickets_table[house_1.house_number]), [1, 5])
+		
+		removed_tickets = House.removeHouseTickets(house_1.house_number)
+		self.assertEqual([ticket[0] for ticket in removed_tickets], [1, 5])
+		self.assertEqual(list(House.tickets_table), [2, 4])
+		self.assertEqual(House.removeHouseTickets(house_1.house_number), [])
+		
+		House.rebuildTicketIndexes()
+		self.assertEqual(House.house_tickets_table, {house_2.house_number: {2: None, 4: None}})
+	
+	def test_seatCounters(self):
+		"""Tests the seat counters are kept up to date"""
+		house: House = House(row_number=3, column_number=4)
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (12, 0, 0))
+		house.setSeat(0, 0, 1)
+		house.setSeat(0, 1, 1)
+		house.setSeat(2, 3, 2)
+		house.setSeat(2, 3, 2)  # Unchanged
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (9, 2, 1))
+		house.setSeat(0, 1, 2)
+		house.setSeat(0, 0, 0)
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (10, 0, 2))
+		self.assertEqual(house[0], [0, 2, 0, 0])
+		self.assertTrue(house.verifyCounters())
+		
+		house.seat_counts[0] += 1
+		self.assertFalse(house.verifyCounters())
+		house.recount()
+		self.assertTrue(house.verifyCounters())
+		
+		house.clearPlan()
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (12, 0, 0))
+	
+	def test_findBestSeats(self):
+		"""Tests finding the best block of adjacent empty seats"""
+		house: House = House(row_number=4, column_number=6)
+		# The preferred row is row 3 (index 2), the centre is between C and D
+		self.assertEqual(house.findBestSeats(2), [(2, 2), (2, 3)])
+		self.assertEqual(house.findBestSeats(3), [(2, 1), (2, 2), (2, 3)])  # Ties go to the left
+		self.assertEqual(house.findBestSeats(6), [(2, 0), (2, 1), (2, 2), (2, 3), (2, 4), (2, 5)])
+		self.assertEqual(house.findBestSeats(7), None)
+		self.assertEqual(house.findBestSeats(0), None)
+		
+		house.setSeat(2, 3, 1)
+		self.assertEqual(bytes(house.free_runs[12:18]), bytes([3, 2, 1, 0, 2, 1]))
+		self.assertEqual(house.findBestSeats(2), [(1, 2), (1, 3)])  # Ties go to the front
+		self.assertEqual(house.findBestSeats(2, exclude=[(1, 3)]), [(2, 1), (2, 2)])
+		self.assertEqual(house.findBestSeats(4), [(1, 1), (1, 2), (1, 3), (1, 4)])
+		
+		house.setSeat(2, 3, 0)
+		self.assertEqual(bytes(house.free_runs[12:18]), bytes([6, 5, 4, 3, 2, 1]))
+		for column_index in range(6):
+			house.setSeat(1, column_index, 2)
+			house.setSeat(2, column_index, 1)
+			house.setSeat(3, column_index, 1)
+		self.assertEqual(house.findBestSeats(3), [(0, 1), (0, 2), (0, 3)])
+		free_runs: bytearray = house.free_runs[:]
+		house.rebuildFreeRuns()
+		self.assertEqual(house.free_runs, free_runs)
+	
+	def test_fillSeats(self):
+		"""Tests filling a rectangle of seats"""
+		house: House = House(row_number=4, column_number=5)
+		house.setSeat(1, 1, 1)
+		house.setSeat(2, 4, 2)
+		house.fillSeats((1, 1, 2, 3), 2)
+		self.assertEqual(house.seating_plan, [[0, 0, 0, 0, 0], [0, 2, 2, 2, 0], [0, 2, 2, 2, 2], [0, 0, 0, 0, 0]])
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (13, 0, 7))
+		self.assertTrue(house.verifyCounters())
+		self.assertEqual(bytes(house.free_runs[5:15]), bytes([1, 0, 0, 0, 1, 1, 0, 0, 0, 0]))
+		house.fillSeats((0, 0, 3, 4), 0)
+		self.assertEqual((house.n_available, house.n_sold, house.n_reserved), (20, 0, 0))
+		self.assertEqual(house.findBestSeats(5), [(2, 0), (2, 1), (2, 2), (2, 3), (2, 4)])
@@ -0,0 +1,53 @@
+"""Unit tests for the message catalog"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase
+
+from ..src.SBA import language as language_module
+from ..src.SBA.language import activateMessages, getMessage, message_catalog, registerMessages
+
+
+class Test_language(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def setUp(self) -> None:
+		self.original_language: str = language_module.language
+	
+	def tearDown(self) -> None:
+		for key in ('test.house', 'test.braces'):
+			message_catalog.pop(key, None)
+		language_module.language = self.original_language
+		activateMessages()
+	
+	def test_getMessage(self):
+		"""Tests only the template of the current language is used, and it follows language changes"""
+		registerMessages({
+			'test.house': ("House {house_number}: {movie:<6}|", "電影院{house_number}：{movie:<6}|"),
+			'test.braces': ("{Not formatted}", "{不會被格式化}"),
+		})
+		language_module.language = 'ENGLISH'
+		activateMessages()
+		self.assertEqual(getMessage('test.house', house_number=1, movie='Movie'), "House 1: Movie |")
+		self.assertEqual(getMessage('test.braces'), "{Not formatted}")
+		
+		language_module.language = 'CHINESE'
+		activateMessages()
+		self.assertEqual(getMessage('test.house', house_number=1, movie='Movie'), "電影院1：Movie |")
+		self.assertEqual(getMessage('test.braces'), "{不會被格式化}")
+		
+		registerMessages({'test.house': ("House {house_number}", "電影院{house_number}")})
+		self.assertEqual(getMessage('test.house', house_number=2), "電影院2")
+		with self.assertRaises(KeyError):
+			getMessage('test.no_such_message')
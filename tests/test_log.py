@@ -0,0 +1,114 @@
+"""Unit tests for the logging subsystem"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+from logging import getLogger, Logger
+from os import listdir, path, utime
+from tempfile import TemporaryDirectory
+from time import time
+from unittest import TestCase
+
+from ..src.SBA import log, settings
+from ..src.SBA.log import getLogLevel, LogFileHandler, pruneLogs, setLogLevel, startLogging, stopLogging
+
+
+class Test_log(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def setUp(self) -> None:
+		self.log_directory: TemporaryDirectory = TemporaryDirectory()
+		self.root_level: int = getLogger().level
+	
+	def tearDown(self) -> None:
+		stopLogging()
+		getLogger().removeHandler(log.queue_handler)
+		getLogger().setLevel(self.root_level)
+		settings.settings_loaded = False
+		self.log_directory.cleanup()
+	
+	def test_logging(self):
+		"""Tests log records are written by the background thread, and the log level can be changed"""
+		full_path: str = path.join(self.log_directory.name, 'log.txt')
+		startLogging(full_path)
+		self.assertIsNotNone(log.log_listener)
+		setLogLevel('INFO')
+		self.assertEqual(getLogLevel(), 'INFO')
+		logger: Logger = getLogger('test_logging')
+		logger.info("Shown")
+		logger.debug("Hidden")
+		setLogLevel('DEBUG')
+		logger.debug("Debug shown")
+		setLogLevel('NOT A LEVEL')
+		self.assertEqual(getLogLevel(), 'INFO')
+		stopLogging()
+		
+		with open(full_path, encoding='utf-8') as file:
+			lines: list[str] = file.read().splitlines()
+		self.assertEqual(len(lines), 2)
+		self.assertTrue(lines[0].endswith("INFO @test_logging.test_logging --> Shown"))
+		self.assertTrue(lines[1].endswith("DEBUG @test_logging.test_logging --> Debug shown"))
+	
+	def test_rollover(self):
+		"""Tests the log file is rolled over when it is too large, and the rolled file is compressed"""
+		full_path: str = path.join(self.log_directory.name, 'kiosk.log')
+		startLogging(full_path, "HEAD\n")
+		log.file_handler.maxBytes = 200
+		setLogLevel('INFO')
+		logger: Logger = getLogger('test_logging')
+		for i in range(10):
+			logger.info("Message %d", i)
+		stopLogging()
+		
+		names: list[str] = listdir(self.log_directory.name)
+		rolled_names: list[str] = [name for name in names if name != 'kiosk.log']
+		self.assertTrue(rolled_names)
+		self.assertTrue(all(name.startswith('kiosk.') and name.endswith('.log.gz') for name in rolled_names))
+		contents: list[str] = []
+		for name in sorted(rolled_names):
+			with gzip.open(path.join(self.log_directory.name, name), 'rt', encoding='utf-8') as file:
+				contents.append(file.read())
+		with open(full_path, encoding='utf-8') as file:
+			contents.append(file.read())
+		self.assertTrue(all(content.startswith("HEAD\n") for content in contents))
+		self.assertEqual(sum(content.count("Message") for content in contents), 10)
+	
+	def test_stale_log_file(self):
+		"""Tests a log file last written before today is rolled over when logging starts"""
+		full_path: str = path.join(self.log_directory.name, 'kiosk.log')
+		with open(full_path, 'w', encoding='utf-8') as file:
+			file.write("Yesterday\n")
+		utime(full_path, (time() - 86400 * 2, time() - 86400 * 2))
+		handler: LogFileHandler = LogFileHandler(full_path, head="HEAD\n")
+		handler.close()
+		
+		with open(full_path, encoding='utf-8') as file:
+			self.assertEqual(file.read(), "HEAD\n")
+		self.assertEqual(len(listdir(self.log_directory.name)), 2)
+	
+	def test_prune(self):
+		"""Tests logs older than the retention, or over the total size, are deleted"""
+		directory: str = self.log_directory.name
+		for name, age_days, size in (('kiosk.new.log.gz', 1, 10), ('kiosk.older.log.gz', 3, 10),
+		                             ('kiosk.expired.log.gz', 20, 10), ('2023-05-01 12-00-00.txt', 30, 10),
+		                             ('README.md', 30, 10), ('other.old.log.gz', 30, 10)):
+			with open(path.join(directory, name), 'wb') as file:
+				file.write(b'x' * size)
+			utime(path.join(directory, name), (time() - age_days * 86400, time() - age_days * 86400))
+		
+		deleted: list[str] = pruneLogs(directory, 'kiosk.log', 14, 1000)
+		self.assertEqual(sorted(deleted), ['2023-05-01 12-00-00.txt', 'kiosk.expired.log.gz'])
+		deleted: list[str] = pruneLogs(directory, 'kiosk.log', 14, 15)
+		self.assertEqual(deleted, ['kiosk.older.log.gz'])
+		self.assertEqual(sorted(listdir(directory)), ['README.md', 'kiosk.new.log.gz', 'other.old.log.gz'])
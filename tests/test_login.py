@@ -0,0 +1,104 @@
+"""Unit tests for the account registry"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from os import path, stat, utime
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..src.SBA import login
+from ..src.SBA.login import getAccounts, getHasher, hash, Pbkdf2Hasher, ScryptHasher, Sha3Hasher, verifyPassword
+
+
+class Test_login(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def setUp(self) -> None:
+		self.data_directory: TemporaryDirectory = TemporaryDirectory()
+		self.accounts_path: str = path.join(self.data_directory.name, 'accounts.toml')
+		self.accounts_path_patch = patch.object(login, 'getAccountsPath', lambda: self.accounts_path)
+		self.accounts_path_patch.start()
+		login.accounts_mtime = None
+	
+	def tearDown(self) -> None:
+		self.accounts_path_patch.stop()
+		self.data_directory.cleanup()
+		login.accounts_table.clear()
+		login.accounts_mtime = None
+	
+	def writeAccounts(self, n_account: int, mtime_ns: int) -> None:
+		with open(self.accounts_path, 'w') as file:
+			for i in range(n_account):
+				file.write(f'[staff{i}]\nname = "staff{i}"\nhashed_password = "{i}"\n')
+		utime(self.accounts_path, ns=(mtime_ns, mtime_ns))
+	
+	def test_getAccounts(self):
+		"""Tests accounts are keyed by username, and only reloaded when the file is modified"""
+		self.writeAccounts(300, 10 ** 18)
+		accounts: dict = getAccounts()
+		self.assertEqual(len(accounts), 300)
+		self.assertEqual(accounts["staff299"]["hashed_password"], "299")
+		self.assertNotIn("staff300", accounts)
+		
+		with patch.object(login, 'loadtoml') as loadtoml:
+			self.assertIs(getAccounts(), accounts)
+			loadtoml.assert_not_called()
+		
+		self.writeAccounts(2, stat(self.accounts_path).st_mtime_ns + 10 ** 9)
+		self.assertEqual(sorted(getAccounts()), ["staff0", "staff1"])
+		
+		self.data_directory.cleanup()
+		with self.assertRaises(FileNotFoundError):
+			getAccounts()
+	
+	def test_hashers(self):
+		"""Tests every hasher verifies its own hashed passwords, and hashed passwords are salted"""
+		for hasher in (Sha3Hasher(), ScryptHasher(n=2 ** 10), Pbkdf2Hasher(iterations=1000)):
+			hashed_password: str = hasher.hash("pass,")
+			self.assertIs(type(getHasher(hashed_password)), type(hasher))
+			self.assertTrue(hasher.isCurrent(hashed_password))
+			self.assertTrue(hasher.verify("pass,", hashed_password))
+			self.assertFalse(hasher.verify("pass", hashed_password))
+		self.assertNotEqual(ScryptHasher(n=2 ** 10).hash("pass,"), ScryptHasher(n=2 ** 10).hash("pass,"))
+		self.assertFalse(ScryptHasher(n=2 ** 11).isCurrent(ScryptHasher(n=2 ** 10).hash("pass,")))
+		with self.assertRaises(ValueError):
+			getHasher("md5$1234")
+	
+	def test_verifyPassword(self):
+		"""Tests legacy hashed passwords are upgraded, and successful verifications are cached"""
+		with open(self.accounts_path, 'w') as file:
+			file.write(f'# Comment\n[administrator]\nname = "admin"\nhashed_password = "{hash("pass,")}"\n')
+		scrypt_hasher: ScryptHasher = ScryptHasher(n=2 ** 10)  # Fast enough for tests
+		hashers: dict = {ScryptHasher.name: scrypt_hasher}
+		with patch.object(login, 'default_hasher', scrypt_hasher), patch.dict(login.hashers, hashers):
+			login.verified_credentials.clear()
+			self.assertFalse(verifyPassword(getAccounts()["admin"], "pass"))
+			self.assertTrue(verifyPassword(getAccounts()["admin"], "pass,"))
+			account: dict = getAccounts()["admin"]
+			self.assertTrue(account["hashed_password"].startswith("scrypt$1024$"))
+			with open(self.accounts_path) as file:
+				self.assertTrue(file.read().startswith("# Comment\n"))
+			
+			with patch.object(ScryptHasher, 'verify') as verify:
+				self.assertTrue(verifyPassword(account, "pass,"))
+				verify.assert_not_called()
+				verify.return_value = False
+				self.assertFalse(verifyPassword(account, "pass"))
+				verify.assert_called_once()
+			self.assertTrue(verifyPassword(account, "pass,"))
+			with patch.object(ScryptHasher, 'verify', return_value=False):
+				with patch.object(login, 'monotonic', lambda: float('inf')):
+					self.assertFalse(verifyPassword(account, "pass,"))  # Expired
+			login.verified_credentials.clear()
@@ -0,0 +1,97 @@
+"""Unit tests for the persistence worker"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from time import sleep
+from unittest import TestCase
+
+from ..src.SBA.storage import JournalRecord, Reporter, logReport, StorageBackend
+from ..src.SBA.utils import PersistenceWorker, state_lock
+
+
+class RecordingBackend(StorageBackend):
+	"""Records what is saved instead of saving it"""
+	
+	name: str = 'RECORDING'
+	
+	def __init__(self) -> None:
+		self.n_snapshots: int = 0
+		self.record_groups: list[list[JournalRecord]] = []
+		self.failing: bool = False
+	
+	def save(self, report: Reporter = logReport) -> None:
+		if self.failing:
+			raise OSError("Disk full")
+		self.n_snapshots += 1
+	
+	def saveChanges(self, records: list[JournalRecord]) -> None:
+		if self.failing:
+			raise OSError("Disk full")
+		self.record_groups.append(list(records))
+
+
+class Test_persistence(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def setUp(self) -> None:
+		self.backend: RecordingBackend = RecordingBackend()
+		self.worker: PersistenceWorker = PersistenceWorker(self.backend, 0.05)
+		self.worker.start()
+	
+	def tearDown(self) -> None:
+		self.backend.failing = False
+		self.assertTrue(self.worker.stop(timeout=5))
+		self.assertFalse(self.worker.is_alive())
+	
+	def test_coalesce(self):
+		"""Tests a burst of snapshot requests is written once, within the latency"""
+		for _ in range(20):
+			self.worker.requestSnapshot()
+		self.assertEqual(self.backend.n_snapshots, 0)
+		sleep(0.5)
+		self.assertEqual(self.backend.n_snapshots, 1)
+		self.worker.requestSnapshot()
+		sleep(0.5)
+		self.assertEqual(self.backend.n_snapshots, 2)
+	
+	def test_flush(self):
+		"""Tests flush() writes the requested snapshot now, without waiting for the latency"""
+		self.worker.latency = 60
+		self.worker.requestSnapshot()
+		self.assertTrue(self.worker.flush(timeout=5))
+		self.assertEqual(self.backend.n_snapshots, 1)
+		self.assertTrue(self.worker.flush(timeout=5))  # Nothing to write
+		self.assertEqual(self.backend.n_snapshots, 1)
+	
+	def test_recordGroups(self):
+		"""Tests change records queued while the worker is busy are saved together, in order"""
+		records: list[JournalRecord] = [('DELETE', ticket_index) for ticket_index in range(1, 11)]
+		with state_lock:  # The worker waits for the lock, as if the data was being changed
+			for record in records:
+				self.worker.saveChange(record)
+				sleep(0.001)
+		self.assertTrue(self.worker.flush(timeout=5))
+		self.assertLessEqual(len(self.backend.record_groups), 2)
+		self.assertEqual([record for group in self.backend.record_groups for record in group], records)
+	
+	def test_retry(self):
+		"""Tests nothing is lost if saving fails, it is retried"""
+		self.backend.failing = True
+		self.worker.saveChange(('DELETE', 1))
+		self.worker.requestSnapshot()
+		self.assertFalse(self.worker.flush(timeout=0.2))
+		self.backend.failing = False
+		self.assertTrue(self.worker.flush(timeout=5))
+		self.assertEqual(self.backend.record_groups, [[('DELETE', 1)]])
+		self.assertEqual(self.backend.n_snapshots, 1)
@@ -0,0 +1,94 @@
+"""Unit tests for the seating plan renderer"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from re import findall
+from unittest import TestCase
+
+from ..src.SBA.colour import normal_colour
+from ..src.SBA.house import House
+from ..src.SBA.language import language
+from ..src.SBA.render import countScreenLines, displayWidth, forgetFrames, FrameTemplate, getFrameTemplate
+from ..src.SBA.render import renderSeatingPlan, renderSeatingPlanScreen
+
+
+class Test_render(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def setUp(self) -> None:
+		House.houses_table = {}
+		House.n_House = 0
+	
+	def test_renderSeatingPlan(self):
+		"""Tests the frame shows every seat, the selected seats and the legend"""
+		house: House = House(row_number=3, column_number=4)
+		house.setSeat(0, 0, 1)
+		house.setSeat(2, 3, 2)
+		template: FrameTemplate = getFrameTemplate(normal_colour, language, 4)
+		
+		frame: str = renderSeatingPlan(house)
+		self.assertTrue(frame.startswith(template.header))
+		self.assertTrue(frame.endswith(template.legend))
+		self.assertEqual(frame.count(template.seat_glyphs[0]), 10)
+		self.assertEqual(frame.count(template.seat_glyphs[1]), 1)
+		self.assertEqual(frame.count(template.seat_glyphs[2]), 1)
+		self.assertEqual(frame.count(template.separator), 4)
+		
+		frame = renderSeatingPlan(house, [(1, 1), (1, 2), (1, 1)])
+		self.assertEqual(frame.count(template.selected_glyph), 2)
+		self.assertEqual(frame.count(template.seat_glyphs[0]), 8)
+		self.assertTrue(frame.endswith(template.selected_legend))
+		self.assertTrue(renderSeatingPlan(house, []).endswith(template.selected_legend))
+		
+		self.assertIs(getFrameTemplate(normal_colour, language, 4), template)
+	
+	def test_renderSeatingPlanScreen(self):
+		"""Tests only the changed seats are redrawn, and it falls back to a full repaint"""
+		house: House = House(row_number=3, column_number=4)
+		template: FrameTemplate = getFrameTemplate(normal_colour, language, 4)
+		forgetFrames()
+		header: str = "Header\n\n"
+		
+		text, full_repaint = renderSeatingPlanScreen(house, header, "->", [], (80, 40))
+		self.assertTrue(full_repaint)
+		self.assertEqual(text, header + renderSeatingPlan(house, []) + "->")
+		
+		house.setSeat(1, 2, 1)
+		text, full_repaint = renderSeatingPlanScreen(house, header, "->", [(0, 0)], (80, 40))
+		self.assertFalse(full_repaint)
+		self.assertNotIn(template.header, text)
+		# Row 1 is at line 2 (header) + 4 (screen and column letters) + 1, column A is at column 6
+		self.assertIn(f'\033[7;6H{template.selected_glyph}', text)
+		self.assertIn(f'\033[9;10H{template.seat_glyphs[1]}', text)
+		self.assertEqual(len(findall(r'\033\[\d+;\d+H', text)), 3)  # Only two seats, and the footer
+		self.assertTrue(text.endswith("->"))
+		
+		text, full_repaint = renderSeatingPlanScreen(house, header, "->", [], (80, 40))
+		self.assertFalse(full_repaint)
+		self.assertIn(f'\033[7;6H{template.seat_glyphs[0]}', text)
+		
+		# Different header height
+		self.assertTrue(renderSeatingPlanScreen(house, "Header\n", "->", [], (80, 40))[1])
+		# Does not fit in the terminal
+		self.assertTrue(renderSeatingPlanScreen(house, "Header\n", "->", [], (80, 10))[1])
+		self.assertTrue(renderSeatingPlanScreen(house, "Header\n", "->", [], (80, 40))[1])
+		self.assertFalse(renderSeatingPlanScreen(house, "Header\n", "->", [], (80, 40))[1])
+		forgetFrames()
+		self.assertTrue(renderSeatingPlanScreen(house, "Header\n", "->", [], (80, 40))[1])
+	
+	def test_displayWidth(self):
+		"""Tests wide characters take two columns and colours take none"""
+		self.assertEqual(displayWidth("電影院1"), 7)
+		self.assertEqual(displayWidth("\033[1;31mERROR\033[30m\033[47m"), 5)
+		self.assertEqual(countScreenLines("12345\n\n1234567890A", 5), [1, 1, 3])
@@ -0,0 +1,76 @@
+"""Unit tests for SeatMap"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pickle import dumps, loads
+from unittest import TestCase
+
+from ..src.SBA.seatmap import SeatMap
+
+
+class Test_SeatMap(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def test_initSeatMap(self):
+		"""Tests a new SeatMap is empty"""
+		seat_map: SeatMap = SeatMap(2, 3)
+		self.assertEqual(len(seat_map), 2)
+		self.assertEqual(len(seat_map[0]), 3)
+		self.assertEqual(seat_map, [[0, 0, 0], [0, 0, 0]])
+		self.assertEqual(seat_map.count(0), 6)
+		with self.assertRaises(ValueError):
+			SeatMap(2, 3, bytearray(5))
+	
+	def test_readCompatibility(self):
+		"""Tests SeatMap can be read like a list of lists"""
+		seating_plan: list[list[int]] = [
+			[1, 0, 2],
+			[0, 1, 0]
+		]
+		seat_map: SeatMap = SeatMap.fromList(seating_plan)
+		self.assertEqual(seat_map, seating_plan)
+		self.assertEqual(seat_map.toList(), seating_plan)
+		self.assertEqual(seat_map[0], [1, 0, 2])
+		self.assertEqual(seat_map[-1], [0, 1, 0])
+		self.assertEqual(seat_map[0][2], 2)
+		self.assertEqual(seat_map[1][-2], 1)
+		self.assertEqual([list(row) for row in seat_map], seating_plan)
+		with self.assertRaises(IndexError):
+			seat_map[2]  # NOQA
+		with self.assertRaises(IndexError):
+			seat_map[0][3]  # NOQA
+		with self.assertRaises(TypeError):
+			seat_map[0][0] = 1  # NOQA # Rows are read-only
+		with self.assertRaises(ValueError):
+			SeatMap.fromList([[0, 0], [0]])
+	
+	def test_seatOperation(self):
+		"""Tests changing, counting, clearing and copying seats"""
+		seat_map: SeatMap = SeatMap(3, 3)
+		self.assertEqual(seat_map.set(1, 1, 1), 0)
+		self.assertEqual(seat_map.set(1, 1, 2), 1)
+		seat_map.set(2, 0, 1)
+		self.assertEqual(seat_map.get(1, 1), 2)
+		self.assertEqual((seat_map.count(0), seat_map.count(1), seat_map.count(2)), (7, 1, 1))
+		
+		copy: SeatMap = seat_map.copy()
+		seat_map.clear()
+		self.assertEqual(seat_map.count(0), 9)
+		self.assertEqual(copy, [[0, 0, 0], [0, 2, 0], [1, 0, 0]])
+		self.assertNotEqual(copy, seat_map)
+	
+	def test_pickle(self):
+		"""Tests pickling a SeatMap"""
+		seat_map: SeatMap = SeatMap.fromList([[1, 0], [2, 0]])
+		self.assertEqual(loads(dumps(seat_map)), seat_map)
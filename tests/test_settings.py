@@ -0,0 +1,67 @@
+"""Unit tests for the settings store"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from os import listdir, path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..src.SBA import settings
+from ..src.SBA.settings import deleteSettings, getSetting, loadSettings, saveSettings, setSetting
+
+
+class Test_settings(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def setUp(self) -> None:
+		self.data_directory: TemporaryDirectory = TemporaryDirectory()
+		self.data_path_patch = patch.object(settings, 'getDataPath',
+		                                    lambda filename: path.join(self.data_directory.name, filename))
+		self.data_path_patch.start()
+		loadSettings()
+	
+	def tearDown(self) -> None:
+		self.data_path_patch.stop()
+		self.data_directory.cleanup()
+		settings.settings_loaded = False
+	
+	def test_saveOnlyWhenChanged(self):
+		"""Tests the settings file is only written when a setting really changes"""
+		self.assertEqual(getSetting('language'), 'ENGLISH')
+		setSetting('language', 'ENGLISH')
+		self.assertFalse(saveSettings())
+		self.assertEqual(listdir(self.data_directory.name), [])
+		
+		setSetting('language', 'CHINESE')
+		setSetting('colour_mode', 'LIGHT')
+		self.assertTrue(saveSettings())
+		self.assertFalse(saveSettings())
+		self.assertEqual(listdir(self.data_directory.name), ['settings.toml'])
+		
+		loadSettings()
+		self.assertEqual((getSetting('language'), getSetting('colour_mode')), ('CHINESE', 'LIGHT'))
+		self.assertTrue(deleteSettings())
+		self.assertEqual(getSetting('language'), 'ENGLISH')
+		self.assertEqual(listdir(self.data_directory.name), [])
+	
+	def test_migrateLegacySettings(self):
+		"""Tests settings are migrated from language.txt and colour.txt"""
+		with open(path.join(self.data_directory.name, 'language.txt'), 'w') as file:
+			file.write('CHINESE')
+		loadSettings()
+		self.assertEqual((getSetting('language'), getSetting('colour_mode')), ('CHINESE', 'DARK'))
+		self.assertTrue(saveSettings())
+		self.assertTrue(deleteSettings())
+		self.assertEqual(listdir(self.data_directory.name), [])
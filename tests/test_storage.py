@@ -0,0 +1,356 @@
+"""Unit tests for the storage backends"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from copy import deepcopy
+from os import listdir, path, remove, replace
+from pickle import dump
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..src.SBA.house import House, PurchaseTransaction
+from ..src.SBA.storage import PickleBackend, readSnapshotFile, SEAT_FILE_ENTRY, SEAT_FILE_HEADER, SnapshotCorrupted
+from ..src.SBA.storage import SQLiteBackend, StorageBackend
+from ..src.SBA.ticket import Ticket
+
+
+def resetHouses() -> None:
+	"""Reset all house data"""
+	House.houses_table = {}
+	House.n_House = 0
+	House.clearTickets()
+	House.total_tickets = 0
+	House.total_revenue = 0
+
+
+def snapshot() -> tuple:
+	"""Returns all house data, to be compared"""
+	return deepcopy((House.total_revenue, House.total_tickets, House.n_House,
+	                 [(house.house_number, house.n_row, house.n_column, house.movie, house.house_revenue,
+	                   house.adult_price, house.child_price, house.seating_plan.toList(), house.seat_counts)
+	                  for house in House.houses_table.values()],
+	                 [ticket.astuple() for ticket in House.tickets_table.values()],
+	                 House.house_tickets_table))
+
+
+class Test_storage(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def setUp(self) -> None:
+		self.data_directory: TemporaryDirectory = TemporaryDirectory()
+		resetHouses()
+	
+	def tearDown(self) -> None:
+		resetHouses()
+		self.data_directory.cleanup()
+	
+	def getBackends(self) -> list[StorageBackend]:
+		return [PickleBackend(self.data_directory.name),
+		        SQLiteBackend(path.join(self.data_directory.name, 'data.sqlite3'))]
+	
+	def sell(self, house: House, seats: list[tuple[int, int]]) -> list[Ticket]:
+		transaction: PurchaseTransaction = house.beginPurchase()
+		for row_index, column_index in seats:
+			transaction.stage(row_index, column_index, house.adult_price)
+		return transaction.commit()
+	
+	def test_saveAndLoad(self):
+		"""Tests the whole data is the same after saving and loading it"""
+		for backend in self.getBackends():
+			with self.subTest(backend=backend.name):
+				resetHouses()
+				self.assertFalse(backend.load())
+				house: House = House(row_number=5, column_number=6)
+				house.movie = "Movie"
+				house.adult_price = 80
+				House(row_number=3, column_number=2).fillSeats((0, 0, 1, 1), 2)
+				self.sell(house, [(0, 0), (4, 5)])
+				expected: tuple = snapshot()
+				backend.save()
+				
+				resetHouses()
+				self.assertTrue(backend.load())
+				self.assertEqual(snapshot(), expected)
+				self.assertTrue(backend.delete())
+				backend.close()
+	
+	def test_saveChange(self):
+		"""Tests sales, refunds, deletions and overrides are saved without saving the whole data"""
+		for backend in self.getBackends():
+			with self.subTest(backend=backend.name):
+				resetHouses()
+				house: House = House(row_number=4, column_number=4)
+				house.adult_price = 50
+				backend.save()
+				
+				tickets: list[Ticket] = self.sell(house, [(0, 0), (0, 1), (1, 1)])
+				backend.saveChange(('SELL', tuple(tickets)))
+				
+				ticket: Ticket = tickets[0]
+				house.setSeat(ticket.row_index, ticket.column_index, 0)
+				House.total_revenue -= ticket.price
+				house.house_revenue -= ticket.price
+				House.removeTicket(ticket.index)
+				backend.saveChange(('REFUND', ticket.index, (house.house_number, ticket.row_index, ticket.column_index)))
+				
+				ticket = tickets[1]
+				house.setSeat(ticket.row_index, ticket.column_index, 0)
+				House.removeTicket(ticket.index)
+				backend.saveChange(('DELETE', ticket.index, (house.house_number, ticket.row_index, ticket.column_index)))
+				
+				house.fillSeats((2, 0, 3, 3), 2)
+				backend.saveChange(('OVERRIDE', house.house_number, ((2, 0, 3, 3),), 2))
+				house.fillSeats((3, 2, 3, 3), 0)
+				backend.saveChange(('OVERRIDE', house.house_number, ((3, 2, 3, 3),), 0))
+				expected: tuple = snapshot()
+				
+				resetHouses()
+				self.assertTrue(backend.load())
+				self.assertEqual(snapshot(), expected)
+				self.assertEqual(House.total_revenue, 100)  # Deleting a ticket does not refund it
+				self.assertEqual(House.houses_table[1].n_available, 16 - 1 - 6)
+				backend.delete()
+				backend.close()
+	
+	def test_delete(self):
+		"""Tests all the saved files are deleted"""
+		for backend in self.getBackends():
+			with self.subTest(backend=backend.name):
+				resetHouses()
+				House(row_number=2, column_number=2)
+				backend.save()
+				self.assertTrue(listdir(self.data_directory.name))
+				self.assertTrue(backend.delete())
+				self.assertEqual(listdir(self.data_directory.name), [])
+				self.assertFalse(backend.delete())
+	
+	def test_snapshotFallback(self):
+		"""Tests the previous snapshot is loaded if the snapshot is truncated, e.g. the power is cut"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		house.adult_price = 30
+		self.sell(house, [(0, 0)])
+		backend.save()
+		expected: tuple = snapshot()
+		self.sell(house, [(1, 1)])
+		backend.save()
+		
+		houses_path: str = path.join(self.data_directory.name, 'houses')
+		with open(houses_path, 'r+b') as file:
+			file.truncate(path.getsize(houses_path) // 2)
+		with self.assertRaises(SnapshotCorrupted):
+			readSnapshotFile(houses_path)
+		
+		resetHouses()
+		self.assertTrue(backend.load())
+		self.assertEqual(snapshot(), expected)  # The tickets snapshot of the same generation is used
+		
+		backend.save()  # The corrupted snapshot is kept aside, not as the previous snapshot
+		self.assertTrue(path.exists(houses_path + '.corrupted'))
+		readSnapshotFile(houses_path + '.prev')
+		resetHouses()
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+	
+	def test_halfReplacedSnapshots(self):
+		"""Tests snapshots of the same generation are loaded if only one snapshot file was replaced"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		backend.save()
+		expected: tuple = snapshot()
+		self.sell(house, [(0, 0)])
+		backend.save()
+		tickets_path: str = path.join(self.data_directory.name, 'tickets')
+		replace(tickets_path + '.prev', tickets_path)  # As if the power was cut before replacing tickets
+		
+		resetHouses()
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+	
+	def test_journal(self):
+		"""Tests changes are appended to the journal and replayed on top of the snapshot"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		house.adult_price = 40
+		backend.save()
+		journal_path: str = path.join(self.data_directory.name, 'journal')
+		journal_size: int = path.getsize(journal_path)
+		backend.saveChange(('SELL', tuple(self.sell(house, [(0, 0)]))))
+		self.assertGreater(path.getsize(journal_path), journal_size)
+		backend.saveChange(('SELL', tuple(self.sell(house, [(1, 1)]))))
+		expected: tuple = snapshot()
+		
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+		self.assertEqual(backend.journal_length, 2)
+		backend.close()
+	
+	def test_tornJournal(self):
+		"""Tests a torn record at the end of the journal is cut off, so later records are replayed"""
+		for garbage in (b'\x80', b'\x80\x05\x95\xff\xff\xff\xff\x00\x00\x00\x00', b'\xff' * 10, b'\x00' * 100):
+			with self.subTest(garbage=garbage):
+				resetHouses()
+				backend: PickleBackend = PickleBackend(self.data_directory.name)
+				backend.delete()
+				house: House = House(row_number=2, column_number=2)
+				house.adult_price = 40
+				backend.save()
+				backend.saveChange(('SELL', tuple(self.sell(house, [(0, 0)]))))
+				expected: tuple = snapshot()
+				journal_path: str = path.join(self.data_directory.name, 'journal')
+				journal_size: int = path.getsize(journal_path)
+				with open(journal_path, 'ab') as file:  # As if the power was cut when writing a record
+					file.write(garbage)
+				
+				resetHouses()
+				backend = PickleBackend(self.data_directory.name)
+				backend.load()
+				self.assertEqual(snapshot(), expected)
+				self.assertEqual(path.getsize(journal_path), journal_size)
+				
+				house = House.houses_table[1]
+				backend.saveChange(('SELL', tuple(self.sell(house, [(1, 1)]))))
+				expected = snapshot()
+				resetHouses()
+				backend = PickleBackend(self.data_directory.name)
+				backend.load()
+				self.assertEqual(snapshot(), expected)
+				self.assertEqual(backend.journal_length, 2)
+				backend.close()
+	
+	def test_staleJournal(self):
+		"""Tests a journal of an older snapshot is cut off, so the records appended later are replayed"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		backend.save()
+		journal_path: str = path.join(self.data_directory.name, 'journal')
+		with open(journal_path, 'wb') as file:  # As if the program stopped before restarting the journal
+			dump(('BEGIN', backend.journal_generation - 1), file)
+			dump(('DELETE', 1), file)
+		
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		house = House.houses_table[1]
+		backend.saveChange(('SELL', tuple(self.sell(house, [(0, 0)]))))
+		expected: tuple = snapshot()
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+		backend.close()
+	
+	def test_unchangedTickets(self):
+		"""Tests the tickets snapshot is only written if the tickets changed"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		self.sell(house, [(0, 0)])
+		backend.save()
+		house.movie = "Movie"
+		backend.save()
+		self.assertEqual(sorted(listdir(self.data_directory.name)),
+		                 ['houses', 'houses.prev', 'journal', 'journal.prev', 'seats', 'seats.prev', 'tickets'])
+		self.sell(house, [(1, 1)])
+		backend.save()
+		self.assertIn('tickets.prev', listdir(self.data_directory.name))
+		expected: tuple = snapshot()
+		
+		resetHouses()
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+		self.assertEqual(House.houses_table[1].movie, "Movie")
+	
+	def test_seatFile(self):
+		"""Tests the seats are saved in the seat-state file, and a house only reads them when they are needed"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=3)
+		House(row_number=1, column_number=1)
+		backend.save()
+		seats_path: str = path.join(self.data_directory.name, 'seats')
+		seats_offset: int = SEAT_FILE_HEADER.size + 2 * SEAT_FILE_ENTRY.size
+		house.setSeat(1, 2, 2)  # Without saving it
+		with open(seats_path, 'rb') as file:
+			self.assertEqual(file.read()[seats_offset:], bytes(7))
+		backend.saveChange(('OVERRIDE', house.house_number, ((1, 2, 1, 2),), 2))
+		with open(seats_path, 'rb') as file:
+			self.assertEqual(file.read()[seats_offset:], bytes([0, 0, 0, 0, 0, 2, 0]))
+		expected: tuple = snapshot()
+		backend.close()
+		
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertIn('_seating_plan', vars(House.houses_table[1]))  # Read when the journal was replayed
+		self.assertNotIn('_seating_plan', vars(House.houses_table[2]))  # Not read yet
+		self.assertEqual(House.houses_table[2].n_available, 1)
+		self.assertIn('_seating_plan', vars(House.houses_table[2]))
+		self.assertEqual(snapshot(), expected)
+		backend.close()
+	
+	def test_seatFileCrash(self):
+		"""Tests the seat-state file is never newer than the journal, e.g. if the program stops before a refund is saved"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		house.adult_price = 10
+		backend.save()
+		tickets: list[Ticket] = self.sell(house, [(0, 0)])
+		backend.saveChange(('SELL', tuple(tickets)))
+		expected: tuple = snapshot()
+		house.setSeat(0, 0, 0)  # Refunded, but not saved
+		House.removeTicket(tickets[0].index)
+		house.clearPlan()  # Cleared, but the snapshot is not written
+		backend.seat_file.close()  # As if the program stopped
+		
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+		self.assertEqual(House.houses_table[1].seating_plan.get(0, 0), 1)  # It cannot be sold again
+		backend.close()
+	
+	def test_seatFileFallback(self):
+		"""Tests the previous seat-state file and journal are loaded with the previous snapshot"""
+		backend: PickleBackend = PickleBackend(self.data_directory.name)
+		house: House = House(row_number=2, column_number=2)
+		house.adult_price = 10
+		backend.save()
+		backend.saveChange(('SELL', tuple(self.sell(house, [(0, 0)]))))
+		expected: tuple = snapshot()
+		self.sell(house, [(1, 1)])
+		backend.save()
+		with open(path.join(self.data_directory.name, 'houses'), 'r+b') as file:
+			file.truncate(10)
+		
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertEqual(snapshot(), expected)  # With the sale in the journal of the previous snapshot
+		backend.saveChange(('SELL', tuple(self.sell(House.houses_table[1], [(0, 1)]))))
+		expected = snapshot()
+		backend.save()
+		resetHouses()
+		backend = PickleBackend(self.data_directory.name)
+		backend.load()
+		self.assertEqual(snapshot(), expected)
+		
+		backend.close()
+		for filename in ('seats', 'seats.prev'):
+			remove(path.join(self.data_directory.name, filename))
+		resetHouses()
+		backend.load()
+		with self.assertLogs(level='CRITICAL'):
+			self.assertEqual(House.houses_table[1].seating_plan, [[1, 1], [0, 0]])  # Recovered from the tickets
+		backend.close()
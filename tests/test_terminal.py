@@ -0,0 +1,70 @@
+"""Unit tests for the terminal control in utils"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..src.SBA import utils
+from ..src.SBA.utils import ANSI_CLEAR_SCREEN, clearScreen, detectTerminal
+
+
+class FakeTerminal(StringIO):
+	"""Standard output which is (or is not) a terminal"""
+	
+	def __init__(self, tty: bool) -> None:
+		super().__init__()
+		self.tty: bool = tty
+	
+	def isatty(self) -> bool:
+		return self.tty
+
+
+class Test_terminal(TestCase):  # NOQA: disable 'all caps in class name' warning
+	
+	def setUp(self) -> None:
+		self.terminal_supports_ansi = utils.terminal_supports_ansi
+	
+	def tearDown(self) -> None:
+		utils.terminal_supports_ansi = self.terminal_supports_ansi
+	
+	def detect(self, tty: bool, term: str) -> bool:
+		"""Returns what detectTerminal() detects on a POSIX system"""
+		with patch.object(utils, 'stdout', FakeTerminal(tty)), patch.object(utils, 'name', 'posix'):
+			with patch.dict(utils.environ, {'TERM': term}):
+				detectTerminal()
+		return bool(utils.terminal_supports_ansi)
+	
+	def test_detectTerminal(self):
+		"""Tests ANSI escape sequences are used unless the terminal is dumb, or when stdout is not a terminal"""
+		self.assertTrue(self.detect(True, 'xterm-256color'))
+		self.assertFalse(self.detect(True, 'dumb'))
+		self.assertTrue(self.detect(False, 'dumb'))  # Written to a file or a pipe, like what 'clear' would write
+	
+	def test_clearScreen(self):
+		"""Tests the screen is cleared in-process with ANSI escape sequences, and by 'clear' as the fallback"""
+		utils.terminal_supports_ansi = True
+		with patch.object(utils, 'system') as system, patch('sys.stdout', StringIO()) as output:
+			clearScreen()
+		system.assert_not_called()
+		self.assertEqual(output.getvalue(), ANSI_CLEAR_SCREEN)
+		
+		utils.terminal_supports_ansi = False
+		with patch.object(utils, 'system') as system, patch.object(utils, 'name', 'posix'):
+			with patch('sys.stdout', StringIO()) as output:
+				clearScreen()
+		system.assert_called_once_with('clear')
+		self.assertNotIn(ANSI_CLEAR_SCREEN, output.getvalue())
@@ -0,0 +1,133 @@
+"""Unit tests for Ticket and TicketStore"""
+
+# Copyright 2023 Joe Chau
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from pickle import dumps, loads
+from unittest import TestCase
+
+from ..src.SBA.ticket import _restoreTicketStore, Ticket, TicketStore, timestampFromString, timestampToString
+
+
+class Test_Ticket(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def test_tupleCompatibility(self):
+		"""Tests Ticket can be used like the old 8-tuple ticket"""
+		old_ticket: tuple = (12, "T00012", '2023-09-09T01:06:02', 3, "An Excellent Movie", 4, 5, 60)
+		ticket: Ticket = Ticket.fromTuple(old_ticket)
+		self.assertEqual(ticket, old_ticket)
+		self.assertEqual(ticket.number, "T00012")
+		self.assertEqual(ticket.time, '2023-09-09T01:06:02')
+		self.assertEqual(ticket[3], 3)
+		ticket_index, ticket_number, time, house_number, movie, row_index, column_index, price = ticket
+		self.assertEqual((ticket_index, row_index, column_index, price), (12, 4, 5, 60))
+		self.assertIs(Ticket.fromTuple(ticket), ticket)
+		self.assertEqual(loads(dumps(ticket)), ticket)
+		with self.assertRaises(AttributeError):
+			ticket.seat = "5F"  # NOQA # Slotted
+	
+	def test_timestamp(self):
+		"""Tests converting between time strings and timestamps"""
+		for time in ['0186-05-05T00:00:00', '1970-01-01T00:00:00', '2023-09-09T01:06:02']:
+			self.assertEqual(timestampToString(timestampFromString(time)), time)
+		self.assertEqual(timestampFromString('1970-01-02T00:00:00'), 86400)
+
+
+class Test_TicketStore(TestCase):  # NOQA: disable 'all caps in class name' warning
+
+	def test_mapping(self):
+		"""Tests TicketStore can be used like a dict of ticket index to ticket"""
+		tickets: list[tuple] = [
+			(3, "T00003", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 2, 0),
+			(4, "T00004", '2018-08-01T03:05:00', 2, "Another Movie", 0, 3, 10),
+			(6, "T00006", '2020-08-13T00:06:09', 1, "An Excellent Movie", 0, 5, 20),
+		]
+		store: TicketStore = TicketStore.fromTickets(tickets)
+		self.assertEqual(len(store), 3)
+		self.assertEqual(list(store), [3, 4, 6])
+		self.assertEqual(list(store.values()), tickets)
+		self.assertEqual(store[4], tickets[1])
+		self.assertEqual(store.movies, ["An Excellent Movie", "Another Movie"])
+		self.assertNotIn(5, store)  # Missing ticket indexes are holes
+		self.assertNotIn(2, store)
+		self.assertEqual(store.get(7), None)
+		
+		self.assertEqual(store.pop(4), tickets[1])
+		self.assertEqual(store.pop(4), None)
+		with self.assertRaises(KeyError):
+			del store[4]
+		self.assertEqual(dict(store.items()), {3: tickets[0], 6: tickets[2]})
+		
+		with self.assertRaises(ValueError):
+			store[7] = tickets[0]  # Ticket index does not match the key
+		store[1] = (1, "T00001", '2006-05-22T05:02:00', 1, "An Excellent Movie", 0, 0, 0)
+		self.assertEqual(list(store), [1, 3, 6])  # Still in the order of ticket index
+	
+	def test_pickle(self):
+		"""Tests pickling a TicketStore"""
+		store: TicketStore = TicketStore.fromTickets([
+			(1, "T00001", '2023-09-09T01:05:03', 1, "An Excellent Movie", 0, 0, 0),
+			(2, "T00002", '2023-09-09T01:06:02', 1, "An Excellent Movie", 0, 1, 0),
+		])
+		del store[1]
+		restored_store: TicketStore = loads(dumps(store))
+		self.assertEqual(list(restored_store.items()), list(store.items()))
+		self.assertEqual(len(restored_store), 1)
+		restored_store[3] = (3, "T00003", '2023-09-09T01:07:02', 2, "Another Movie", 0, 0, 0)
+		self.assertEqual(restored_store.get(3).movie, "Another Movie")
+		
+		old_columns: list[array] = [array('q', [0, 0]), array('i', [0, 1]), array('i', [0, 0]),
+		                            array('i', [0, 2]), array('i', [0, 3]), array('i', [0, 50])]
+		old_store: TicketStore = _restoreTicketStore(5, 1, ["Movie"], *(column.tobytes() for column in old_columns))
+		self.assertEqual(list(old_store.items()), [(6, Ticket(6, 0, 1, "Movie", 2, 3, 50))])  # Pickled by older versions
+	
+	def test_compact(self):
+		"""Tests the holes left by removed tickets are dropped, once they are more than the active tickets"""
+		store: TicketStore = TicketStore.fromTickets(
+			(index, f"T{index:0>5}", '2023-09-09T01:05:03', 1 + index % 2, "Movie", 0, index, 50) for index in range(1, 9)
+		)
+		for ticket_index in (1, 2, 5):
+			del store[ticket_index]
+		self.assertEqual(len(store.house_numbers), 8)  # Holes are still fewer than the active tickets
+		self.assertEqual(store.compact(), 3)
+		self.assertEqual(list(store.indexes), [3, 4, 6, 7, 8])
+		self.assertEqual(store.get(7).column_index, 7)
+		self.assertNotIn(5, store)
+		self.assertEqual(store.compact(), 0)
+		
+		for ticket_index in (3, 8):
+			del store[ticket_index]
+		self.assertEqual(len(store.house_numbers), 5)
+		del store[6]
+		self.assertEqual(list(store.indexes), [4, 7])  # Compacted when the holes became the majority
+		store[9] = (9, "T00009", '2023-09-09T01:07:02', 1, "Movie", 0, 0, 50)
+		self.assertEqual(list(store), [4, 7, 9])
+		for ticket_index in (4, 7, 9):
+			del store[ticket_index]
+		self.assertEqual(len(store.house_numbers), 0)
+		store[10] = (10, "T00010", '2023-09-09T01:07:02', 1, "Movie", 0, 0, 50)
+		self.assertEqual(list(store), [10])
+	
+	def test_sparse(self):
+		"""Tests a store of far apart ticket indexes only takes space for its tickets"""
+		store: TicketStore = TicketStore.fromTickets(
+			(index, f"T{index:0>5}", '2023-09-09T01:05:03', 1, "Movie", 0, 0, 50) for index in (1, 50000, 100000)
+		)
+		self.assertEqual(len(store.house_numbers), 3)
+		self.assertEqual(store[50000].index, 50000)
+		del store[50000]
+		restored_store: TicketStore = loads(dumps(store))
+		self.assertEqual(len(restored_store.house_numbers), 2)  # Holes are dropped when restored
+		self.assertEqual(list(restored_store), [1, 100000])